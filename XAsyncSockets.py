@@ -4,12 +4,29 @@ Copyright © 2019 Jean-Christophe Bos & HC² (www.hc2.fr)
 """
 
 
-from   _thread  import allocate_lock, start_new_thread
+from   _thread  import allocate_lock, start_new_thread, get_ident
 from   time     import sleep
 from   select   import select
+from   struct   import unpack_from
 import socket
 import ssl
 
+try :
+    from select import epoll, EPOLLIN, EPOLLOUT, EPOLLPRI, EPOLLERR, EPOLLHUP, EPOLLONESHOT
+except :
+    epoll = None
+
+try :
+    from os import fstat
+except :
+    fstat = None
+
+try :
+    from sys import getsizeof
+except :
+    def getsizeof(obj) :
+        return 0
+
 try :
     from time import perf_counter
 except :
@@ -17,6 +34,570 @@ except :
     def perf_counter() :
         return ticks_ms() / 1000
 
+# ============================================================================
+# ===( XSelectPoller )========================================================
+# ============================================================================
+
+class XSelectPoller :
+
+    # select() only sees the lists given at call time,
+    WAKEUP_ON_INTEREST = True
+
+    def __init__(self) :
+        self._readSet      = set()
+        self._writeSet     = set()
+        self._version      = 0
+        self._snapshot     = ([ ], [ ])
+        self._snapshotVers = 0
+
+    # ------------------------------------------------------------------------
+
+    def Register(self, socket) :
+        pass
+
+    # ------------------------------------------------------------------------
+
+    def Unregister(self, socket) :
+        socketno = socket.fileno()
+        if socketno in self._readSet or socketno in self._writeSet :
+            self._readSet.discard(socketno)
+            self._writeSet.discard(socketno)
+            self._version += 1
+
+    # ------------------------------------------------------------------------
+
+    def SetReadInterest(self, socket, notify) :
+        return self._setSetInterest(socket, self._readSet, notify)
+
+    # ------------------------------------------------------------------------
+
+    def SetWriteInterest(self, socket, notify) :
+        return self._setSetInterest(socket, self._writeSet, notify)
+
+    # ------------------------------------------------------------------------
+
+    def SetOneShot(self, oneShot) :
+        # Not supported, each waiting thread sees the events,
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def Rearm(self, socket) :
+        pass
+
+    # ------------------------------------------------------------------------
+
+    def _setSetInterest(self, socket, socketsSet, notify) :
+        socketno = socket.fileno()
+        if notify :
+            if socketno not in socketsSet :
+                socketsSet.add(socketno)
+                self._version += 1
+                return True
+        elif socketno in socketsSet :
+            socketsSet.discard(socketno)
+            self._version += 1
+            return True
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def GetSnapshot(self) :
+        # Lists are only rebuilt after an interest change, a change made while
+        # rebuilding leaves the version outdated and triggers a new rebuild,
+        version = self._version
+        if version != self._snapshotVers :
+            self._snapshot     = (list(self._readSet), list(self._writeSet))
+            self._snapshotVers = version
+        return self._snapshot
+
+    # ------------------------------------------------------------------------
+
+    def Poll(self, timeoutSec) :
+        readList, writeList = self.GetSnapshot()
+        return select(readList, writeList, readList, timeoutSec)
+
+# ============================================================================
+# ===( XEpollPoller )=========================================================
+# ============================================================================
+
+class XEpollPoller :
+
+    # epoll_ctl() changes apply at once to the threads in epoll_wait(),
+    WAKEUP_ON_INTEREST = False
+
+    def __init__(self) :
+        if not epoll :
+            raise XAsyncSocketsPoolException('XEpollPoller : epoll is not supported on this system.')
+        self._epoll   = epoll()
+        self._masks   = { }
+        self._oneShot = 0
+
+    # ------------------------------------------------------------------------
+
+    def Register(self, socket) :
+        # Registered in epoll with its first interest only, as epoll always
+        # reports hang ups where select ignores the sockets without interest,
+        self._masks[socket.fileno()] = 0
+
+    # ------------------------------------------------------------------------
+
+    def Unregister(self, socket) :
+        socketno = socket.fileno()
+        if self._masks.pop(socketno, None) :
+            try :
+                self._epoll.unregister(socketno)
+            except :
+                pass
+
+    # ------------------------------------------------------------------------
+
+    def SetReadInterest(self, socket, notify) :
+        return self._setMaskInterest(socket, EPOLLIN | EPOLLPRI, notify)
+
+    # ------------------------------------------------------------------------
+
+    def SetWriteInterest(self, socket, notify) :
+        return self._setMaskInterest(socket, EPOLLOUT, notify)
+
+    # ------------------------------------------------------------------------
+
+    def SetOneShot(self, oneShot) :
+        # A socket then reports its events to a single thread until it is rearmed,
+        self._oneShot = EPOLLONESHOT if oneShot else 0
+        for socketno, mask in self._masks.items() :
+            if mask :
+                self._epoll.modify(socketno, mask | self._oneShot)
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def Rearm(self, socket) :
+        if self._oneShot :
+            socketno = socket.fileno()
+            mask     = self._masks.get(socketno, None)
+            if mask :
+                try :
+                    self._epoll.modify(socketno, mask | self._oneShot)
+                except :
+                    pass
+
+    # ------------------------------------------------------------------------
+
+    def _setMaskInterest(self, socket, flags, notify) :
+        socketno = socket.fileno()
+        mask     = self._masks.get(socketno, None)
+        if mask is None :
+            return False
+        newMask = (mask | flags) if notify else (mask & ~flags)
+        if newMask == mask :
+            return False
+        if not mask :
+            self._epoll.register(socketno, newMask | self._oneShot)
+        elif not newMask :
+            self._epoll.unregister(socketno)
+        else :
+            self._epoll.modify(socketno, newMask | self._oneShot)
+        self._masks[socketno] = newMask
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def Poll(self, timeoutSec) :
+        rd, wr, ex = [ ], [ ], [ ]
+        for socketno, events in self._epoll.poll(timeoutSec) :
+            mask = self._masks.get(socketno, 0)
+            if events & (EPOLLERR | EPOLLHUP) :
+                # Reported like select does : the pending operations will
+                # fail and close the socket with the right reason,
+                if mask & EPOLLIN :
+                    rd.append(socketno)
+                elif mask & EPOLLOUT :
+                    wr.append(socketno)
+                else :
+                    ex.append(socketno)
+                continue
+            if events & EPOLLPRI :
+                ex.append(socketno)
+            if events & EPOLLOUT :
+                wr.append(socketno)
+            if events & EPOLLIN :
+                rd.append(socketno)
+        return (rd, wr, ex)
+
+# ============================================================================
+# ===( XTimerWheel )==========================================================
+# ============================================================================
+
+class XTimerWheel :
+
+    def __init__(self, tickSec=0.25, slotsCount=1024) :
+        self._tickSec    = tickSec
+        self._slotsCount = slotsCount
+        self._slots      = [ { } for i in range(slotsCount) ]
+        self._entries    = { }
+        self._lock       = allocate_lock()
+        self._lastTick   = int(perf_counter() / tickSec)
+
+    # ------------------------------------------------------------------------
+
+    def Add(self, obj, expireTimeSec) :
+        # Rounded up to the next tick so that an entry never fires early,
+        tick = -int(-expireTimeSec // self._tickSec)
+        idx  = tick % self._slotsCount
+        self._lock.acquire()
+        oldIdx = self._entries.get(obj, None)
+        if oldIdx is not None :
+            del self._slots[oldIdx][obj]
+        self._slots[idx][obj] = expireTimeSec
+        self._entries[obj]    = idx
+        self._lock.release()
+
+    # ------------------------------------------------------------------------
+
+    def Remove(self, obj) :
+        self._lock.acquire()
+        idx = self._entries.pop(obj, None)
+        if idx is not None :
+            del self._slots[idx][obj]
+        self._lock.release()
+
+    # ------------------------------------------------------------------------
+
+    def PopExpired(self, nowSec) :
+        expired = [ ]
+        nowTick = int(nowSec / self._tickSec)
+        self._lock.acquire()
+        if self._entries and nowTick > self._lastTick :
+            ticksCount = min(nowTick - self._lastTick, self._slotsCount)
+            for tick in range(nowTick - ticksCount + 1, nowTick + 1) :
+                slot = self._slots[tick % self._slotsCount]
+                if slot :
+                    for obj, expireTimeSec in list(slot.items()) :
+                        # Entries of later rounds stay in their slot,
+                        if expireTimeSec <= nowSec :
+                            del slot[obj]
+                            del self._entries[obj]
+                            expired.append(obj)
+        self._lastTick = nowTick
+        self._lock.release()
+        return expired
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def TickSec(self) :
+        return self._tickSec
+
+    @property
+    def Count(self) :
+        return len(self._entries)
+
+# ============================================================================
+# ===( XLoopStats )===========================================================
+# ============================================================================
+
+class XLoopStats :
+
+    CALLBACK_BOUNDS_SEC = ( 0.0001, 0.001, 0.01, 0.1, 1.0 )
+    EVENTS_BOUNDS       = ( 0, 1, 4, 16, 64 )
+
+    @staticmethod
+    def _getBucketIndex(bounds, value) :
+        for i in range(len(bounds)) :
+            if value <= bounds[i] :
+                return i
+        return len(bounds)
+
+    # ------------------------------------------------------------------------
+
+    def __init__(self, slowCallbackSec=0.1) :
+        self._slowCallbackSec = slowCallbackSec
+        self._onSlowCallback  = None
+        self._lock            = allocate_lock()
+        self.Reset()
+
+    # ------------------------------------------------------------------------
+
+    def Reset(self) :
+        self._lock.acquire()
+        self._wakeupsCount = 0
+        self._pollWaitSec  = 0.0
+        self._pollWaitMax  = 0.0
+        self._eventsCount  = 0
+        self._eventsMax    = 0
+        self._eventsHisto  = [0] * (len(self.EVENTS_BOUNDS) + 1)
+        self._callbacks    = { }
+        self._slowCount    = 0
+        self._lock.release()
+
+    # ------------------------------------------------------------------------
+
+    def AddPollWait(self, waitSec, eventsCount) :
+        idx = XLoopStats._getBucketIndex(self.EVENTS_BOUNDS, eventsCount)
+        self._lock.acquire()
+        self._wakeupsCount += 1
+        self._pollWaitSec  += waitSec
+        self._eventsCount  += eventsCount
+        self._eventsHisto[idx] += 1
+        if waitSec > self._pollWaitMax :
+            self._pollWaitMax = waitSec
+        if eventsCount > self._eventsMax :
+            self._eventsMax = eventsCount
+        self._lock.release()
+
+    # ------------------------------------------------------------------------
+
+    def TimeCallback(self, asyncSocket, eventName, callback, *args) :
+        # The socket may be closed by the callback itself,
+        socketID = asyncSocket.SocketID
+        t        = perf_counter()
+        try :
+            return callback(*args)
+        finally :
+            self._addCallback(type(asyncSocket).__name__, eventName, socketID, perf_counter() - t)
+
+    # ------------------------------------------------------------------------
+
+    def _addCallback(self, className, eventName, socketID, sec) :
+        key  = (className, eventName)
+        idx  = XLoopStats._getBucketIndex(self.CALLBACK_BOUNDS_SEC, sec)
+        slow = (self._slowCallbackSec and sec >= self._slowCallbackSec)
+        self._lock.acquire()
+        item = self._callbacks.get(key, None)
+        if item is None :
+            item = [ 0, 0.0, 0.0, [0] * (len(self.CALLBACK_BOUNDS_SEC) + 1) ]
+            self._callbacks[key] = item
+        item[0]      += 1
+        item[1]      += sec
+        item[3][idx] += 1
+        if sec > item[2] :
+            item[2] = sec
+        if slow :
+            self._slowCount += 1
+        self._lock.release()
+        if slow and self._onSlowCallback :
+            try :
+                self._onSlowCallback(self, className, eventName, socketID, sec)
+            except :
+                pass
+
+    # ------------------------------------------------------------------------
+
+    def GetCallbacksStats(self) :
+        # Returns { (className, eventName) : (count, totalSec, maxSec, histogram) },
+        self._lock.acquire()
+        stats = { key : (item[0], item[1], item[2], list(item[3]))
+                  for key, item in self._callbacks.items() }
+        self._lock.release()
+        return stats
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def SlowCallbackSec(self) :
+        return self._slowCallbackSec
+
+    @property
+    def WakeupsCount(self) :
+        return self._wakeupsCount
+
+    @property
+    def PollWaitSec(self) :
+        return self._pollWaitSec
+
+    @property
+    def PollWaitMax(self) :
+        return self._pollWaitMax
+
+    @property
+    def EventsCount(self) :
+        return self._eventsCount
+
+    @property
+    def EventsMax(self) :
+        return self._eventsMax
+
+    @property
+    def EventsHistogram(self) :
+        return list(self._eventsHisto)
+
+    @property
+    def SlowCallbacksCount(self) :
+        return self._slowCount
+
+    @property
+    def OnSlowCallback(self) :
+        return self._onSlowCallback
+    @OnSlowCallback.setter
+    def OnSlowCallback(self, value) :
+        self._onSlowCallback = value
+
+# ============================================================================
+# ===( XAsyncEventLoop )======================================================
+# ============================================================================
+
+class XAsyncEventLoop :
+
+    def __init__(self, poller) :
+        self._poller        = poller
+        self._timerWheel    = XTimerWheel()
+        self._lock          = allocate_lock()
+        self._asyncSockets  = { }
+        self._exclusive     = True
+        self._oneShot       = False
+        self._threadIdents  = set()
+        self._pendingReads  = { }
+        self._wakeupPending = False
+        self._wakeupRecv, self._wakeupSend = socket.socketpair()
+        self._wakeupRecv.setblocking(0)
+        self._wakeupSend.setblocking(0)
+        self._wakeupNo      = self._wakeupRecv.fileno()
+        poller.Register(self._wakeupRecv)
+        poller.SetReadInterest(self._wakeupRecv, True)
+
+    # ------------------------------------------------------------------------
+
+    def _isOutsideThread(self) :
+        return get_ident() not in self._threadIdents
+
+    # ------------------------------------------------------------------------
+
+    def _drainWakeup(self) :
+        self._wakeupPending = False
+        try :
+            while self._wakeupRecv.recv(256) :
+                pass
+        except :
+            pass
+
+    # ------------------------------------------------------------------------
+
+    def _addSocket(self, socket, asyncSocket) :
+        socketno = socket.fileno()
+        self._lock.acquire()
+        try :
+            self._poller.Register(socket)
+            self._asyncSockets[socketno] = asyncSocket
+            ok = True
+        except :
+            ok = False
+        self._lock.release()
+        return ok
+
+    # ------------------------------------------------------------------------
+
+    def _removeSocket(self, socket) :
+        socketno = socket.fileno()
+        self._lock.acquire()
+        asyncSocket = self._asyncSockets.pop(socketno, None)
+        if asyncSocket :
+            self._poller.Unregister(socket)
+            self._timerWheel.Remove(asyncSocket)
+        self._lock.release()
+        return (asyncSocket is not None)
+
+    # ------------------------------------------------------------------------
+
+    def _socketSetInterest(self, socket, setInterest, notify) :
+        self._lock.acquire()
+        try :
+            ok = ( socket.fileno() in self._asyncSockets and \
+                   setInterest(socket, notify) )
+        except :
+            ok = False
+        self._lock.release()
+        if ok and self._poller.WAKEUP_ON_INTEREST and self._isOutsideThread() :
+            self.Wakeup()
+        return ok
+
+    # ------------------------------------------------------------------------
+
+    def _setExclusive(self, exclusive) :
+        # Shared loops dispatch each socket event to one thread at a time,
+        self._lock.acquire()
+        self._exclusive = exclusive
+        self._oneShot   = self._poller.SetOneShot(not exclusive)
+        self._lock.release()
+
+    # ------------------------------------------------------------------------
+
+    def Rearm(self, socket) :
+        self._lock.acquire()
+        self._poller.Rearm(socket)
+        self._lock.release()
+
+    # ------------------------------------------------------------------------
+
+    def Wakeup(self) :
+        if not self._wakeupPending :
+            self._wakeupPending = True
+            try :
+                self._wakeupSend.send(b'\x00')
+            except :
+                pass
+
+    # ------------------------------------------------------------------------
+
+    def AddPendingReading(self, asyncSocket) :
+        # Data already buffered by the socket will never be signaled by the poller,
+        self._lock.acquire()
+        self._pendingReads[asyncSocket] = None
+        self._lock.release()
+        if self._isOutsideThread() :
+            self.Wakeup()
+
+    # ------------------------------------------------------------------------
+
+    def _popPendingReads(self) :
+        self._lock.acquire()
+        pendingReads       = self._pendingReads
+        self._pendingReads = { }
+        self._lock.release()
+        return list(pendingReads)
+
+    # ------------------------------------------------------------------------
+
+    def SetExpireTimer(self, asyncSocket, expireTimeSec) :
+        # A loop without timers may be waiting up to _CHECK_SEC_INTERVAL,
+        wasEmpty = not self._timerWheel.Count
+        self._timerWheel.Add(asyncSocket, expireTimeSec)
+        if wasEmpty and self._isOutsideThread() :
+            self.Wakeup()
+
+    # ------------------------------------------------------------------------
+
+    def SetReadInterest(self, socket, notify) :
+        return self._socketSetInterest(socket, self._poller.SetReadInterest, notify)
+
+    # ------------------------------------------------------------------------
+
+    def SetWriteInterest(self, socket, notify) :
+        return self._socketSetInterest(socket, self._poller.SetWriteInterest, notify)
+
+    # ------------------------------------------------------------------------
+
+    def GetAllAsyncSockets(self) :
+        return list(self._asyncSockets.values())
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def AsyncSocketsCount(self) :
+        return len(self._asyncSockets)
+
+    @property
+    def TimerWheel(self) :
+        return self._timerWheel
+
+    @property
+    def Exclusive(self) :
+        return self._exclusive
+
+    @property
+    def OneShot(self) :
+        return self._oneShot
+
 # ============================================================================
 # ===( XAsyncSocketsPool )====================================================
 # ============================================================================
@@ -26,14 +607,38 @@ class XAsyncSocketsPoolException(Exception) :
 
 class XAsyncSocketsPool :
 
-    def __init__(self) :
+    POLLER_AUTO   = 'auto'
+    POLLER_SELECT = 'select'
+    POLLER_EPOLL  = 'epoll'
+
+    @staticmethod
+    def GetPollerTypes() :
+        return [ XAsyncSocketsPool.POLLER_AUTO,
+                 XAsyncSocketsPool.POLLER_SELECT,
+                 XAsyncSocketsPool.POLLER_EPOLL ]
+
+    # ------------------------------------------------------------------------
+
+    def __init__(self, pollerType=POLLER_AUTO, loopsCount=1) :
+        if pollerType == XAsyncSocketsPool.POLLER_AUTO :
+            pollerType = XAsyncSocketsPool.POLLER_EPOLL if epoll \
+                         else XAsyncSocketsPool.POLLER_SELECT
+        if pollerType == XAsyncSocketsPool.POLLER_SELECT :
+            pollerClass = XSelectPoller
+        elif pollerType == XAsyncSocketsPool.POLLER_EPOLL :
+            pollerClass = XEpollPoller
+        else :
+            raise XAsyncSocketsPoolException('XAsyncSocketsPool : Poller type "%s" is unknown.' % pollerType)
+        if type(loopsCount) is not int or loopsCount <= 0 :
+            raise XAsyncSocketsPoolException('XAsyncSocketsPool : "loopsCount" is incorrect.')
+        self._pollerType   = pollerType
+        self._eventLoops   = [ XAsyncEventLoop(pollerClass()) for i in range(loopsCount) ]
+        self._nextLoopIdx  = 0
+        self._stats        = None
         self._processing   = False
         self._threadsCount = 0
         self._opLock       = allocate_lock()
         self._asyncSockets = { }
-        self._readList     = [ ]
-        self._writeList    = [ ]
-        self._handlingList = [ ]
 
     # ------------------------------------------------------------------------
 
@@ -57,88 +662,121 @@ class XAsyncSocketsPool :
             self._opLock.acquire()
             ok = (socketno not in self._asyncSockets)
             if ok :
-                self._asyncSockets[socketno] = asyncSocket
+                # Each socket is pinned to one event loop for its whole life,
+                eventLoop         = self._eventLoops[self._nextLoopIdx]
+                self._nextLoopIdx = (self._nextLoopIdx + 1) % len(self._eventLoops)
+                ok = eventLoop._addSocket(socket, asyncSocket)
+                if ok :
+                    self._asyncSockets[socketno] = asyncSocket
+                    asyncSocket._eventLoop       = eventLoop
             self._opLock.release()
             return ok
         return False
 
     # ------------------------------------------------------------------------
 
-    def _removeSocket(self, socket) :
+    def _removeSocket(self, socket, eventLoop) :
         if socket :
             socketno = socket.fileno()
             self._opLock.acquire()
             ok = (socketno in self._asyncSockets)
             if ok :
                 del self._asyncSockets[socketno]
-                if socket in self._readList :
-                    self._readList.remove(socket)
-                if socket in self._writeList :
-                    self._writeList.remove(socket)
+                if eventLoop :
+                    eventLoop._removeSocket(socket)
             self._opLock.release()
             return ok
         return False
 
     # ------------------------------------------------------------------------
 
-    def _socketListAdd(self, socket, socketsList) :
-        self._opLock.acquire()
-        ok = (socket.fileno() in self._asyncSockets and socket not in socketsList)
-        if ok :
-            socketsList.append(socket)
-        self._opLock.release()
-        return ok
+    def _handleSocketEvent(self, eventLoop, asyncSocket, onEvent) :
+        socket = asyncSocket.GetSocketObj()
+        if socket :
+            # A loop polled by a single thread needs no handling guard,
+            if eventLoop._exclusive :
+                self._callSocketEvent(asyncSocket, onEvent)
+            elif asyncSocket._dispatchLock.acquire(False) :
+                try :
+                    self._callSocketEvent(asyncSocket, onEvent)
+                finally :
+                    asyncSocket._dispatchLock.release()
+                    # Events missed by the other threads are reported again,
+                    if eventLoop._oneShot :
+                        eventLoop.Rearm(socket)
 
     # ------------------------------------------------------------------------
 
-    def _socketListRemove(self, socket, socketsList) :
-        self._opLock.acquire()
-        ok = (socket.fileno() in self._asyncSockets and socket in socketsList)
-        if ok :
-            socketsList.remove(socket)
-        self._opLock.release()
-        return ok
+    def _callSocketEvent(self, asyncSocket, onEvent) :
+        stats = self._stats
+        if stats :
+            stats.TimeCallback(asyncSocket, onEvent.__name__, onEvent)
+        else :
+            onEvent()
 
     # ------------------------------------------------------------------------
 
     _CHECK_SEC_INTERVAL = 1.0
 
-    def _processWaitEvents(self) :
+    def _processWaitEvents(self, eventLoop) :
         self._incThreadsCount()
-        timeSec = perf_counter()
+        timerWheel = eventLoop._timerWheel
+        eventLoop._threadIdents.add(get_ident())
         while self._processing :
             try :
+                if eventLoop._pendingReads :
+                    timeoutSec = 0
+                elif timerWheel.Count :
+                    timeoutSec = timerWheel.TickSec
+                else :
+                    timeoutSec = self._CHECK_SEC_INTERVAL
+                stats = self._stats
+                if stats :
+                    t = perf_counter()
                 try :
-                    rd, wr, ex = select( self._readList,
-                                         self._writeList,
-                                         self._readList,
-                                         self._CHECK_SEC_INTERVAL )
+                    rd, wr, ex = eventLoop._poller.Poll(timeoutSec)
                 except KeyboardInterrupt as ex :
                     raise ex
                 except :
                     continue
+                if stats :
+                    stats.AddPollWait(perf_counter() - t, len(rd) + len(wr) + len(ex))
                 if not self._processing :
+                    if eventLoop._oneShot :
+                        # Lets the other threads of the loop see the wakeup,
+                        eventLoop.Rearm(eventLoop._wakeupRecv)
                     break
                 for socketsList in ex, wr, rd :
-                    for socket in socketsList :
-                        asyncSocket = self._asyncSockets.get(socket.fileno(), None)
-                        if asyncSocket and self._socketListAdd(socket, self._handlingList) :
-                            if socketsList is ex :
-                                asyncSocket.OnExceptionalCondition()
-                            elif socketsList is wr :
-                                asyncSocket.OnReadyForWriting()
-                            else :
-                                asyncSocket.OnReadyForReading()
-                            self._socketListRemove(socket, self._handlingList)
-                sec = perf_counter()
-                if sec > timeSec + self._CHECK_SEC_INTERVAL :
-                    timeSec = sec
-                    for asyncSocket in list(self._asyncSockets.values()) :
+                    for socketno in socketsList :
+                        asyncSocket = eventLoop._asyncSockets.get(socketno, None)
+                        if not asyncSocket :
+                            if socketno == eventLoop._wakeupNo :
+                                eventLoop._drainWakeup()
+                                if eventLoop._oneShot :
+                                    eventLoop.Rearm(eventLoop._wakeupRecv)
+                            continue
+                        if socketsList is ex :
+                            onEvent = asyncSocket.OnExceptionalCondition
+                        elif socketsList is wr :
+                            onEvent = asyncSocket.OnReadyForWriting
+                        else :
+                            onEvent = asyncSocket.OnReadyForReading
+                        self._handleSocketEvent(eventLoop, asyncSocket, onEvent)
+                if eventLoop._pendingReads :
+                    for asyncSocket in eventLoop._popPendingReads() :
+                        self._handleSocketEvent( eventLoop,
+                                                 asyncSocket,
+                                                 asyncSocket.OnReadyForReading )
+                if timerWheel.Count :
+                    timeSec = perf_counter()
+                    for asyncSocket in timerWheel.PopExpired(timeSec) :
+                        # The timeout may have been changed in the meantime,
                         if asyncSocket.ExpireTimeSec and \
-                           timeSec > asyncSocket.ExpireTimeSec :
+                           timeSec >= asyncSocket.ExpireTimeSec :
                             asyncSocket._close(XClosedReason.Timeout)
             except KeyboardInterrupt :
                 self._processing = False
+        eventLoop._threadIdents.discard(get_ident())
         self._decThreadsCount()
 
     # ------------------------------------------------------------------------
@@ -157,7 +795,7 @@ class XAsyncSocketsPool :
             socket = asyncSocket.GetSocketObj()
         except :
             raise XAsyncSocketsPoolException('RemoveAsyncSocket : "asyncSocket" is incorrect.')
-        return self._removeSocket(socket)
+        return self._removeSocket(socket, asyncSocket._eventLoop)
 
     # ------------------------------------------------------------------------
 
@@ -176,10 +814,8 @@ class XAsyncSocketsPool :
             socket = asyncSocket.GetSocketObj()
         except :
             raise XAsyncSocketsPoolException('NotifyNextReadyForReading : "asyncSocket" is incorrect.')
-        if notify :
-            self._socketListAdd(socket, self._readList)
-        else :
-            self._socketListRemove(socket, self._readList)
+        if socket and asyncSocket._eventLoop :
+            asyncSocket._eventLoop.SetReadInterest(socket, notify)
 
     # ------------------------------------------------------------------------
 
@@ -188,33 +824,51 @@ class XAsyncSocketsPool :
             socket = asyncSocket.GetSocketObj()
         except :
             raise XAsyncSocketsPoolException('NotifyNextReadyForWriting : "asyncSocket" is incorrect.')
-        if notify :
-            self._socketListAdd(socket, self._writeList)
-        else :
-            self._socketListRemove(socket, self._writeList)
+        if socket and asyncSocket._eventLoop :
+            asyncSocket._eventLoop.SetWriteInterest(socket, notify)
+
+    # ------------------------------------------------------------------------
+
+    def EnableStats(self, slowCallbackSec=0.1) :
+        if not self._stats :
+            self._stats = XLoopStats(slowCallbackSec)
+        return self._stats
+
+    # ------------------------------------------------------------------------
+
+    def DisableStats(self) :
+        self._stats = None
 
     # ------------------------------------------------------------------------
 
     def AsyncWaitEvents(self, threadsCount=0) :
         if self._processing or self._threadsCount :
             return
+        loopsCount = len(self._eventLoops)
+        if max(1, threadsCount) < loopsCount :
+            raise XAsyncSocketsPoolException('AsyncWaitEvents : At least %s threads are needed to process all event loops.' % loopsCount)
         self._processing = True
         if threadsCount > 0 :
+            for i in range(loopsCount) :
+                self._eventLoops[i]._setExclusive(threadsCount <= loopsCount)
             try :
                 for i in range(threadsCount) :
-                    start_new_thread(self._processWaitEvents, ())
+                    start_new_thread(self._processWaitEvents, (self._eventLoops[i % loopsCount], ))
                 while self._processing and self._threadsCount < threadsCount :
                     sleep(0.001)
             except :
                 self._processing = False
                 raise XAsyncSocketsPoolException('AsyncWaitEvents : Fatal error to create new threads...')
         else :
-            self._processWaitEvents()
+            self._eventLoops[0]._setExclusive(True)
+            self._processWaitEvents(self._eventLoops[0])
 
     # ------------------------------------------------------------------------
 
     def StopWaitEvents(self) :
         self._processing = False
+        for eventLoop in self._eventLoops :
+            eventLoop.Wakeup()
         while self._threadsCount :
             sleep(0.001)
 
@@ -224,6 +878,30 @@ class XAsyncSocketsPool :
     def WaitEventsProcessing(self) :
         return (self._threadsCount > 0)
 
+    @property
+    def PollerType(self) :
+        return self._pollerType
+
+    @property
+    def EventLoops(self) :
+        return self._eventLoops
+
+    @property
+    def Stats(self) :
+        return self._stats
+
+    @property
+    def TCPServer(self) :
+        return XAsyncTCPServer
+
+    @property
+    def TCPClient(self) :
+        return XAsyncTCPClient
+
+    @property
+    def UDPDatagram(self) :
+        return XAsyncUDPDatagram
+
 # ============================================================================
 # ===( XClosedReason )========================================================
 # ============================================================================
@@ -244,6 +922,16 @@ class XAsyncSocketException(Exception) :
 
 class XAsyncSocket :
 
+    __slots__ = ( '_asyncSocketsPool',
+                  '_socket',
+                  '_recvBufSlot',
+                  '_sendBufSlot',
+                  '_eventLoop',
+                  '_dispatchLock',
+                  '_expireTimeSec',
+                  '_state',
+                  '_onClosed' )
+
     def __init__(self, asyncSocketsPool, socket, recvBufSlot=None, sendBufSlot=None) :
         if type(self) is XAsyncSocket :
             raise XAsyncSocketException('XAsyncSocket is an abstract class and must be implemented.')
@@ -251,6 +939,8 @@ class XAsyncSocket :
         self._socket           = socket
         self._recvBufSlot      = recvBufSlot
         self._sendBufSlot      = sendBufSlot
+        self._eventLoop        = None
+        self._dispatchLock     = allocate_lock()
         self._expireTimeSec    = None
         self._state            = None
         self._onClosed         = None
@@ -270,13 +960,18 @@ class XAsyncSocket :
         try :
             if timeoutSec and timeoutSec > 0 :
                 self._expireTimeSec = perf_counter() + timeoutSec
+                if self._eventLoop :
+                    self._eventLoop.SetExpireTimer(self, self._expireTimeSec)
         except :
             raise XAsyncSocketException('"timeoutSec" is incorrect to set expire timeout.')
 
     # ------------------------------------------------------------------------
 
     def _removeExpireTimeout(self) :
-        self._expireTimeSec = None
+        if self._expireTimeSec is not None :
+            self._expireTimeSec = None
+            if self._eventLoop :
+                self._eventLoop._timerWheel.Remove(self)
 
     # ------------------------------------------------------------------------
 
@@ -308,6 +1003,12 @@ class XAsyncSocket :
 
     # ------------------------------------------------------------------------
 
+    def GetMemorySize(self) :
+        # Own objects of the socket, buffers of the slots are counted by their pool,
+        return getsizeof(self) + getsizeof(self._socket) + getsizeof(self._dispatchLock)
+
+    # ------------------------------------------------------------------------
+
     def GetSocketObj(self) :
         return self._socket
 
@@ -333,6 +1034,15 @@ class XAsyncSocket :
 
     # ------------------------------------------------------------------------
 
+    def _callOnDataRecv(self, *args) :
+        stats = self._asyncSocketsPool._stats
+        if stats :
+            stats.TimeCallback(self, 'OnDataRecv', self._onDataRecv, self, *args)
+        else :
+            self._onDataRecv(self, *args)
+
+    # ------------------------------------------------------------------------
+
     @property
     def SocketID(self) :
         return self._socket.fileno() if self._socket else None
@@ -364,14 +1074,36 @@ class XAsyncTCPServerException(Exception) :
 
 class XAsyncTCPServer(XAsyncSocket) :
 
+    __slots__ = ( '_srvAddr',
+                  '_bufSlots',
+                  '_lazyBufSlots',
+                  '_acceptBatchSize',
+                  '_acceptedCount',
+                  '_refusedCount',
+                  '_acceptBatchMax',
+                  '_onClientAccepted',
+                  '_onClientRefused' )
+
+    DEFAULT_ACCEPT_BATCH_SIZE = 32
+
     @staticmethod
-    def Create(asyncSocketsPool, srvAddr, srvBacklog=256, bufSlots=None) :
+    def Create( asyncSocketsPool,
+                srvAddr,
+                srvBacklog      = 256,
+                bufSlots        = None,
+                reusePort       = False,
+                lazyBufSlots    = False,
+                acceptBatchSize = DEFAULT_ACCEPT_BATCH_SIZE ) :
         try :
             srvSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         except :
             raise XAsyncTCPServerException('Create : Cannot open socket (no enought memory).')
+        if reusePort and not hasattr(socket, 'SO_REUSEPORT') :
+            raise XAsyncTCPServerException('Create : SO_REUSEPORT is not supported on this system.')
         try :
             srvSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if reusePort :
+                srvSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
             srvSocket.bind(srvAddr)
             srvSocket.listen(srvBacklog)
         except :
@@ -381,54 +1113,135 @@ class XAsyncTCPServer(XAsyncSocket) :
         xAsyncTCPServer = XAsyncTCPServer( asyncSocketsPool,
                                            srvSocket,
                                            srvAddr,
-                                           bufSlots )
+                                           bufSlots,
+                                           lazyBufSlots,
+                                           acceptBatchSize )
         asyncSocketsPool.NotifyNextReadyForReading(xAsyncTCPServer, True)
         return xAsyncTCPServer
 
     # ------------------------------------------------------------------------
 
-    def __init__(self, asyncSocketsPool, srvSocket, srvAddr, bufSlots) :
+    def __init__(self, asyncSocketsPool, srvSocket, srvAddr, bufSlots, lazyBufSlots=False, acceptBatchSize=1) :
         try :
             super().__init__(asyncSocketsPool, srvSocket)
             self._srvAddr          = srvAddr
             self._bufSlots         = bufSlots
+            self._lazyBufSlots     = lazyBufSlots
+            self._acceptBatchSize  = max(1, acceptBatchSize)
+            self._acceptedCount    = 0
+            self._refusedCount     = 0
+            self._acceptBatchMax   = 0
             self._onClientAccepted = None
+            self._onClientRefused  = None
         except :
             raise XAsyncTCPServerException('Error to creating XAsyncTCPServer, arguments are incorrects.')
 
     # ------------------------------------------------------------------------
 
     def OnReadyForReading(self) :
-        try :
-            cliSocket, cliAddr = self._socket.accept()
-        except :
-            return
-        recvBufSlot = self._bufSlots.GetAvailableSlot()
-        sendBufSlot = self._bufSlots.GetAvailableSlot()
-        if not recvBufSlot or not sendBufSlot or not self._onClientAccepted :
-            if recvBufSlot :
-                recvBufSlot.Available = True
-            if sendBufSlot :
-                sendBufSlot.Available = True
-            cliSocket.close()
-            return
-        asyncTCPCli = XAsyncTCPClient( self._asyncSocketsPool,
-                                       cliSocket,
-                                       self._srvAddr,
-                                       cliAddr,
-                                       recvBufSlot,
-                                       sendBufSlot )
+        # Accepts pending connections until the backlog is empty or the batch is full,
+        count = 0
+        while count < self._acceptBatchSize and self._socket :
+            try :
+                cliSocket, cliAddr = self._socket.accept()
+            except :
+                break
+            count += 1
+            self._acceptClient(cliSocket, cliAddr)
+        if count > self._acceptBatchMax :
+            self._acceptBatchMax = count
+
+    # ------------------------------------------------------------------------
+
+    def _acceptClient(self, cliSocket, cliAddr) :
+        if self._lazyBufSlots :
+            # Slots are only taken by the client while receiving or sending,
+            if not self._onClientAccepted :
+                self._refuseClient(cliSocket)
+                return
+            asyncTCPCli = XAsyncTCPClient( self._asyncSocketsPool,
+                                           cliSocket,
+                                           self._srvAddr,
+                                           cliAddr,
+                                           None,
+                                           None,
+                                           self._bufSlots,
+                                           True )
+        else :
+            recvBufSlot = self._bufSlots.GetAvailableSlot()
+            sendBufSlot = self._bufSlots.GetAvailableSlot()
+            if not recvBufSlot or not sendBufSlot or not self._onClientAccepted :
+                if recvBufSlot :
+                    recvBufSlot.Available = True
+                if sendBufSlot :
+                    sendBufSlot.Available = True
+                self._refuseClient(cliSocket)
+                return
+            asyncTCPCli = XAsyncTCPClient( self._asyncSocketsPool,
+                                           cliSocket,
+                                           self._srvAddr,
+                                           cliAddr,
+                                           recvBufSlot,
+                                           sendBufSlot,
+                                           self._bufSlots )
+        self._acceptedCount += 1
         try :
             self._onClientAccepted(self, asyncTCPCli)
         except Exception as ex :
             asyncTCPCli._close()
             raise XAsyncTCPServerException('Error when handling the "OnClientAccepted" event : %s' % ex)
 
-    # ------------------------------------------------------------------------
+    # ------------------------------------------------------------------------
+
+    def _refuseClient(self, cliSocket) :
+        self._refusedCount += 1
+        if self._onClientRefused :
+            try :
+                cliSocket.settimeout(0)
+                self._onClientRefused(self, cliSocket)
+            except :
+                pass
+        cliSocket.close()
+
+    # ------------------------------------------------------------------------
+
+    def GetListenQueueInfo(self) :
+        # Returns (pending connections, backlog) from TCP_INFO on Linux, None otherwise,
+        try :
+            info = self._socket.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, 104)
+            return unpack_from('=II', info, 24)
+        except :
+            return None
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def SrvAddr(self) :
+        return self._srvAddr
+
+    @property
+    def BufSlots(self) :
+        return self._bufSlots
+
+    @property
+    def LazyBufSlots(self) :
+        return self._lazyBufSlots
+
+    @property
+    def AcceptBatchSize(self) :
+        return self._acceptBatchSize
+
+    @property
+    def AcceptedCount(self) :
+        return self._acceptedCount
+
+    @property
+    def RefusedCount(self) :
+        return self._refusedCount
 
     @property
-    def SrvAddr(self) :
-        return self._srvAddr
+    def AcceptBatchMax(self) :
+        return self._acceptBatchMax
 
     @property
     def OnClientAccepted(self) :
@@ -437,6 +1250,13 @@ class XAsyncTCPServer(XAsyncSocket) :
     def OnClientAccepted(self, value) :
         self._onClientAccepted = value
 
+    @property
+    def OnClientRefused(self) :
+        return self._onClientRefused
+    @OnClientRefused.setter
+    def OnClientRefused(self, value) :
+        self._onClientRefused = value
+
 # ============================================================================
 # ===( XAsyncTCPClient )======================================================
 # ============================================================================
@@ -446,6 +1266,34 @@ class XAsyncTCPClientException(Exception) :
 
 class XAsyncTCPClient(XAsyncSocket) :
 
+    __slots__ = ( '_bufSlots',
+                  '_lazyBufSlots',
+                  '_srvAddr',
+                  '_cliAddr',
+                  '_onFailsToConnect',
+                  '_onConnected',
+                  '_onSSLHandshaked',
+                  '_sslHandshaking',
+                  '_sslTimeoutSec',
+                  '_onDataRecv',
+                  '_onDataRecvArg',
+                  '_onDataSent',
+                  '_onDataSentArg',
+                  '_sizeToRecv',
+                  '_rdLinePos',
+                  '_rdLineEncoding',
+                  '_rdBufView',
+                  '_rdLargeBuf',
+                  '_rdAhead',
+                  '_rdAheadPos',
+                  '_inReading',
+                  '_wrQueue',
+                  '_wrLock',
+                  '_socketOpened' )
+
+    SEND_MAX_BUFFERS      = 64
+    SSL_HANDSHAKE_TIMEOUT = 10
+
     @staticmethod
     def Create( asyncSocketsPool,
                 srvAddr,
@@ -510,13 +1358,18 @@ class XAsyncTCPClient(XAsyncSocket) :
 
     # ------------------------------------------------------------------------
 
-    def __init__(self, asyncSocketsPool, cliSocket, srvAddr, cliAddr, recvBufSlot, sendBufSlot) :
+    def __init__(self, asyncSocketsPool, cliSocket, srvAddr, cliAddr, recvBufSlot, sendBufSlot, bufSlots=None, lazyBufSlots=False) :
         try :
             super().__init__(asyncSocketsPool, cliSocket, recvBufSlot, sendBufSlot)
+            self._bufSlots         = bufSlots
+            self._lazyBufSlots     = lazyBufSlots
             self._srvAddr          = srvAddr
             self._cliAddr          = cliAddr if cliAddr else ('0.0.0.0', 0)
             self._onFailsToConnect = None
             self._onConnected      = None
+            self._onSSLHandshaked  = None
+            self._sslHandshaking   = False
+            self._sslTimeoutSec    = None
             self._onDataRecv       = None
             self._onDataRecvArg    = None
             self._onDataSent       = None
@@ -525,7 +1378,12 @@ class XAsyncTCPClient(XAsyncSocket) :
             self._rdLinePos        = None
             self._rdLineEncoding   = None
             self._rdBufView        = None
-            self._wrBufView        = None
+            self._rdLargeBuf       = None
+            self._rdAhead          = None
+            self._rdAheadPos       = 0
+            self._inReading        = False
+            self._wrQueue          = [ ]
+            self._wrLock           = allocate_lock()
             self._socketOpened     = (cliAddr is not None)
         except :
             raise XAsyncTCPClientException('Error to creating XAsyncTCPClient, arguments are incorrects.')
@@ -533,11 +1391,13 @@ class XAsyncTCPClient(XAsyncSocket) :
     # ------------------------------------------------------------------------
 
     def Close(self) :
-        if self._wrBufView :
-            try :
-                self._socket.send(self._wrBufView)
-            except :
-                pass
+        with self._wrLock :
+            if self._wrQueue :
+                try :
+                    self._sendQueue()
+                except :
+                    pass
+                self._wrQueue.clear()
         try :
             self._socket.shutdown(socket.SHUT_RDWR)
         except :
@@ -546,98 +1406,347 @@ class XAsyncTCPClient(XAsyncSocket) :
 
     # ------------------------------------------------------------------------
 
-    def OnReadyForReading(self) :
+    def _recvInto(self, buf) :
+        # Returns the number of bytes received, 0 if no data is available
+        # or None if the connection has been closed,
+        try :
+            try :
+                n = self._socket.recv_into(buf)
+            except ssl.SSLError as sslErr :
+                if sslErr.args[0] != ssl.SSL_ERROR_WANT_READ :
+                    self._close()
+                    return None
+                return 0
+            except BlockingIOError :
+                return 0
+            except :
+                self._close()
+                return None
+        except :
+            try :
+                n = self._socket.readinto(buf)
+                if n is None :
+                    return 0
+            except :
+                self._close()
+                return None
+        if not n :
+            self._close(XClosedReason.ClosedByPeer)
+            return None
+        return n
+
+    # ------------------------------------------------------------------------
+
+    def _acquireRecvBufSlot(self) :
+        if self._recvBufSlot is None :
+            self._recvBufSlot = self._bufSlots.GetAvailableSlot()
+            if self._recvBufSlot is None :
+                self._close()
+                return False
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def _releaseIdleRecvBufSlot(self) :
+        # Gives back the lazy recv slot if it does not contain partial data,
+        if self._lazyBufSlots and self._recvBufSlot is not None :
+            buf = self._recvBufSlot._buffer
+            if self._rdLinePos :
+                return
+            if self._rdBufView is not None and self._rdBufView.obj is buf :
+                if self._sizeToRecv < len(self._rdBufView) :
+                    return
+                self._rdBufView = None
+            self._recvBufSlot.Available = True
+            self._recvBufSlot = None
+
+    # ------------------------------------------------------------------------
+
+    def _releaseLargeRecvBuf(self) :
+        if self._rdLargeBuf :
+            sizeClass, buf   = self._rdLargeBuf
+            self._rdLargeBuf = None
+            sizeClass.Release(buf)
+
+    # ------------------------------------------------------------------------
+
+    def _getRecvBufSize(self) :
+        if self._recvBufSlot is not None :
+            return self._recvBufSlot.Size
+        return self._bufSlots.SlotsSize
+
+    # ------------------------------------------------------------------------
+
+    def _consumeReadAhead(self, size) :
+        self._rdAheadPos += size
+        if self._rdAheadPos >= len(self._rdAhead) :
+            self._rdAhead    = None
+            self._rdAheadPos = 0
+
+    # ------------------------------------------------------------------------
+
+    def _readAhead(self, buf, pos, size) :
+        # Copies up to size bytes of the read-ahead data into buf at pos,
+        end = min(self._rdAheadPos + size, len(self._rdAhead))
+        n   = end - self._rdAheadPos
+        buf[pos:pos+n] = memoryview(self._rdAhead)[self._rdAheadPos:end]
+        self._consumeReadAhead(n)
+        return n
+
+    # ------------------------------------------------------------------------
+
+    def _setReadAhead(self, data) :
+        self._rdAhead    = data if data else None
+        self._rdAheadPos = 0
+
+    # ------------------------------------------------------------------------
+
+    def _processLineRecv(self) :
+        # Returns True when a complete line has been received,
+        if not self._acquireRecvBufSlot() :
+            return False
+        buf     = self._recvBufSlot.Buffer
+        bufSize = self._recvBufSlot.Size
+        if self._rdAhead is not None :
+            idx  = self._rdAhead.find(b'\n', self._rdAheadPos)
+            size = (idx if idx >= 0 else len(self._rdAhead)) - self._rdAheadPos
+            if self._rdLinePos + size > bufSize :
+                self._close()
+                return False
+            self._rdLinePos += self._readAhead(buf, self._rdLinePos, size)
+            if idx >= 0 :
+                self._consumeReadAhead(1)
+                return True
         while True :
-            if self._rdLinePos is not None :
-                # In the context of reading a line,
-                while True :
-                    try :
-                        try :
-                            b = self._socket.recv(1)
-                        except ssl.SSLError as sslErr :
-                            if sslErr.args[0] != ssl.SSL_ERROR_WANT_READ :
-                                self._close()
-                            return
-                        except BlockingIOError as bioErr :
-                            if bioErr.errno != 35 :
-                                self._close()
-                            return
-                        except :
-                            self._close()
-                            return
-                    except :
-                        self._close()
-                        return
-                    if b :
-                        if b == b'\n' :
-                            lineLen = self._rdLinePos 
-                            self._rdLinePos = None
-                            self._asyncSocketsPool.NotifyNextReadyForReading(self, False)
-                            self._removeExpireTimeout()
-                            if self._onDataRecv :
-                                line = self._recvBufSlot.Buffer[:lineLen]
-                                try :
-                                    line = bytes(line).decode(self._rdLineEncoding)
-                                except :
-                                    line = None
-                                try :
-                                    self._onDataRecv(self, line, self._onDataRecvArg)
-                                except Exception as ex :
-                                    raise XAsyncTCPClientException('Error when handling the "OnDataRecv" event : %s' % ex)
-                            if self.IsSSL and self._socket.pending() > 0 :
-                                break
-                            return
-                        elif b != b'\r' :
-                            if self._rdLinePos < self._recvBufSlot.Size :
-                                self._recvBufSlot.Buffer[self._rdLinePos] = ord(b)
-                                self._rdLinePos += 1
-                            else :
-                                self._close()
-                                return
-                    else :
-                        self._close(XClosedReason.ClosedByPeer)
-                        return
-            elif self._sizeToRecv :
-                # In the context of reading data,
-                recvBuf = self._rdBufView[-self._sizeToRecv:]
-                try :
-                    try :
-                        n = self._socket.recv_into(recvBuf)
-                    except ssl.SSLError as sslErr :
-                        if sslErr.args[0] != ssl.SSL_ERROR_WANT_READ :
-                            self._close()
-                        return
-                    except BlockingIOError as bioErr :
-                        if bioErr.errno != 35 :
-                            self._close()
-                        return
-                    except :
-                        self._close()
+            if self._rdLinePos >= bufSize :
+                self._close()
+                return False
+            start = self._rdLinePos
+            n     = self._recvInto(memoryview(buf)[start:])
+            if not n :
+                return False
+            idx = buf.find(b'\n', start, start + n)
+            if idx >= 0 :
+                # Bytes received after the end of line stay for the next receive,
+                self._setReadAhead(bytes(buf[idx+1:start+n]))
+                self._rdLinePos = idx
+                return True
+            self._rdLinePos += n
+
+    # ------------------------------------------------------------------------
+
+    def _processDataRecv(self) :
+        # Returns True when all the requested data has been received,
+        if self._rdBufView is None :
+            if not self._acquireRecvBufSlot() :
+                return False
+            self._rdBufView = memoryview(self._recvBufSlot.Buffer)[:self._sizeToRecv]
+        if self._rdAhead is not None :
+            recvBuf           = self._rdBufView[-self._sizeToRecv:]
+            self._sizeToRecv -= self._readAhead(recvBuf, 0, self._sizeToRecv)
+        size = len(self._rdBufView)
+        while self._sizeToRecv :
+            pos = size - self._sizeToRecv
+            if self._recvBufSlot is not None and \
+               self._rdBufView.obj is self._recvBufSlot.Buffer :
+                # Receives as much as the slot can hold to frame next data,
+                buf = self._recvBufSlot.Buffer
+                n   = self._recvInto(memoryview(buf)[pos:])
+                if not n :
+                    return False
+                if n > self._sizeToRecv :
+                    self._setReadAhead(bytes(buf[size:pos+n]))
+                    n = self._sizeToRecv
+            else :
+                n = self._recvInto(self._rdBufView[pos:])
+                if not n :
+                    return False
+            self._sizeToRecv -= n
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def OnReadyForReading(self) :
+        self._inReading = True
+        try :
+            while self._socket :
+                if self._sslHandshaking :
+                    if not self._processSSLHandshake() :
                         return
-                except :
-                    try :
-                        n = self._socket.readinto(recvBuf)
-                    except :
-                        self._close()
+                    continue
+                if self._rdLinePos is not None :
+                    # In the context of reading a line,
+                    if not self._processLineRecv() :
                         return
-                if not n :
-                    self._close(XClosedReason.ClosedByPeer)
-                    return
-                self._sizeToRecv -= n
-                if not self._sizeToRecv :
-                    data = self._rdBufView
-                    self._rdBufView = None
-                    self._asyncSocketsPool.NotifyNextReadyForReading(self, False)
+                    lineLen = self._rdLinePos
+                    self._rdLinePos = None
                     self._removeExpireTimeout()
                     if self._onDataRecv :
+                        line = self._recvBufSlot.Buffer[:lineLen]
+                        if line[-1:] == b'\r' :
+                            line = line[:-1]
                         try :
-                            self._onDataRecv(self, data, self._onDataRecvArg)
+                            line = bytes(line).decode(self._rdLineEncoding)
+                        except :
+                            line = None
+                        try :
+                            self._callOnDataRecv(line, self._onDataRecvArg)
                         except Exception as ex :
                             raise XAsyncTCPClientException('Error when handling the "OnDataRecv" event : %s' % ex)
-                    if not self.IsSSL or self._socket.pending() == 0 :
+                elif self._sizeToRecv :
+                    # In the context of reading data,
+                    if not self._processDataRecv() :
                         return
-            else :
-                return
+                    data            = self._rdBufView
+                    largeBuf        = self._rdLargeBuf
+                    self._rdBufView  = None
+                    self._rdLargeBuf = None
+                    self._removeExpireTimeout()
+                    try :
+                        if self._onDataRecv :
+                            try :
+                                self._callOnDataRecv(data, self._onDataRecvArg)
+                            except Exception as ex :
+                                raise XAsyncTCPClientException('Error when handling the "OnDataRecv" event : %s' % ex)
+                    finally :
+                        if largeBuf :
+                            # The large buffer is given back once the data has been handled,
+                            largeBuf[0].Release(largeBuf[1])
+                else :
+                    return
+                if self._rdAhead is None and \
+                   ( not self.IsSSL or self._socket.pending() == 0 ) :
+                    return
+        finally :
+            self._inReading = False
+            self._releaseIdleRecvBufSlot()
+            # Read interest follows the receive waited once the loop ends,
+            # it may have been dropped by a handler during the loop,
+            if self._socket and not self._sslHandshaking :
+                recvWaiting = (self._rdLinePos is not None or bool(self._sizeToRecv))
+                self._asyncSocketsPool.NotifyNextReadyForReading(self, recvWaiting)
+
+    # ------------------------------------------------------------------------
+
+    def _notifyNextReadyForReading(self) :
+        # When called while reading, the receive is processed by the reading loop,
+        if not self._inReading :
+            self._asyncSocketsPool.NotifyNextReadyForReading(self, True)
+            if self._rdAhead is not None and self._eventLoop :
+                self._eventLoop.AddPendingReading(self)
+
+    # ------------------------------------------------------------------------
+
+    def _sendViews(self, views) :
+        # Returns the count of bytes sent from the buffers, 0 if the socket would block,
+        if self.IsSSL or not hasattr(self._socket, 'sendmsg') :
+            n = 0
+            for view in views :
+                try :
+                    sent = self._socket.send(view)
+                except (BlockingIOError, ssl.SSLWantWriteError) :
+                    break
+                n += sent
+                if sent < len(view) :
+                    break
+            return n
+        try :
+            return self._socket.sendmsg(views)
+        except BlockingIOError :
+            return 0
+
+    # ------------------------------------------------------------------------
+
+    def _sendQueue(self) :
+        # Must be called with the sending lock acquired,
+        # returns the callbacks of the buffers entirely sent,
+        sentList = [ ]
+        while self._wrQueue :
+            n = self._sendViews([ item[0] for item in self._wrQueue[:self.SEND_MAX_BUFFERS] ])
+            if not n :
+                break
+            while n :
+                item = self._wrQueue[0]
+                if n < len(item[0]) :
+                    item[0] = item[0][n:]
+                    break
+                n -= len(item[0])
+                del self._wrQueue[0]
+                self._releaseSentBufSlot(item[0])
+                if item[1] :
+                    sentList.append(item)
+        return sentList
+
+    # ------------------------------------------------------------------------
+
+    def _flushSendQueue(self) :
+        with self._wrLock :
+            try :
+                sentList = self._sendQueue()
+            except :
+                sentList = None
+                self._wrQueue.clear()
+            if not self._wrQueue :
+                self._asyncSocketsPool.NotifyNextReadyForWriting(self, False)
+        if sentList is None :
+            self._close()
+            return
+        for buf, onDataSent, onDataSentArg in sentList :
+            try :
+                onDataSent(self, onDataSentArg)
+            except Exception as ex :
+                raise XAsyncTCPClientException('Error when handling the "OnDataSent" event : %s' % ex)
+
+    # ------------------------------------------------------------------------
+
+    def _releaseSentBufSlot(self, view) :
+        if self._lazyBufSlots and self._sendBufSlot is not None and \
+           view.obj is self._sendBufSlot._buffer :
+            self._sendBufSlot.Available = True
+            self._sendBufSlot = None
+
+    # ------------------------------------------------------------------------
+
+    def _enqueueSendData(self, views, onDataSent, onDataSentArg, copyData) :
+        with self._wrLock :
+            queueEmpty = not self._wrQueue
+            if queueEmpty and not onDataSent and self._socketOpened and \
+               not self._sslHandshaking :
+                # Sends immediately when nothing is waiting to be sent,
+                try :
+                    n = self._sendViews(views)
+                except :
+                    return False
+                while views and n >= len(views[0]) :
+                    n -= len(views[0])
+                    self._releaseSentBufSlot(views[0])
+                    views = views[1:]
+                if not views :
+                    return True
+                if n :
+                    views = [ views[0][n:] ] + views[1:]
+            for view in views :
+                if copyData and not view.readonly :
+                    view = memoryview(bytes(view))
+                self._wrQueue.append([view, None, None])
+            self._wrQueue[-1][1] = onDataSent
+            self._wrQueue[-1][2] = onDataSentArg
+            if queueEmpty and not self._sslHandshaking :
+                self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def _close(self, closedReason=XClosedReason.Error, triggerOnClosed=True) :
+        if super()._close(closedReason, triggerOnClosed) :
+            self._releaseLargeRecvBuf()
+            return True
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def GetMemorySize(self) :
+        return super().GetMemorySize() + getsizeof(self._wrQueue) + getsizeof(self._wrLock)
 
     # ------------------------------------------------------------------------
 
@@ -660,19 +1769,12 @@ class XAsyncTCPClient(XAsyncSocket) :
                     self._onConnected(self)
                 except Exception as ex :
                     raise XAsyncTCPClientException('Error when handling the "OnConnected" event : %s' % ex)
-        if self._wrBufView :
-            try :
-                n = self._socket.send(self._wrBufView)
-            except :
+            if self._sslHandshaking :
+                self._setExpireTimeout(self._sslTimeoutSec)
+        if self._sslHandshaking :
+            if not self._processSSLHandshake() :
                 return
-            self._wrBufView = self._wrBufView[n:]
-            if not self._wrBufView :
-                self._asyncSocketsPool.NotifyNextReadyForWriting(self, False)
-                if self._onDataSent :
-                    try :
-                        self._onDataSent(self, self._onDataSentArg)
-                    except Exception as ex :
-                        raise XAsyncTCPClientException('Error when handling the "OnDataSent" event : %s' % ex)
+        self._flushSendQueue()
 
     # ------------------------------------------------------------------------
 
@@ -685,7 +1787,7 @@ class XAsyncTCPClient(XAsyncSocket) :
             self._rdLineEncoding = lineEncoding
             self._onDataRecv     = onLineRecv
             self._onDataRecvArg  = onLineRecvArg
-            self._asyncSocketsPool.NotifyNextReadyForReading(self, True)
+            self._notifyNextReadyForReading()
             return True
         return False
 
@@ -695,22 +1797,32 @@ class XAsyncTCPClient(XAsyncSocket) :
         if self._rdLinePos is not None or self._sizeToRecv :
             raise XAsyncTCPClientException('AsyncRecvData : Already waiting asynchronous receive.')
         if self._socket :
+            bufSize = self._getRecvBufSize()
             if size is None :
-                size = self._recvBufSlot.Size
+                size = bufSize
             elif not isinstance(size, int) or size <= 0 :
                 raise XAsyncTCPClientException('AsyncRecvData : "size" is incorrect.')
-            if size <= self._recvBufSlot.Size :
-                self._rdBufView = memoryview(self._recvBufSlot.Buffer)[:size]
+            if size <= bufSize :
+                if self._recvBufSlot is not None :
+                    self._rdBufView = memoryview(self._recvBufSlot.Buffer)[:size]
+                else :
+                    # The lazy recv slot will be taken when data arrives,
+                    self._rdBufView = None
             else :
+                sizeClass = self._bufSlots.GetSizeClass(size) if self._bufSlots else None
                 try :
-                    self._rdBufView = memoryview(bytearray(size))
+                    if sizeClass :
+                        self._rdLargeBuf = (sizeClass, sizeClass.Acquire())
+                        self._rdBufView  = memoryview(self._rdLargeBuf[1])[:size]
+                    else :
+                        self._rdBufView = memoryview(bytearray(size))
                 except :
                     raise XAsyncTCPClientException('AsyncRecvData : No enought memory to receive %s bytes.' % size)
             self._setExpireTimeout(timeoutSec)
             self._sizeToRecv    = size
             self._onDataRecv    = onDataRecv
             self._onDataRecvArg = onDataRecvArg
-            self._asyncSocketsPool.NotifyNextReadyForReading(self, True)
+            self._notifyNextReadyForReading()
             return True
         return False
 
@@ -719,54 +1831,90 @@ class XAsyncTCPClient(XAsyncSocket) :
     def AsyncSendData(self, data, onDataSent=None, onDataSentArg=None) :
         if self._socket :
             try :
-                if bytes([data[0]]) :
-                    if self._wrBufView :
-                        self._wrBufView = memoryview(bytes(self._wrBufView) + data)
-                    else :
-                        self._wrBufView = memoryview(data)
-                    self._onDataSent    = onDataSent
-                    self._onDataSentArg = onDataSentArg
-                    self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
-                    return True
+                view = memoryview(data).cast('B')
             except :
-                pass
-            raise XAsyncTCPClientException('AsyncSendData : "data" is incorrect.')
+                view = None
+            if not view :
+                raise XAsyncTCPClientException('AsyncSendData : "data" is incorrect.')
+            return self._enqueueSendData([view], onDataSent, onDataSentArg, True)
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def AsyncSendDataParts(self, dataParts, onDataSent=None, onDataSentArg=None) :
+        # Sends the parts as a whole without joining them,
+        if self._socket :
+            try :
+                views = [ memoryview(data).cast('B') for data in dataParts ]
+                views = [ view for view in views if view ]
+            except :
+                views = None
+            if not views :
+                raise XAsyncTCPClientException('AsyncSendDataParts : "dataParts" is incorrect.')
+            return self._enqueueSendData(views, onDataSent, onDataSentArg, True)
         return False
 
     # ------------------------------------------------------------------------
 
     def AsyncSendSendingBuffer(self, size=None, onDataSent=None, onDataSentArg=None) :
-        if self._wrBufView :
-            raise XAsyncTCPClientException('AsyncSendBufferSlot : Already waiting to send data.')
         if self._socket :
+            with self._wrLock :
+                for item in self._wrQueue :
+                    if self._sendBufSlot and item[0].obj is self._sendBufSlot._buffer :
+                        raise XAsyncTCPClientException('AsyncSendBufferSlot : Already waiting to send data.')
+            if self._sendBufSlot is None :
+                return False
             if size is None :
                 size = self._sendBufSlot.Size
             if size > 0 and size <= self._sendBufSlot.Size :
-                self._wrBufView     = memoryview(self._sendBufSlot.Buffer)[:size]
-                self._onDataSent    = onDataSent
-                self._onDataSentArg = onDataSentArg
-                self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
-                return True
+                view = memoryview(self._sendBufSlot.Buffer)[:size]
+                return self._enqueueSendData([view], onDataSent, onDataSentArg, False)
         return False
 
     # ------------------------------------------------------------------------
 
-    def _doSSLHandshake(self) :
-        count = 0
-        while count < 10 :
+    def _startSSLHandshake(self, timeoutSec) :
+        self._sslHandshaking = True
+        self._sslTimeoutSec  = timeoutSec if timeoutSec is not None else self.SSL_HANDSHAKE_TIMEOUT
+        if self._socketOpened :
+            self._setExpireTimeout(self._sslTimeoutSec)
+            self._processSSLHandshake()
+        else :
+            # The handshake will start as soon as the socket is connected,
+            self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
+
+    # ------------------------------------------------------------------------
+
+    def _processSSLHandshake(self) :
+        # Returns True when the handshake is done,
+        try :
+            self._socket.do_handshake()
+        except ssl.SSLWantReadError :
+            self._asyncSocketsPool.NotifyNextReadyForWriting(self, False)
+            self._asyncSocketsPool.NotifyNextReadyForReading(self, True)
+            return False
+        except ssl.SSLWantWriteError :
+            self._asyncSocketsPool.NotifyNextReadyForWriting(self, True)
+            return False
+        except :
+            self._close()
+            return False
+        self._sslHandshaking = False
+        recvWaiting = (self._rdLinePos is not None or bool(self._sizeToRecv))
+        if not recvWaiting :
+            self._removeExpireTimeout()
+        # While reading, the next receive may not be waited yet and the
+        # reading loop sets the read interest when it ends,
+        if not self._inReading :
+            self._asyncSocketsPool.NotifyNextReadyForReading(self, recvWaiting)
+        with self._wrLock :
+            self._asyncSocketsPool.NotifyNextReadyForWriting(self, bool(self._wrQueue))
+        if self._onSSLHandshaked :
             try :
-                self._socket.do_handshake()
-                break
-            except ssl.SSLError as sslErr :
-                count += 1
-                if sslErr.args[0] == ssl.SSL_ERROR_WANT_READ :
-                    select([self._socket], [], [], 1)
-                elif sslErr.args[0] == ssl.SSL_ERROR_WANT_WRITE :
-                    select([], [self._socket], [], 1)
-                else :
-                    raise XAsyncTCPClientException('SSL : Bad handshake : %s' % sslErr)
+                self._onSSLHandshaked(self)
             except Exception as ex :
-                raise XAsyncTCPClientException('SSL : Handshake error : %s' % ex)
+                raise XAsyncTCPClientException('Error when handling the "OnSSLHandshaked" event : %s' % ex)
+        return True
 
     # ------------------------------------------------------------------------
 
@@ -775,13 +1923,17 @@ class XAsyncTCPClient(XAsyncSocket) :
                   certfile    = None,
                   server_side = False,
                   cert_reqs   = 0,
-                  ca_certs    = None ) :
+                  ca_certs    = None,
+                  timeoutSec  = None ) :
         if not hasattr(ssl, 'SSLContext') :
             raise XAsyncTCPClientException('StartSSL : This SSL implementation is not supported.')
         if self.IsSSL :
             raise XAsyncTCPClientException('StartSSL : SSL already started.')
+        if self._rdAhead is not None :
+            raise XAsyncTCPClientException('StartSSL : Data already received before SSL.')
         try :
-            self._asyncSocketsPool.NotifyNextReadyForWriting(self, False)
+            if self._socketOpened :
+                self._asyncSocketsPool.NotifyNextReadyForWriting(self, False)
             self._asyncSocketsPool.NotifyNextReadyForReading(self, False)
             self._socket = ssl.wrap_socket( self._socket,
                                             keyfile     = keyfile,
@@ -792,26 +1944,29 @@ class XAsyncTCPClient(XAsyncSocket) :
                                             do_handshake_on_connect = False )
         except Exception as ex :
             raise XAsyncTCPClientException('StartSSL : %s' % ex)
-        self._doSSLHandshake()
+        self._startSSLHandshake(timeoutSec)
 
     # ------------------------------------------------------------------------
 
-    def StartSSLContext(self, sslContext, serverSide=False) :
+    def StartSSLContext(self, sslContext, serverSide=False, timeoutSec=None) :
         if not hasattr(ssl, 'SSLContext') :
             raise XAsyncTCPClientException('StartSSLContext : This SSL implementation is not supported.')
         if not isinstance(sslContext, ssl.SSLContext) :
             raise XAsyncTCPClientException('StartSSLContext : "sslContext" is incorrect.')
         if self.IsSSL :
             raise XAsyncTCPClientException('StartSSLContext : SSL already started.')
+        if self._rdAhead is not None :
+            raise XAsyncTCPClientException('StartSSLContext : Data already received before SSL.')
         try :
-            self._asyncSocketsPool.NotifyNextReadyForWriting(self, False)
+            if self._socketOpened :
+                self._asyncSocketsPool.NotifyNextReadyForWriting(self, False)
             self._asyncSocketsPool.NotifyNextReadyForReading(self, False)
             self._socket = sslContext.wrap_socket( self._socket,
                                                    server_side             = serverSide,
                                                    do_handshake_on_connect = False )
         except Exception as ex :
             raise XAsyncTCPClientException('StartSSLContext : %s' % ex)
-        self._doSSLHandshake()
+        self._startSSLHandshake(timeoutSec)
 
     # ------------------------------------------------------------------------
 
@@ -828,8 +1983,16 @@ class XAsyncTCPClient(XAsyncSocket) :
         return ( hasattr(ssl, 'SSLContext') and \
                  isinstance(self._socket, ssl.SSLSocket) )
 
+    @property
+    def IsSSLHandshaking(self) :
+        return self._sslHandshaking
+
     @property
     def SendingBuffer(self) :
+        if self._sendBufSlot is None and self._lazyBufSlots :
+            self._sendBufSlot = self._bufSlots.GetAvailableSlot()
+            if self._sendBufSlot is None :
+                return None
         return self._sendBufSlot.Buffer
 
     @property
@@ -846,6 +2009,13 @@ class XAsyncTCPClient(XAsyncSocket) :
     def OnConnected(self, value) :
         self._onConnected = value
 
+    @property
+    def OnSSLHandshaked(self) :
+        return self._onSSLHandshaked
+    @OnSSLHandshaked.setter
+    def OnSSLHandshaked(self, value) :
+        self._onSSLHandshaked = value
+
 # ============================================================================
 # ===( XAsyncUDPDatagram )====================================================
 # ============================================================================
@@ -855,18 +2025,46 @@ class XAsyncUDPDatagramException(Exception) :
 
 class XAsyncUDPDatagram(XAsyncSocket) :
 
+    __slots__ = ( '_wrDgramFiFo',
+                  '_drainBudget',
+                  '_recvCount',
+                  '_drainMax',
+                  '_onFailsToSend',
+                  '_onDataSent',
+                  '_onDataSentArg',
+                  '_onDataRecv' )
+
+    DEFAULT_DRAIN_BUDGET = 64
+
     @staticmethod
-    def Create(asyncSocketsPool, localAddr=None, recvBufLen=4096, broadcast=False) :
+    def Create( asyncSocketsPool,
+                localAddr      = None,
+                recvBufLen     = 4096,
+                broadcast      = False,
+                reusePort      = False,
+                sockRecvBufLen = None,
+                drainBudget    = 1 ) :
+        if type(drainBudget) is not int or drainBudget <= 0 :
+            raise XAsyncUDPDatagramException('Create : "drainBudget" is incorrect.')
         try :
             udpSocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         except :
             raise XAsyncUDPDatagramException('Create : Cannot open socket (no enought memory).')
         if broadcast :
             udpSocket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        if reusePort and not hasattr(socket, 'SO_REUSEPORT') :
+            raise XAsyncUDPDatagramException('Create : SO_REUSEPORT is not supported on this system.')
+        if sockRecvBufLen :
+            try :
+                udpSocket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, sockRecvBufLen)
+            except :
+                raise XAsyncUDPDatagramException('Create : Cannot set the socket receive buffer size.')
         openRecv = (localAddr is not None)
         if openRecv :
             try :
                 udpSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                if reusePort :
+                    udpSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
                 udpSocket.bind(localAddr)
             except :
                 raise XAsyncUDPDatagramException('Create : Error to binding the UDP Datagram local address.')
@@ -877,17 +2075,20 @@ class XAsyncUDPDatagram(XAsyncSocket) :
                 raise XAsyncUDPDatagramException('Create : Out of memory?')
         else :
             recvBufSlot = None
-        xAsyncUDPDatagram = XAsyncUDPDatagram(asyncSocketsPool, udpSocket, recvBufSlot)
+        xAsyncUDPDatagram = XAsyncUDPDatagram(asyncSocketsPool, udpSocket, recvBufSlot, drainBudget)
         if openRecv :
             asyncSocketsPool.NotifyNextReadyForReading(xAsyncUDPDatagram, True)
         return xAsyncUDPDatagram
 
     # ------------------------------------------------------------------------
 
-    def __init__(self, asyncSocketsPool, udpSocket, recvBufSlot) :
+    def __init__(self, asyncSocketsPool, udpSocket, recvBufSlot, drainBudget=1) :
         try :
             super().__init__(asyncSocketsPool, udpSocket, recvBufSlot, None)
             self._wrDgramFiFo   = XFiFo()
+            self._drainBudget   = drainBudget
+            self._recvCount     = 0
+            self._drainMax      = 0
             self._onFailsToSend = None
             self._onDataSent    = None
             self._onDataSentArg = None
@@ -898,20 +2099,36 @@ class XAsyncUDPDatagram(XAsyncSocket) :
     # ------------------------------------------------------------------------
 
     def OnReadyForReading(self) :
+        # Reads datagrams until the socket queue is empty, up to the drain budget,
+        recvBufSlot = self._recvBufSlot
+        if not recvBufSlot :
+            return
+        buf     = recvBufSlot.Buffer
+        bufView = memoryview(buf)
+        count   = 0
         try :
-            n, remoteAddr = self._socket.recvfrom_into(self._recvBufSlot.Buffer)
-            datagram      = memoryview(self._recvBufSlot.Buffer)[:n]
-        except :
-            try :
-                buf, remoteAddr = self._socket.recvfrom(self._recvBufSlot.Size)
-                datagram        = memoryview(buf)
-            except :
-                return
-        if self._onDataRecv :
-            try :
-                self._onDataRecv(self, remoteAddr, datagram)
-            except Exception as ex :
-                raise XAsyncUDPDatagramException('Error when handling the "OnDataRecv" event : %s' % ex)
+            while count < self._drainBudget and self._socket :
+                try :
+                    n, remoteAddr = self._socket.recvfrom_into(buf)
+                    datagram      = bufView[:n]
+                except BlockingIOError :
+                    break
+                except :
+                    try :
+                        data, remoteAddr = self._socket.recvfrom(recvBufSlot.Size)
+                        datagram         = memoryview(data)
+                    except :
+                        break
+                count += 1
+                if self._onDataRecv :
+                    try :
+                        self._callOnDataRecv(remoteAddr, datagram)
+                    except Exception as ex :
+                        raise XAsyncUDPDatagramException('Error when handling the "OnDataRecv" event : %s' % ex)
+        finally :
+            self._recvCount += count
+            if count > self._drainMax :
+                self._drainMax = count
 
     # ------------------------------------------------------------------------
 
@@ -955,6 +2172,31 @@ class XAsyncUDPDatagram(XAsyncSocket) :
 
     # ------------------------------------------------------------------------
 
+    def GetSockRecvBufLen(self) :
+        try :
+            return self._socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        except :
+            return None
+
+    # ------------------------------------------------------------------------
+
+    def GetKernelDropsCount(self) :
+        # Returns the datagrams dropped by the kernel from /proc/net/udp on Linux, None otherwise,
+        try :
+            inode = str(fstat(self._socket.fileno()).st_ino)
+            for filename in '/proc/net/udp', '/proc/net/udp6' :
+                with open(filename, 'r') as file :
+                    file.readline()
+                    for line in file :
+                        fields = line.split()
+                        if fields[9] == inode :
+                            return int(fields[-1])
+        except :
+            pass
+        return None
+
+    # ------------------------------------------------------------------------
+
     @property
     def LocalAddr(self) :
         try :
@@ -962,6 +2204,18 @@ class XAsyncUDPDatagram(XAsyncSocket) :
         except :
             return ('0.0.0.0', 0)
 
+    @property
+    def DrainBudget(self) :
+        return self._drainBudget
+
+    @property
+    def RecvCount(self) :
+        return self._recvCount
+
+    @property
+    def DrainMax(self) :
+        return self._drainMax
+
     @property
     def OnDataRecv(self) :
         return self._onDataRecv
@@ -982,17 +2236,28 @@ class XAsyncUDPDatagram(XAsyncSocket) :
 
 class XBufferSlot :
 
+    __slots__ = ( '_available',
+                  '_size',
+                  '_keepAlloc',
+                  '_buffer',
+                  '_owner' )
+
     def __init__(self, size, keepAlloc=True) :
         self._available = True
         self._size      = size
         self._keepAlloc = keepAlloc
         self._buffer    = bytearray(size) if keepAlloc else None
+        self._owner     = None
 
     @property
     def Available(self) :
         return self._available
     @Available.setter
     def Available(self, value) :
+        if value and self._owner :
+            # The owner checks and frees the slot under its lock, so it is freed once,
+            self._owner._releaseSlot(self)
+            return
         if value and not self._keepAlloc :
             self._buffer = None
         self._available = value
@@ -1003,48 +2268,172 @@ class XBufferSlot :
 
     @property
     def Buffer(self) :
-        self._available = False
+        if not self._owner :
+            self._available = False
         if self._buffer is None :
             self._buffer = bytearray(self._size)
         return self._buffer
 
+# ============================================================================
+# ===( XBufferSizeClass )=====================================================
+# ============================================================================
+
+class XBufferSizeClass :
+
+    def __init__(self, size, keepCount) :
+        self._size           = size
+        self._keepCount      = keepCount
+        self._freeBuffers    = [ ]
+        self._lock           = allocate_lock()
+        self._inUseCount     = 0
+        self._peakInUseCount = 0
+        self._allocCount     = 0
+        self._reuseCount     = 0
+
+    def Acquire(self) :
+        with self._lock :
+            self._inUseCount += 1
+            if self._inUseCount > self._peakInUseCount :
+                self._peakInUseCount = self._inUseCount
+            if self._freeBuffers :
+                self._reuseCount += 1
+                return self._freeBuffers.pop()
+            self._allocCount += 1
+        return bytearray(self._size)
+
+    def Release(self, buf) :
+        with self._lock :
+            self._inUseCount -= 1
+            if len(self._freeBuffers) < self._keepCount :
+                self._freeBuffers.append(buf)
+
+    @property
+    def Size(self) :
+        return self._size
+
+    @property
+    def KeepCount(self) :
+        return self._keepCount
+
+    @property
+    def FreeCount(self) :
+        return len(self._freeBuffers)
+
+    @property
+    def InUseCount(self) :
+        return self._inUseCount
+
+    @property
+    def PeakInUseCount(self) :
+        return self._peakInUseCount
+
+    @property
+    def AllocCount(self) :
+        return self._allocCount
+
+    @property
+    def ReuseCount(self) :
+        return self._reuseCount
+
 # ============================================================================
 # ===( XBufferSlots )=========================================================
 # ============================================================================
 
 class XBufferSlots :
 
-    def __init__(self, slotsCount, slotsSize, keepAlloc=True) :
-        self._slotsCount = slotsCount
-        self._slotsSize  = slotsSize
-        self._slots      = [ ]
-        self._lock       = allocate_lock()
+    DEFAULT_LARGE_SIZES      = (16*1024, 64*1024, 512*1024)
+    DEFAULT_LARGE_KEEP_COUNT = 16
+
+    def __init__( self,
+                  slotsCount,
+                  slotsSize,
+                  keepAlloc      = True,
+                  largeSizes     = DEFAULT_LARGE_SIZES,
+                  largeKeepCount = DEFAULT_LARGE_KEEP_COUNT ) :
+        self._slotsCount     = slotsCount
+        self._slotsSize      = slotsSize
+        self._sizeClasses    = [ ]
+        self._slots          = [ ]
+        self._freeSlots      = [ ]
+        self._lock           = allocate_lock()
+        self._inUseCount     = 0
+        self._peakInUseCount = 0
+        self._allocFailures  = 0
         for i in range(slotsCount) :
-            self._slots.append(XBufferSlot(slotsSize, keepAlloc))
+            slot        = XBufferSlot(slotsSize, keepAlloc)
+            slot._owner = self
+            self._slots.append(slot)
+        self._freeSlots.extend(reversed(self._slots))
+        for size in sorted(largeSizes or ()) :
+            if size > slotsSize :
+                self._sizeClasses.append(XBufferSizeClass(size, largeKeepCount))
 
     def GetAvailableSlot(self) :
-        ret = None
-        self._lock.acquire()
+        with self._lock :
+            if not self._freeSlots :
+                self._allocFailures += 1
+                return None
+            slot = self._freeSlots.pop()
+            slot._available   = False
+            self._inUseCount += 1
+            if self._inUseCount > self._peakInUseCount :
+                self._peakInUseCount = self._inUseCount
+        return slot
+
+    def GetMemorySize(self) :
+        # Slots with their allocated buffers, large buffers are not counted,
+        size = getsizeof(self._slots) + getsizeof(self._freeSlots)
         for slot in self._slots :
-            if slot.Available :
-                slot.Available = False
-                ret = slot
-                break
-        self._lock.release()
-        return ret
+            size += getsizeof(slot)
+            if slot._buffer is not None :
+                size += getsizeof(slot._buffer)
+        return size
+
+    def GetSizeClass(self, size) :
+        # Returns the smallest size class able to hold size bytes, if any,
+        for sizeClass in self._sizeClasses :
+            if sizeClass.Size >= size :
+                return sizeClass
+        return None
+
+    def _releaseSlot(self, slot) :
+        with self._lock :
+            if slot._available :
+                return
+            if not slot._keepAlloc :
+                slot._buffer = None
+            slot._available   = True
+            self._freeSlots.append(slot)
+            self._inUseCount -= 1
 
     @property
     def SlotsCount(self) :
-        return self.slotsCount
+        return self._slotsCount
 
     @property
     def SlotsSize(self) :
-        return self.slotsSize
+        return self._slotsSize
 
     @property
     def Slots(self) :
         return self._slots
 
+    @property
+    def InUseCount(self) :
+        return self._inUseCount
+
+    @property
+    def PeakInUseCount(self) :
+        return self._peakInUseCount
+
+    @property
+    def AllocFailuresCount(self) :
+        return self._allocFailures
+
+    @property
+    def SizeClasses(self) :
+        return self._sizeClasses
+
 # ============================================================================
 # ===( XFiFo )================================================================
 # ============================================================================
@@ -0,0 +1,1504 @@
+"""
+The MIT License (MIT)
+Copyright © 2019 Jean-Christophe Bos & HC² (www.hc2.fr)
+"""
+
+
+from   XAsyncSockets import XClosedReason,              \
+                            XBufferSlot,                \
+                            XBufferSlots,               \
+                            XLoopStats,                 \
+                            XAsyncSocketsPoolException, \
+                            XAsyncSocketException,      \
+                            XAsyncTCPServerException,   \
+                            XAsyncTCPClientException,   \
+                            XAsyncUDPDatagramException
+from   _thread       import allocate_lock, start_new_thread, get_ident
+from   time          import sleep, perf_counter
+from   struct        import unpack_from
+from   os            import fstat
+from   sys           import getsizeof
+import selectors
+import asyncio
+import socket
+import ssl
+
+# ============================================================================
+# ===( XStatsSelector )=======================================================
+# ============================================================================
+
+class XStatsSelector :
+
+    # Mixed with a selectors class, the loop polls through it and each
+    # wait is measured once stats are given,
+
+    def __init__(self) :
+        super().__init__()
+        self._stats = None
+
+    # ------------------------------------------------------------------------
+
+    def select(self, timeout=None) :
+        stats = self._stats
+        if stats :
+            t      = perf_counter()
+            events = super().select(timeout)
+            stats.AddPollWait(perf_counter() - t, len(events))
+            return events
+        return super().select(timeout)
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def Stats(self) :
+        return self._stats
+    @Stats.setter
+    def Stats(self, value) :
+        self._stats = value
+
+class XStatsSelectSelector(XStatsSelector, selectors.SelectSelector) :
+    pass
+
+if hasattr(selectors, 'EpollSelector') :
+    class XStatsEpollSelector(XStatsSelector, selectors.EpollSelector) :
+        pass
+else :
+    XStatsEpollSelector = None
+
+# ============================================================================
+# ===( XAsyncSocketsPool )====================================================
+# ============================================================================
+
+class XAsyncSocketsPool :
+
+    POLLER_AUTO   = 'auto'
+    POLLER_SELECT = 'select'
+    POLLER_EPOLL  = 'epoll'
+
+    @staticmethod
+    def GetPollerTypes() :
+        return [ XAsyncSocketsPool.POLLER_AUTO,
+                 XAsyncSocketsPool.POLLER_SELECT,
+                 XAsyncSocketsPool.POLLER_EPOLL ]
+
+    # ------------------------------------------------------------------------
+
+    def __init__(self, pollerType=POLLER_AUTO, loopsCount=1) :
+        if pollerType == XAsyncSocketsPool.POLLER_AUTO :
+            pollerType = XAsyncSocketsPool.POLLER_EPOLL if XStatsEpollSelector \
+                         else XAsyncSocketsPool.POLLER_SELECT
+        if pollerType == XAsyncSocketsPool.POLLER_SELECT :
+            selector = XStatsSelectSelector()
+        elif pollerType == XAsyncSocketsPool.POLLER_EPOLL and XStatsEpollSelector :
+            selector = XStatsEpollSelector()
+        else :
+            raise XAsyncSocketsPoolException('XAsyncSocketsPool : Poller type "%s" is unknown.' % pollerType)
+        if loopsCount != 1 :
+            raise XAsyncSocketsPoolException('XAsyncSocketsPool : The asyncio backend runs a single event loop.')
+        self._pollerType   = pollerType
+        self._selector     = selector
+        self._loop         = asyncio.SelectorEventLoop(selector)
+        self._stats        = None
+        self._loopIdent    = None
+        self._tasks        = set()
+        self._threadsCount = 0
+        self._opLock       = allocate_lock()
+        self._asyncSockets = { }
+
+    # ------------------------------------------------------------------------
+
+    def _inLoop(self) :
+        # Before the loop runs, the calling thread is the only one to use it,
+        return get_ident() == self._loopIdent or not self._loop.is_running()
+
+    # ------------------------------------------------------------------------
+
+    def _callInLoop(self, func, *args) :
+        if self._inLoop() :
+            return func(*args)
+        try :
+            self._loop.call_soon_threadsafe(func, *args)
+            return True
+        except :
+            return False
+
+    # ------------------------------------------------------------------------
+
+    def _startTask(self, coro) :
+        if not self._loop.is_running() :
+            self._loop.run_until_complete(coro)
+        elif get_ident() == self._loopIdent :
+            task = self._loop.create_task(coro)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else :
+            asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    # ------------------------------------------------------------------------
+
+    def _runLoop(self) :
+        self._opLock.acquire()
+        self._threadsCount += 1
+        self._opLock.release()
+        self._loopIdent = get_ident()
+        asyncio.set_event_loop(self._loop)
+        try :
+            self._loop.run_forever()
+        except KeyboardInterrupt :
+            pass
+        self._loopIdent = None
+        self._opLock.acquire()
+        self._threadsCount -= 1
+        self._opLock.release()
+
+    # ------------------------------------------------------------------------
+
+    def AddAsyncSocket(self, asyncSocket) :
+        try :
+            socketID = asyncSocket.SocketID
+        except :
+            raise XAsyncSocketsPoolException('AddAsyncSocket : "asyncSocket" is incorrect.')
+        with self._opLock :
+            if socketID is None or socketID in self._asyncSockets :
+                return False
+            self._asyncSockets[socketID] = asyncSocket
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def RemoveAsyncSocket(self, asyncSocket) :
+        try :
+            socketID = asyncSocket.SocketID
+        except :
+            raise XAsyncSocketsPoolException('RemoveAsyncSocket : "asyncSocket" is incorrect.')
+        with self._opLock :
+            if self._asyncSockets.get(socketID, None) is not asyncSocket :
+                return False
+            del self._asyncSockets[socketID]
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def GetAllAsyncSockets(self) :
+        return list(self._asyncSockets.values())
+
+    # ------------------------------------------------------------------------
+
+    def GetAsyncSocketByID(self, id) :
+        return self._asyncSockets.get(id, None)
+
+    # ------------------------------------------------------------------------
+
+    def NotifyNextReadyForReading(self, asyncSocket, notify) :
+        try :
+            setReadInterest = asyncSocket._setReadInterest
+        except :
+            raise XAsyncSocketsPoolException('NotifyNextReadyForReading : "asyncSocket" is incorrect.')
+        self._callInLoop(setReadInterest, notify)
+
+    # ------------------------------------------------------------------------
+
+    def NotifyNextReadyForWriting(self, asyncSocket, notify) :
+        # Writing is driven by the asyncio transports,
+        pass
+
+    # ------------------------------------------------------------------------
+
+    def EnableStats(self, slowCallbackSec=0.1) :
+        if not self._stats :
+            self._stats          = XLoopStats(slowCallbackSec)
+            self._selector.Stats = self._stats
+        return self._stats
+
+    # ------------------------------------------------------------------------
+
+    def DisableStats(self) :
+        self._stats          = None
+        self._selector.Stats = None
+
+    # ------------------------------------------------------------------------
+
+    def AsyncWaitEvents(self, threadsCount=0) :
+        if self._threadsCount :
+            return
+        if threadsCount > 0 :
+            # A single thread runs the event loop whatever the threads count,
+            try :
+                start_new_thread(self._runLoop, ())
+            except :
+                raise XAsyncSocketsPoolException('AsyncWaitEvents : Fatal error to create new threads...')
+            while not self._threadsCount or not self._loop.is_running() :
+                sleep(0.001)
+        else :
+            self._runLoop()
+
+    # ------------------------------------------------------------------------
+
+    def StopWaitEvents(self) :
+        try :
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        except :
+            pass
+        while self._threadsCount :
+            sleep(0.001)
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def WaitEventsProcessing(self) :
+        return (self._threadsCount > 0)
+
+    @property
+    def PollerType(self) :
+        return self._pollerType
+
+    @property
+    def Loop(self) :
+        return self._loop
+
+    @property
+    def Stats(self) :
+        return self._stats
+
+    @property
+    def TCPServer(self) :
+        return XAsyncTCPServer
+
+    @property
+    def TCPClient(self) :
+        return XAsyncTCPClient
+
+    @property
+    def UDPDatagram(self) :
+        return XAsyncUDPDatagram
+
+# ============================================================================
+# ===( XAsyncSocket )=========================================================
+# ============================================================================
+
+class XAsyncSocket :
+
+    __slots__ = ( '_asyncSocketsPool',
+                  '_socket',
+                  '_socketID',
+                  '_transport',
+                  '_sockTransport',
+                  '_recvBufSlot',
+                  '_sendBufSlot',
+                  '_expireHandle',
+                  '_expireTimeSec',
+                  '_closedReason',
+                  '_triggerOnClosed',
+                  '_state',
+                  '_onClosed' )
+
+    def __init__(self, asyncSocketsPool, socket, recvBufSlot=None, sendBufSlot=None) :
+        if type(self) is XAsyncSocket :
+            raise XAsyncSocketException('XAsyncSocket is an abstract class and must be implemented.')
+        self._asyncSocketsPool = asyncSocketsPool
+        self._socket           = None
+        self._socketID         = None
+        self._transport        = None
+        self._sockTransport    = None
+        self._recvBufSlot      = recvBufSlot
+        self._sendBufSlot      = sendBufSlot
+        self._expireHandle     = None
+        self._expireTimeSec    = None
+        self._closedReason     = None
+        self._triggerOnClosed  = True
+        self._state            = None
+        self._onClosed         = None
+        if (recvBufSlot is not None and type(recvBufSlot) is not XBufferSlot) or \
+           (sendBufSlot is not None and type(sendBufSlot) is not XBufferSlot) :
+            raise XAsyncSocketException('XAsyncSocket : Arguments are incorrects.')
+        if socket is not None :
+            try :
+                socket.settimeout(0)
+                socket.setblocking(0)
+            except :
+                raise XAsyncSocketException('XAsyncSocket : Arguments are incorrects.')
+            self._attachSocket(socket)
+
+    # ------------------------------------------------------------------------
+
+    def _attachSocket(self, socket) :
+        self._socket   = socket
+        self._socketID = socket.fileno()
+        if not self._asyncSocketsPool.AddAsyncSocket(self) :
+            raise XAsyncSocketException('XAsyncSocket : Arguments are incorrects.')
+
+    # ------------------------------------------------------------------------
+
+    def _isOpened(self) :
+        return self._socket is not None and self._closedReason is None
+
+    # ------------------------------------------------------------------------
+
+    def _setReadInterest(self, notify) :
+        pass
+
+    # ------------------------------------------------------------------------
+
+    def _callOnDataRecv(self, *args) :
+        stats = self._asyncSocketsPool._stats
+        if stats :
+            stats.TimeCallback(self, 'OnDataRecv', self._onDataRecv, self, *args)
+        else :
+            self._onDataRecv(self, *args)
+
+    # ------------------------------------------------------------------------
+
+    def _setExpireTimeout(self, timeoutSec) :
+        try :
+            if timeoutSec and timeoutSec > 0 :
+                self._removeExpireTimeout()
+                loop                = self._asyncSocketsPool._loop
+                self._expireTimeSec = loop.time() + timeoutSec
+                self._expireHandle  = loop.call_later( timeoutSec,
+                                                       self._close,
+                                                       XClosedReason.Timeout )
+        except :
+            raise XAsyncSocketException('"timeoutSec" is incorrect to set expire timeout.')
+
+    # ------------------------------------------------------------------------
+
+    def _removeExpireTimeout(self) :
+        if self._expireHandle is not None :
+            self._expireHandle.cancel()
+            self._expireHandle  = None
+            self._expireTimeSec = None
+
+    # ------------------------------------------------------------------------
+
+    def _close(self, closedReason=XClosedReason.Error, triggerOnClosed=True) :
+        # The end of the socket is handled when the transport signals it,
+        if not self._isOpened() :
+            return False
+        self._closedReason    = closedReason
+        self._triggerOnClosed = triggerOnClosed
+        # Under SSL, the socket transport is closed without waiting for the peer,
+        transport = self._sockTransport or self._transport
+        if transport :
+            if closedReason == XClosedReason.ClosedByHost :
+                transport.close()
+            else :
+                transport.abort()
+        else :
+            self._closed()
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def _closed(self) :
+        if self._socket is None :
+            return
+        self._removeExpireTimeout()
+        self._asyncSocketsPool.RemoveAsyncSocket(self)
+        if self._transport is None :
+            try :
+                self._socket.close()
+            except :
+                pass
+        self._socket        = None
+        self._transport     = None
+        self._sockTransport = None
+        if self._recvBufSlot is not None :
+            self._recvBufSlot.Available = True
+            self._recvBufSlot = None
+        if self._sendBufSlot is not None :
+            self._sendBufSlot.Available = True
+            self._sendBufSlot = None
+        if self._closedReason is None :
+            self._closedReason = XClosedReason.Error
+        if self._triggerOnClosed and self._onClosed :
+            try :
+                self._onClosed(self, self._closedReason)
+            except Exception as ex :
+                raise XAsyncSocketException('Error when handling the "OnClose" event : %s' % ex)
+
+    # ------------------------------------------------------------------------
+
+    def connection_lost(self, exc) :
+        if self._closedReason is None :
+            self._closedReason = XClosedReason.ClosedByPeer if exc is None \
+                                 else XClosedReason.Error
+        self._closed()
+
+    # ------------------------------------------------------------------------
+
+    def GetAsyncSocketsPool(self) :
+        return self._asyncSocketsPool
+
+    # ------------------------------------------------------------------------
+
+    def GetMemorySize(self) :
+        # Own objects of the socket, buffers of the slots are counted by their pool,
+        size = getsizeof(self) + getsizeof(self._socket) + getsizeof(self._transport)
+        if self._sockTransport is not self._transport :
+            size += getsizeof(self._sockTransport)
+        return size
+
+    # ------------------------------------------------------------------------
+
+    def GetSocketObj(self) :
+        if self._transport :
+            sslObj = self._transport.get_extra_info('ssl_object')
+            if sslObj :
+                return sslObj
+        return self._socket
+
+    # ------------------------------------------------------------------------
+
+    def Close(self) :
+        return self._asyncSocketsPool._callInLoop(self._close, XClosedReason.ClosedByHost)
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def SocketID(self) :
+        return self._socketID if self._socket else None
+
+    @property
+    def ExpireTimeSec(self) :
+        return self._expireTimeSec
+
+    @property
+    def OnClosed(self) :
+        return self._onClosed
+    @OnClosed.setter
+    def OnClosed(self, value) :
+        self._onClosed = value
+
+    @property
+    def State(self) :
+        return self._state
+    @State.setter
+    def State(self, value) :
+        self._state = value
+
+# ============================================================================
+# ===( XAsyncTCPServer )======================================================
+# ============================================================================
+
+class _XRefusedClientProtocol(asyncio.Protocol) :
+
+    def __init__(self, xAsyncTCPServer) :
+        self._xAsyncTCPServer = xAsyncTCPServer
+
+    def connection_made(self, transport) :
+        self._xAsyncTCPServer._refuseClient(transport)
+
+class XAsyncTCPServer(XAsyncSocket) :
+
+    __slots__ = ( '_srvAddr',
+                  '_srvBacklog',
+                  '_bufSlots',
+                  '_lazyBufSlots',
+                  '_acceptBatchSize',
+                  '_acceptedCount',
+                  '_refusedCount',
+                  '_acceptBatchMax',
+                  '_server',
+                  '_onClientAccepted',
+                  '_onClientRefused' )
+
+    DEFAULT_ACCEPT_BATCH_SIZE = 32
+
+    @staticmethod
+    def Create( asyncSocketsPool,
+                srvAddr,
+                srvBacklog      = 256,
+                bufSlots        = None,
+                reusePort       = False,
+                lazyBufSlots    = False,
+                acceptBatchSize = DEFAULT_ACCEPT_BATCH_SIZE ) :
+        try :
+            srvSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        except :
+            raise XAsyncTCPServerException('Create : Cannot open socket (no enought memory).')
+        if reusePort and not hasattr(socket, 'SO_REUSEPORT') :
+            raise XAsyncTCPServerException('Create : SO_REUSEPORT is not supported on this system.')
+        try :
+            srvSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if reusePort :
+                srvSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            srvSocket.bind(srvAddr)
+            srvSocket.listen(srvBacklog)
+        except :
+            raise XAsyncTCPServerException('Create : Error to binding the TCP server on this address.')
+        if not bufSlots :
+            bufSlots = XBufferSlots(256, 4096, keepAlloc=True)
+        xAsyncTCPServer = XAsyncTCPServer( asyncSocketsPool,
+                                           srvSocket,
+                                           srvAddr,
+                                           bufSlots,
+                                           lazyBufSlots,
+                                           acceptBatchSize,
+                                           srvBacklog )
+        asyncSocketsPool.NotifyNextReadyForReading(xAsyncTCPServer, True)
+        return xAsyncTCPServer
+
+    # ------------------------------------------------------------------------
+
+    def __init__(self, asyncSocketsPool, srvSocket, srvAddr, bufSlots, lazyBufSlots=False, acceptBatchSize=1, srvBacklog=256) :
+        try :
+            super().__init__(asyncSocketsPool, srvSocket)
+            self._srvAddr          = srvAddr
+            self._srvBacklog       = srvBacklog
+            self._bufSlots         = bufSlots
+            self._lazyBufSlots     = lazyBufSlots
+            # Connections are accepted by asyncio, the batch size is not applied,
+            self._acceptBatchSize  = max(1, acceptBatchSize)
+            self._acceptedCount    = 0
+            self._refusedCount     = 0
+            self._acceptBatchMax   = 0
+            self._server           = None
+            self._onClientAccepted = None
+            self._onClientRefused  = None
+        except :
+            raise XAsyncTCPServerException('Error to creating XAsyncTCPServer, arguments are incorrects.')
+
+    # ------------------------------------------------------------------------
+
+    def _setReadInterest(self, notify) :
+        if notify and self._server is None and self._isOpened() :
+            self._server = True
+            self._asyncSocketsPool._startTask(self._serve())
+
+    # ------------------------------------------------------------------------
+
+    async def _serve(self) :
+        self._server = await self._asyncSocketsPool._loop.create_server( self._createClient,
+                                                                         sock    = self._socket,
+                                                                         backlog = self._srvBacklog )
+
+    # ------------------------------------------------------------------------
+
+    def _createClient(self) :
+        if not self._onClientAccepted :
+            return _XRefusedClientProtocol(self)
+        if self._lazyBufSlots :
+            # Slots are only taken by the client while receiving or sending,
+            recvBufSlot = None
+            sendBufSlot = None
+        else :
+            recvBufSlot = self._bufSlots.GetAvailableSlot()
+            sendBufSlot = self._bufSlots.GetAvailableSlot()
+            if not recvBufSlot or not sendBufSlot :
+                if recvBufSlot :
+                    recvBufSlot.Available = True
+                if sendBufSlot :
+                    sendBufSlot.Available = True
+                return _XRefusedClientProtocol(self)
+        return XAsyncTCPClient( self._asyncSocketsPool,
+                                None,
+                                self._srvAddr,
+                                None,
+                                recvBufSlot,
+                                sendBufSlot,
+                                self._bufSlots,
+                                self._lazyBufSlots,
+                                self )
+
+    # ------------------------------------------------------------------------
+
+    def _acceptClient(self, asyncTCPCli) :
+        self._acceptedCount += 1
+        try :
+            self._onClientAccepted(self, asyncTCPCli)
+        except Exception as ex :
+            asyncTCPCli._close()
+            raise XAsyncTCPServerException('Error when handling the "OnClientAccepted" event : %s' % ex)
+
+    # ------------------------------------------------------------------------
+
+    def _refuseClient(self, transport) :
+        self._refusedCount += 1
+        if self._onClientRefused :
+            try :
+                # The callback gets its own socket on the connection,
+                sock      = transport.get_extra_info('socket')
+                cliSocket = socket.fromfd(sock.fileno(), sock.family, sock.type)
+                try :
+                    cliSocket.settimeout(0)
+                    self._onClientRefused(self, cliSocket)
+                finally :
+                    cliSocket.close()
+            except :
+                pass
+        transport.abort()
+
+    # ------------------------------------------------------------------------
+
+    def _close(self, closedReason=XClosedReason.Error, triggerOnClosed=True) :
+        if not self._isOpened() :
+            return False
+        self._closedReason    = closedReason
+        self._triggerOnClosed = triggerOnClosed
+        if self._server and self._server is not True :
+            self._server.close()
+        self._closed()
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def GetListenQueueInfo(self) :
+        # Returns (pending connections, backlog) from TCP_INFO on Linux, None otherwise,
+        try :
+            info = self._socket.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, 104)
+            return unpack_from('=II', info, 24)
+        except :
+            return None
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def SrvAddr(self) :
+        return self._srvAddr
+
+    @property
+    def BufSlots(self) :
+        return self._bufSlots
+
+    @property
+    def LazyBufSlots(self) :
+        return self._lazyBufSlots
+
+    @property
+    def AcceptBatchSize(self) :
+        return self._acceptBatchSize
+
+    @property
+    def AcceptedCount(self) :
+        return self._acceptedCount
+
+    @property
+    def RefusedCount(self) :
+        return self._refusedCount
+
+    @property
+    def AcceptBatchMax(self) :
+        return self._acceptBatchMax
+
+    @property
+    def OnClientAccepted(self) :
+        return self._onClientAccepted
+    @OnClientAccepted.setter
+    def OnClientAccepted(self, value) :
+        self._onClientAccepted = value
+
+    @property
+    def OnClientRefused(self) :
+        return self._onClientRefused
+    @OnClientRefused.setter
+    def OnClientRefused(self, value) :
+        self._onClientRefused = value
+
+# ============================================================================
+# ===( XAsyncTCPClient )======================================================
+# ============================================================================
+
+class XAsyncTCPClient(XAsyncSocket, asyncio.BufferedProtocol) :
+
+    __slots__ = ( '_bufSlots',
+                  '_lazyBufSlots',
+                  '_xAsyncTCPServer',
+                  '_srvAddr',
+                  '_cliAddr',
+                  '_onFailsToConnect',
+                  '_onConnected',
+                  '_onSSLHandshaked',
+                  '_isSSL',
+                  '_sslArgs',
+                  '_sslHandshaking',
+                  '_onDataRecv',
+                  '_onDataRecvArg',
+                  '_sizeToRecv',
+                  '_rdLineEncoding',
+                  '_rdBuf',
+                  '_rdStart',
+                  '_rdEnd',
+                  '_rdLargeBuf',
+                  '_rdLargeView',
+                  '_rdLargePos',
+                  '_inReading',
+                  '_pendingWrites',
+                  '_sentCallbacks' )
+
+    SSL_HANDSHAKE_TIMEOUT = 10
+
+    @staticmethod
+    def Create( asyncSocketsPool,
+                srvAddr,
+                connectTimeout = 5,
+                recvBufLen     = 4096,
+                sendBufLen     = 4096,
+                connectAsync   = True ) :
+        try :
+            size        = max(256, recvBufLen)
+            recvBufSlot = XBufferSlot(size=size, keepAlloc=True)
+            size        = max(256, sendBufLen)
+            sendBufSlot = XBufferSlot(size=size, keepAlloc=True)
+        except :
+            raise XAsyncTCPClientException('Create : Out of memory?')
+        try :
+            cliSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        except :
+            raise XAsyncTCPClientException('Create : Cannot open socket (no enought memory).')
+        asyncTCPCli = XAsyncTCPClient( asyncSocketsPool,
+                                       cliSocket,
+                                       srvAddr,
+                                       None,
+                                       recvBufSlot,
+                                       sendBufSlot )
+        if not connectAsync :
+            try :
+                cliSocket.settimeout(connectTimeout)
+                cliSocket.setblocking(1)
+                cliSocket.connect(srvAddr)
+                cliSocket.settimeout(0)
+                cliSocket.setblocking(0)
+            except :
+                asyncTCPCli._close(XClosedReason.Error, triggerOnClosed=False)
+                return None
+        asyncSocketsPool._startTask(asyncTCPCli._open(connectTimeout, connectAsync))
+        return asyncTCPCli
+
+    # ------------------------------------------------------------------------
+
+    def __init__(self, asyncSocketsPool, cliSocket, srvAddr, cliAddr, recvBufSlot, sendBufSlot, bufSlots=None, lazyBufSlots=False, xAsyncTCPServer=None) :
+        try :
+            super().__init__(asyncSocketsPool, cliSocket, recvBufSlot, sendBufSlot)
+            self._bufSlots         = bufSlots
+            self._lazyBufSlots     = lazyBufSlots
+            self._xAsyncTCPServer  = xAsyncTCPServer
+            self._srvAddr          = srvAddr
+            self._cliAddr          = cliAddr if cliAddr else ('0.0.0.0', 0)
+            self._onFailsToConnect = None
+            self._onConnected      = None
+            self._onSSLHandshaked  = None
+            self._isSSL            = False
+            self._sslArgs          = None
+            self._sslHandshaking   = False
+            self._onDataRecv       = None
+            self._onDataRecvArg    = None
+            self._sizeToRecv       = None
+            self._rdLineEncoding   = None
+            self._rdBuf            = None
+            self._rdStart          = 0
+            self._rdEnd            = 0
+            self._rdLargeBuf       = None
+            self._rdLargeView      = None
+            self._rdLargePos       = 0
+            self._inReading        = False
+            self._pendingWrites    = [ ]
+            self._sentCallbacks    = [ ]
+        except :
+            raise XAsyncTCPClientException('Error to creating XAsyncTCPClient, arguments are incorrects.')
+
+    # ------------------------------------------------------------------------
+
+    async def _open(self, connectTimeout, connectAsync) :
+        loop = self._asyncSocketsPool._loop
+        try :
+            if connectAsync :
+                await asyncio.wait_for( loop.sock_connect(self._socket, self._srvAddr),
+                                        connectTimeout )
+            if self._isOpened() :
+                await loop.create_connection(lambda : self, sock=self._socket)
+        except :
+            if self._close(XClosedReason.Error, triggerOnClosed=False) and \
+               self._onFailsToConnect :
+                try :
+                    self._onFailsToConnect(self)
+                except Exception as ex :
+                    raise XAsyncTCPClientException('Error when handling the "OnFailsToConnect" event : %s' % ex)
+
+    # ------------------------------------------------------------------------
+
+    def connection_made(self, transport) :
+        self._transport     = transport
+        self._sockTransport = transport
+        transport.set_write_buffer_limits(high=0)
+        if self._xAsyncTCPServer :
+            try :
+                self._attachSocket(transport.get_extra_info('socket'))
+                self._cliAddr = transport.get_extra_info('peername')
+            except :
+                transport.abort()
+                return
+            self._xAsyncTCPServer._acceptClient(self)
+        else :
+            if not self._isOpened() :
+                transport.abort()
+                return
+            self._cliAddr = transport.get_extra_info('sockname')
+            if self._onConnected :
+                try :
+                    self._onConnected(self)
+                except Exception as ex :
+                    raise XAsyncTCPClientException('Error when handling the "OnConnected" event : %s' % ex)
+            if self._sslArgs :
+                self._upgradeSSL()
+            else :
+                self._flushPendingWrites()
+        self._updateReading()
+
+    # ------------------------------------------------------------------------
+
+    def connection_lost(self, exc) :
+        self._releaseLargeRecvBuf()
+        self._sentCallbacks.clear()
+        self._pendingWrites.clear()
+        super().connection_lost(exc)
+
+    # ------------------------------------------------------------------------
+
+    def eof_received(self) :
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def GetMemorySize(self) :
+        return super().GetMemorySize() + getsizeof(self._pendingWrites) + getsizeof(self._sentCallbacks)
+
+    # ------------------------------------------------------------------------
+
+    def _acquireRecvBuf(self) :
+        if self._rdBuf is None :
+            if self._recvBufSlot is None and self._lazyBufSlots :
+                self._recvBufSlot = self._bufSlots.GetAvailableSlot()
+                if self._recvBufSlot is None :
+                    self._close()
+                    return False
+            self._rdBuf   = self._recvBufSlot.Buffer
+            self._rdStart = 0
+            self._rdEnd   = 0
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def _releaseIdleRecvBuf(self) :
+        if self._lazyBufSlots and self._recvBufSlot is not None and \
+           self._rdStart == self._rdEnd :
+            self._rdBuf = None
+            self._recvBufSlot.Available = True
+            self._recvBufSlot = None
+
+    # ------------------------------------------------------------------------
+
+    def _releaseLargeRecvBuf(self) :
+        if self._rdLargeBuf :
+            self._rdLargeBuf[0].Release(self._rdLargeBuf[1])
+        self._rdLargeBuf  = None
+        self._rdLargeView = None
+
+    # ------------------------------------------------------------------------
+
+    def get_buffer(self, sizehint) :
+        if self._rdLargeView is not None :
+            return self._rdLargeView[self._rdLargePos:]
+        if not self._acquireRecvBuf() :
+            return memoryview(bytearray(1))
+        if self._rdStart == self._rdEnd :
+            self._rdStart = 0
+            self._rdEnd   = 0
+        elif self._rdEnd == len(self._rdBuf) :
+            # Moves the pending data to the start of the buffer,
+            size                = self._rdEnd - self._rdStart
+            self._rdBuf[:size]  = self._rdBuf[self._rdStart:self._rdEnd]
+            self._rdStart       = 0
+            self._rdEnd         = size
+        return memoryview(self._rdBuf)[self._rdEnd:]
+
+    # ------------------------------------------------------------------------
+
+    def buffer_updated(self, nbytes) :
+        if not self._isOpened() :
+            return
+        if self._rdLargeView is not None :
+            self._rdLargePos += nbytes
+        else :
+            self._rdEnd += nbytes
+        self._processRecv()
+
+    # ------------------------------------------------------------------------
+
+    def _processRecv(self) :
+        # When called while reading, the receive is processed by the reading loop,
+        if self._inReading :
+            return
+        self._inReading = True
+        try :
+            while self._isOpened() :
+                if self._rdLineEncoding is not None :
+                    # In the context of reading a line,
+                    if self._rdBuf is None :
+                        return
+                    idx = self._rdBuf.find(b'\n', self._rdStart, self._rdEnd)
+                    if idx < 0 :
+                        if self._rdEnd - self._rdStart >= len(self._rdBuf) :
+                            self._close()
+                        return
+                    line = self._rdBuf[self._rdStart:idx]
+                    self._rdStart = idx + 1
+                    if line[-1:] == b'\r' :
+                        line = line[:-1]
+                    try :
+                        line = line.decode(self._rdLineEncoding)
+                    except :
+                        line = None
+                    self._rdLineEncoding = None
+                    self._removeExpireTimeout()
+                    if self._onDataRecv :
+                        try :
+                            self._callOnDataRecv(line, self._onDataRecvArg)
+                        except Exception as ex :
+                            raise XAsyncTCPClientException('Error when handling the "OnDataRecv" event : %s' % ex)
+                elif self._sizeToRecv :
+                    # In the context of reading data,
+                    largeBuf = None
+                    if self._rdLargeView is not None :
+                        if self._rdLargePos < self._sizeToRecv :
+                            return
+                        data             = self._rdLargeView
+                        largeBuf         = self._rdLargeBuf
+                        self._rdLargeBuf  = None
+                        self._rdLargeView = None
+                    else :
+                        if self._rdBuf is None or \
+                           self._rdEnd - self._rdStart < self._sizeToRecv :
+                            return
+                        pos           = self._rdStart
+                        self._rdStart = pos + self._sizeToRecv
+                        data          = memoryview(self._rdBuf)[pos:self._rdStart]
+                    self._sizeToRecv = None
+                    self._removeExpireTimeout()
+                    try :
+                        if self._onDataRecv :
+                            try :
+                                self._callOnDataRecv(data, self._onDataRecvArg)
+                            except Exception as ex :
+                                raise XAsyncTCPClientException('Error when handling the "OnDataRecv" event : %s' % ex)
+                    finally :
+                        if largeBuf :
+                            # The large buffer is given back once the data has been handled,
+                            largeBuf[0].Release(largeBuf[1])
+                else :
+                    return
+        finally :
+            self._inReading = False
+            self._updateReading()
+
+    # ------------------------------------------------------------------------
+
+    def _updateReading(self) :
+        # Reading stays enabled only while a receive is waited,
+        transport = self._transport
+        if transport and self._isOpened() and not self._sslHandshaking :
+            recvWaiting = (self._rdLineEncoding is not None or bool(self._sizeToRecv))
+            if not recvWaiting :
+                self._releaseIdleRecvBuf()
+            if recvWaiting != transport.is_reading() :
+                if recvWaiting :
+                    transport.resume_reading()
+                else :
+                    transport.pause_reading()
+
+    # ------------------------------------------------------------------------
+
+    def _recvLine(self, lineEncoding, onLineRecv, onLineRecvArg, timeoutSec) :
+        if not self._isOpened() or not self._acquireRecvBuf() :
+            return False
+        self._setExpireTimeout(timeoutSec)
+        self._rdLineEncoding = lineEncoding
+        self._onDataRecv     = onLineRecv
+        self._onDataRecvArg  = onLineRecvArg
+        self._processRecv()
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def _recvData(self, size, onDataRecv, onDataRecvArg, timeoutSec) :
+        if not self._isOpened() or not self._acquireRecvBuf() :
+            return False
+        if size > len(self._rdBuf) :
+            sizeClass = self._bufSlots.GetSizeClass(size) if self._bufSlots else None
+            try :
+                if sizeClass :
+                    self._rdLargeBuf  = (sizeClass, sizeClass.Acquire())
+                    self._rdLargeView = memoryview(self._rdLargeBuf[1])[:size]
+                else :
+                    self._rdLargeView = memoryview(bytearray(size))
+            except :
+                self._close()
+                return False
+            # Data already received goes first in the large buffer,
+            n = min(size, self._rdEnd - self._rdStart)
+            self._rdLargeView[:n] = self._rdBuf[self._rdStart:self._rdStart+n]
+            self._rdStart   += n
+            self._rdLargePos = n
+        self._setExpireTimeout(timeoutSec)
+        self._sizeToRecv    = size
+        self._onDataRecv    = onDataRecv
+        self._onDataRecvArg = onDataRecvArg
+        self._processRecv()
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def _write(self, dataParts, onDataSent, onDataSentArg) :
+        if not self._isOpened() :
+            return False
+        if self._transport is None or self._sslHandshaking :
+            self._pendingWrites.append((dataParts, onDataSent, onDataSentArg))
+            return True
+        if self._isSSL :
+            # The SSL transport may keep a reference on the data,
+            dataParts = [ data if data.readonly else bytes(data) for data in dataParts ]
+        if len(dataParts) == 1 :
+            self._transport.write(dataParts[0])
+        else :
+            self._transport.writelines(dataParts)
+        if onDataSent :
+            self._sentCallbacks.append((onDataSent, onDataSentArg))
+            if not self._transport.get_write_buffer_size() :
+                self._asyncSocketsPool._loop.call_soon(self.resume_writing)
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def _flushPendingWrites(self) :
+        pendingWrites       = self._pendingWrites
+        self._pendingWrites = [ ]
+        for dataParts, onDataSent, onDataSentArg in pendingWrites :
+            self._write(dataParts, onDataSent, onDataSentArg)
+
+    # ------------------------------------------------------------------------
+
+    def pause_writing(self) :
+        pass
+
+    # ------------------------------------------------------------------------
+
+    def resume_writing(self) :
+        # With a zero high-water mark, called each time all the data is sent,
+        if self._transport and not self._transport.get_write_buffer_size() :
+            sentCallbacks       = self._sentCallbacks
+            self._sentCallbacks = [ ]
+            for onDataSent, onDataSentArg in sentCallbacks :
+                try :
+                    onDataSent(self, onDataSentArg)
+                except Exception as ex :
+                    raise XAsyncTCPClientException('Error when handling the "OnDataSent" event : %s' % ex)
+
+    # ------------------------------------------------------------------------
+
+    def _startSSL(self, sslContext, serverSide, timeoutSec) :
+        if not self._isOpened() :
+            return
+        if timeoutSec is None :
+            timeoutSec = self.SSL_HANDSHAKE_TIMEOUT
+        self._sslArgs        = (sslContext, serverSide, timeoutSec)
+        self._sslHandshaking = True
+        if self._transport :
+            self._upgradeSSL()
+
+    # ------------------------------------------------------------------------
+
+    def _upgradeSSL(self) :
+        self._asyncSocketsPool._startTask(self._processSSLHandshake(*self._sslArgs))
+
+    # ------------------------------------------------------------------------
+
+    async def _processSSLHandshake(self, sslContext, serverSide, timeoutSec) :
+        loop = self._asyncSocketsPool._loop
+        try :
+            transport = await loop.start_tls( self._transport,
+                                              self,
+                                              sslContext,
+                                              server_side           = serverSide,
+                                              server_hostname       = None if serverSide else self._srvAddr[0],
+                                              ssl_handshake_timeout = timeoutSec )
+        except :
+            self._sslHandshaking = False
+            self._close()
+            return
+        if not self._isOpened() :
+            transport.abort()
+            return
+        transport.set_write_buffer_limits(high=0)
+        self._transport      = transport
+        self._isSSL          = True
+        self._sslHandshaking = False
+        self._flushPendingWrites()
+        self._updateReading()
+        if self._onSSLHandshaked :
+            try :
+                self._onSSLHandshaked(self)
+            except Exception as ex :
+                raise XAsyncTCPClientException('Error when handling the "OnSSLHandshaked" event : %s' % ex)
+
+    # ------------------------------------------------------------------------
+
+    def AsyncRecvLine(self, lineEncoding='UTF-8', onLineRecv=None, onLineRecvArg=None, timeoutSec=None) :
+        if self._rdLineEncoding is not None or self._sizeToRecv :
+            raise XAsyncTCPClientException('AsyncRecvLine : Already waiting asynchronous receive.')
+        if self._isOpened() :
+            return self._asyncSocketsPool._callInLoop( self._recvLine,
+                                                       lineEncoding,
+                                                       onLineRecv,
+                                                       onLineRecvArg,
+                                                       timeoutSec )
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def AsyncRecvData(self, size=None, onDataRecv=None, onDataRecvArg=None, timeoutSec=None) :
+        if self._rdLineEncoding is not None or self._sizeToRecv :
+            raise XAsyncTCPClientException('AsyncRecvData : Already waiting asynchronous receive.')
+        if self._isOpened() :
+            if size is None :
+                size = self._recvBufSlot.Size if self._recvBufSlot else self._bufSlots.SlotsSize
+            elif not isinstance(size, int) or size <= 0 :
+                raise XAsyncTCPClientException('AsyncRecvData : "size" is incorrect.')
+            return self._asyncSocketsPool._callInLoop( self._recvData,
+                                                       size,
+                                                       onDataRecv,
+                                                       onDataRecvArg,
+                                                       timeoutSec )
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def AsyncSendData(self, data, onDataSent=None, onDataSentArg=None) :
+        return self.AsyncSendDataParts((data, ), onDataSent, onDataSentArg)
+
+    # ------------------------------------------------------------------------
+
+    def AsyncSendDataParts(self, dataParts, onDataSent=None, onDataSentArg=None) :
+        if self._isOpened() :
+            try :
+                views = [ memoryview(data).cast('B') for data in dataParts ]
+                views = [ view for view in views if view ]
+            except :
+                views = None
+            if not views :
+                raise XAsyncTCPClientException('AsyncSendData : "data" is incorrect.')
+            if not self._asyncSocketsPool._inLoop() or self._transport is None or \
+               self._sslHandshaking :
+                # Data can change before being written by the loop,
+                views = [ view if view.readonly else memoryview(bytes(view)) for view in views ]
+            return self._asyncSocketsPool._callInLoop(self._write, views, onDataSent, onDataSentArg)
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def AsyncSendSendingBuffer(self, size=None, onDataSent=None, onDataSentArg=None) :
+        buf = self.SendingBuffer
+        if buf is None :
+            return False
+        if size is None :
+            size = len(buf)
+        if size > 0 and size <= len(buf) :
+            return self.AsyncSendData(bytes(buf[:size]), onDataSent, onDataSentArg)
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def StartSSL( self,
+                  keyfile     = None,
+                  certfile    = None,
+                  server_side = False,
+                  cert_reqs   = 0,
+                  ca_certs    = None,
+                  timeoutSec  = None ) :
+        if self._isSSL or self._sslHandshaking :
+            raise XAsyncTCPClientException('StartSSL : SSL already started.')
+        try :
+            if server_side :
+                sslContext = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            else :
+                sslContext = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+                sslContext.check_hostname = False
+            sslContext.verify_mode = cert_reqs
+            if certfile :
+                sslContext.load_cert_chain(certfile, keyfile)
+            if ca_certs :
+                sslContext.load_verify_locations(ca_certs)
+        except Exception as ex :
+            raise XAsyncTCPClientException('StartSSL : %s' % ex)
+        self._asyncSocketsPool._callInLoop(self._startSSL, sslContext, server_side, timeoutSec)
+
+    # ------------------------------------------------------------------------
+
+    def StartSSLContext(self, sslContext, serverSide=False, timeoutSec=None) :
+        if not isinstance(sslContext, ssl.SSLContext) :
+            raise XAsyncTCPClientException('StartSSLContext : "sslContext" is incorrect.')
+        if self._isSSL or self._sslHandshaking :
+            raise XAsyncTCPClientException('StartSSLContext : SSL already started.')
+        if self._rdStart != self._rdEnd :
+            raise XAsyncTCPClientException('StartSSLContext : Data already received before SSL.')
+        self._asyncSocketsPool._callInLoop(self._startSSL, sslContext, serverSide, timeoutSec)
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def SrvAddr(self) :
+        return self._srvAddr
+
+    @property
+    def CliAddr(self) :
+        return self._cliAddr
+
+    @property
+    def IsSSL(self) :
+        return self._isSSL
+
+    @property
+    def IsSSLHandshaking(self) :
+        return self._sslHandshaking
+
+    @property
+    def SendingBuffer(self) :
+        if self._sendBufSlot is None and self._lazyBufSlots :
+            self._sendBufSlot = self._bufSlots.GetAvailableSlot()
+        if self._sendBufSlot is None :
+            return None
+        return self._sendBufSlot.Buffer
+
+    @property
+    def OnFailsToConnect(self) :
+        return self._onFailsToConnect
+    @OnFailsToConnect.setter
+    def OnFailsToConnect(self, value) :
+        self._onFailsToConnect = value
+
+    @property
+    def OnConnected(self) :
+        return self._onConnected
+    @OnConnected.setter
+    def OnConnected(self, value) :
+        self._onConnected = value
+
+    @property
+    def OnSSLHandshaked(self) :
+        return self._onSSLHandshaked
+    @OnSSLHandshaked.setter
+    def OnSSLHandshaked(self, value) :
+        self._onSSLHandshaked = value
+
+# ============================================================================
+# ===( XAsyncUDPDatagram )====================================================
+# ============================================================================
+
+class XAsyncUDPDatagram(XAsyncSocket, asyncio.DatagramProtocol) :
+
+    __slots__ = ( '_drainBudget',
+                  '_recvCount',
+                  '_drainMax',
+                  '_reading',
+                  '_pendingDgrams',
+                  '_sendingDgram',
+                  '_onFailsToSend',
+                  '_onDataRecv' )
+
+    DEFAULT_DRAIN_BUDGET = 64
+
+    @staticmethod
+    def Create( asyncSocketsPool,
+                localAddr      = None,
+                recvBufLen     = 4096,
+                broadcast      = False,
+                reusePort      = False,
+                sockRecvBufLen = None,
+                drainBudget    = 1 ) :
+        if type(drainBudget) is not int or drainBudget <= 0 :
+            raise XAsyncUDPDatagramException('Create : "drainBudget" is incorrect.')
+        try :
+            udpSocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        except :
+            raise XAsyncUDPDatagramException('Create : Cannot open socket (no enought memory).')
+        if broadcast :
+            udpSocket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        if reusePort and not hasattr(socket, 'SO_REUSEPORT') :
+            raise XAsyncUDPDatagramException('Create : SO_REUSEPORT is not supported on this system.')
+        if sockRecvBufLen :
+            try :
+                udpSocket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, sockRecvBufLen)
+            except :
+                raise XAsyncUDPDatagramException('Create : Cannot set the socket receive buffer size.')
+        openRecv = (localAddr is not None)
+        if openRecv :
+            try :
+                udpSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                if reusePort :
+                    udpSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+                udpSocket.bind(localAddr)
+            except :
+                raise XAsyncUDPDatagramException('Create : Error to binding the UDP Datagram local address.')
+        xAsyncUDPDatagram = XAsyncUDPDatagram(asyncSocketsPool, udpSocket, None, drainBudget)
+        if openRecv :
+            asyncSocketsPool.NotifyNextReadyForReading(xAsyncUDPDatagram, True)
+        return xAsyncUDPDatagram
+
+    # ------------------------------------------------------------------------
+
+    def __init__(self, asyncSocketsPool, udpSocket, recvBufSlot, drainBudget=1) :
+        try :
+            super().__init__(asyncSocketsPool, udpSocket, recvBufSlot, None)
+            # Datagrams are received one by one by asyncio, the drain budget is not applied,
+            self._drainBudget   = drainBudget
+            self._recvCount     = 0
+            self._drainMax      = 0
+            self._reading       = False
+            self._pendingDgrams = [ ]
+            self._sendingDgram  = None
+            self._onFailsToSend = None
+            self._onDataRecv    = None
+        except :
+            raise XAsyncUDPDatagramException('Error to creating XAsyncUDPDatagram, arguments are incorrects.')
+        asyncSocketsPool._startTask(self._open())
+
+    # ------------------------------------------------------------------------
+
+    async def _open(self) :
+        try :
+            await self._asyncSocketsPool._loop.create_datagram_endpoint(lambda : self, sock=self._socket)
+        except :
+            self._close()
+
+    # ------------------------------------------------------------------------
+
+    def connection_made(self, transport) :
+        self._transport = transport
+        self._setReadInterest(self._reading)
+        pendingDgrams       = self._pendingDgrams
+        self._pendingDgrams = [ ]
+        for args in pendingDgrams :
+            self._sendDatagram(*args)
+
+    # ------------------------------------------------------------------------
+
+    def _setReadInterest(self, notify) :
+        self._reading = notify
+        if self._transport and self._isOpened() :
+            if notify :
+                self._transport.resume_reading()
+            else :
+                self._transport.pause_reading()
+
+    # ------------------------------------------------------------------------
+
+    def datagram_received(self, data, addr) :
+        self._recvCount += 1
+        self._drainMax   = 1
+        if self._onDataRecv :
+            try :
+                self._callOnDataRecv(addr, memoryview(data))
+            except Exception as ex :
+                raise XAsyncUDPDatagramException('Error when handling the "OnDataRecv" event : %s' % ex)
+
+    # ------------------------------------------------------------------------
+
+    def error_received(self, exc) :
+        if self._sendingDgram and self._onFailsToSend :
+            datagram, remoteAddr = self._sendingDgram
+            try :
+                self._onFailsToSend(self, datagram, remoteAddr)
+            except Exception as ex :
+                raise XAsyncUDPDatagramException('Error when handling the "OnFailsToSend" event : %s' % ex)
+
+    # ------------------------------------------------------------------------
+
+    def _sendDatagram(self, datagram, remoteAddr, onDataSent, onDataSentArg) :
+        if not self._isOpened() :
+            return False
+        if self._transport is None :
+            self._pendingDgrams.append((datagram, remoteAddr, onDataSent, onDataSentArg))
+            return True
+        self._sendingDgram = (datagram, remoteAddr)
+        self._transport.sendto(datagram, remoteAddr)
+        self._sendingDgram = None
+        if onDataSent :
+            try :
+                onDataSent(self, onDataSentArg)
+            except Exception as ex :
+                raise XAsyncUDPDatagramException('Error when handling the "OnDataSent" event : %s' % ex)
+        return True
+
+    # ------------------------------------------------------------------------
+
+    def AsyncSendDatagram(self, datagram, remoteAddr, onDataSent=None, onDataSentArg=None) :
+        if self._isOpened() :
+            try :
+                if bytes([datagram[0]]) and len(remoteAddr) == 2 :
+                    return self._asyncSocketsPool._callInLoop( self._sendDatagram,
+                                                               bytes(datagram),
+                                                               remoteAddr,
+                                                               onDataSent,
+                                                               onDataSentArg )
+            except :
+                pass
+            raise XAsyncUDPDatagramException('AsyncSendDatagram : Arguments are incorrects.')
+        return False
+
+    # ------------------------------------------------------------------------
+
+    def GetSockRecvBufLen(self) :
+        try :
+            return self._socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        except :
+            return None
+
+    # ------------------------------------------------------------------------
+
+    def GetKernelDropsCount(self) :
+        # Returns the datagrams dropped by the kernel from /proc/net/udp on Linux, None otherwise,
+        try :
+            inode = str(fstat(self._socket.fileno()).st_ino)
+            for filename in '/proc/net/udp', '/proc/net/udp6' :
+                with open(filename, 'r') as file :
+                    file.readline()
+                    for line in file :
+                        fields = line.split()
+                        if fields[9] == inode :
+                            return int(fields[-1])
+        except :
+            pass
+        return None
+
+    # ------------------------------------------------------------------------
+
+    @property
+    def LocalAddr(self) :
+        try :
+            return self._socket.getsockname()
+        except :
+            return ('0.0.0.0', 0)
+
+    @property
+    def DrainBudget(self) :
+        return self._drainBudget
+
+    @property
+    def RecvCount(self) :
+        return self._recvCount
+
+    @property
+    def DrainMax(self) :
+        return self._drainMax
+
+    @property
+    def OnDataRecv(self) :
+        return self._onDataRecv
+    @OnDataRecv.setter
+    def OnDataRecv(self, value) :
+        self._onDataRecv = value
+
+    @property
+    def OnFailsToSend(self) :
+        return self._onFailsToSend
+    @OnFailsToSend.setter
+    def OnFailsToSend(self, value) :
+        self._onFailsToSend = value
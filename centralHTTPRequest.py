@@ -12,7 +12,25 @@ import json
 
 class CentralHTTPRequest :
 
-    RECV_TIMEOUT = 2
+    __slots__ = ( '_xasTCPCli',
+                  '_router',
+                  '_maxContentLength',
+                  '_maxSecWaitResponse',
+                  '_method',
+                  '_httpVer',
+                  '_resPath',
+                  '_queryString',
+                  '_headers',
+                  '_contentType',
+                  '_contentLength',
+                  '_trackingNbr',
+                  '_path' )
+
+    RECV_TIMEOUT  = 2
+    RES_LOCATIONS = {
+        "/acl"     : ( 'POST', '_processPOSTACL'     ),
+        "/request" : ( 'POST', '_processPOSTRequest' )
+    }
 
     def __init__(self, xAsyncTCPClient, router, sslContext, maxContentLength, maxSecWaitResponse) :
         self._xasTCPCli          = xAsyncTCPClient
@@ -27,10 +45,6 @@ class CentralHTTPRequest :
         self._contentType        = None
         self._contentLength      = 0
         self._trackingNbr        = None
-        self._resLocations       = {
-            "/acl"     : ( 'POST', self._processPOSTACL     ),
-            "/request" : ( 'POST', self._processPOSTRequest )
-        }
         try :
             self._xasTCPCli.StartSSLContext(sslContext, True)
         except :
@@ -88,26 +102,24 @@ class CentralHTTPRequest :
             self.Close()
 
     def _onContentRecv(self, xAsyncTCPClient, data, arg) :
-        content   = arg[0] + bytes(data)
-        remaining = arg[1] - len(data)
-        if remaining > 0 :
-            self._recv(None, self._onContentRecv, (content, remaining))
-        else :
-            self._resLocations[self._resPath][1](content)
+        self._processResLocation(bytes(data))
+
+    def _processResLocation(self, content) :
+        getattr(self, self.RES_LOCATIONS[self._resPath][1])(content)
 
     def _onAllHeadersReaded(self) :
         if self._checkAuthentication() :
             self._resPath = self._resPath.lower()
-            if self._resPath in self._resLocations :
-                if self._method == self._resLocations[self._resPath][0] :
+            if self._resPath in self.RES_LOCATIONS :
+                if self._method == self.RES_LOCATIONS[self._resPath][0] :
                     if self._contentLength :
                         if self._contentLength <= self._maxContentLength :
-                            self._recv(None, self._onContentRecv, (b'', self._contentLength))
+                            self._recv(self._contentLength, self._onContentRecv)
                         else :
                             self._logRefused('REQUEST ENTITY TOO LARGE')
                             self._sendHTTPResponse(413, '413 : Request Entity Too Large')
                     else :
-                        self._resLocations[self._resPath][1](None)
+                        self._processResLocation(None)
                 else :
                     self._logRefused('METHOD NOT ALLOWED')
                     self._sendHTTPResponse(405, '405 : Method Not Allowed')
@@ -4,7 +4,6 @@ Copyright © 2018 Jean-Christophe Bos & HC² (www.hc2.fr)
 """
 
 
-from   XAsyncSockets   import XAsyncTCPClient
 from   iotSocketStruct import IoTSocketStruct
 import json
 
@@ -23,11 +22,11 @@ class CentralHTTPWebHook :
         self._onResponseOk       = None
         self._onClosed           = None
         try :
-            self._xasTCPCli = XAsyncTCPClient.Create( asyncSocketsPool = pool,
-                                                      srvAddr          = (url.Host, url.Port),
-                                                      connectTimeout   = CentralHTTPWebHook.CONN_TIMEOUT,
-                                                      recvbufLen       = httpBufferSize,
-                                                      connectAsync     = False )
+            self._xasTCPCli = pool.TCPClient.Create( asyncSocketsPool = pool,
+                                                     srvAddr          = (url.Host, url.Port),
+                                                     connectTimeout   = CentralHTTPWebHook.CONN_TIMEOUT,
+                                                     recvBufLen       = httpBufferSize,
+                                                     connectAsync     = False )
         except :
             self._xasTCPCli = None
         if not self._xasTCPCli :
@@ -52,10 +51,10 @@ class CentralHTTPWebHook :
         self._xasTCPCli.AsyncRecvData(size, onDataRecv, onDataRecvArg, self.RECV_TIMEOUT)
 
     def _recvLine(self, onDataRecv, onDataRecvArg=None) :
-        self._xasTCPCli.AsyncRecvLine(onDataRecv, onDataRecvArg, self.RECV_TIMEOUT)
+        self._xasTCPCli.AsyncRecvLine('UTF-8', onDataRecv, onDataRecvArg, self.RECV_TIMEOUT)
 
     def _recvResponseFirstLine(self, onDataRecv, onDataRecvArg=None) :
-        self._xasTCPCli.AsyncRecvLine(onDataRecv, onDataRecvArg, self._maxSecWaitResponse)
+        self._xasTCPCli.AsyncRecvLine('UTF-8', onDataRecv, onDataRecvArg, self._maxSecWaitResponse)
 
     def _onTCPConnClosed(self, xAsyncTCPClient, closedReason) :
         if self._onClosed :
@@ -103,23 +102,18 @@ class CentralHTTPWebHook :
             self.Close()
 
     def _onContentRecv(self, xAsyncTCPClient, data, arg) :
-        content   = arg[0] + data.tobytes()
-        remaining = arg[1] - len(data)
-        if remaining > 0 :
-            self._recv(None, self._onContentRecv, (content, remaining))
-        else :
-            if self._onResponseOk :
-                try :
-                    o = json.loads(content.decode('UTF-8'))
-                except :
-                    o = None
-                self._onResponseOk(self, o)
-            self.Close()
+        if self._onResponseOk :
+            try :
+                o = json.loads(data.tobytes().decode('UTF-8'))
+            except :
+                o = None
+            self._onResponseOk(self, o)
+        self.Close()
 
     def _onAllHeadersReaded(self) :
         if self._contentLength :
             if self._contentLength <= self._maxContentLength :
-                self._recv(None, self._onContentRecv, (b'', self._contentLength))
+                self._recv(self._contentLength, self._onContentRecv)
             else :
                 self.Close()
         else :
@@ -4,40 +4,63 @@ Copyright © 2018 Jean-Christophe Bos & HC² (www.hc2.fr)
 """
 
 
-from   XAsyncSockets      import XAsyncSocketsPool,    \
-                                 XAsyncTCPServer,      \
-                                 XBufferSlots,         \
-                                 XAsyncUDPDatagram
-
-from   iotSocketStruct    import IoTSocketStruct
-from   iotSocketRouter    import IoTSocketRouter
-from   iotSocketSession   import IoTSocketSession
-from   centralHTTPRequest import CentralHTTPRequest
-from   centralHTTPWebHook import CentralHTTPWebHook
-from   urlUtils           import UrlUtils
-
-from   config             import Config
-from   binascii           import unhexlify
-from   os                 import path
-from   time               import sleep
-
-import ssl
+from   XAsyncSockets         import XAsyncSocketsPool,    \
+                                     XAsyncTCPServer,      \
+                                     XBufferSlots,         \
+                                     XAsyncUDPDatagram
+from   XAsyncioSockets       import XAsyncSocketsPool as XAsyncioSocketsPool
+
+from   iotSocketStruct       import IoTSocketStruct
+from   iotSocketRouter       import IoTSocketRouter
+from   iotSocketKeptQueue    import IoTSocketKeptQueue
+from   iotSocketRoutingPlane import IoTSocketRoutingPlane
+from   iotSocketSession      import IoTSocketSession
+from   iotSocketAdmission    import IoTSocketAdmission
+from   centralHTTPRequest    import CentralHTTPRequest
+from   centralHTTPWebHook    import CentralHTTPWebHook
+from   sslSessionContext     import SSLSessionContext
+from   urlUtils              import UrlUtils
+
+from   config                import Config
+from   binascii              import unhexlify
+from   secrets               import token_bytes
+from   os                    import path
+from   time                  import sleep, time
+
+import signal
+import os
 
 ACL_FILENAME = 'acl.json'
 
+POOL_BACKENDS = { 'XAsyncSockets' : XAsyncSocketsPool,
+                  'asyncio'       : XAsyncioSocketsPool }
+
 def OnTCPSrvClientAccepted(xAsyncTCPServer, xAsyncTCPClient) :
+    xAsyncTCPClient.OnSSLHandshaked = OnTCPSrvClientSSLHandshaked
     IoTSocketSession( xAsyncTCPClient = xAsyncTCPClient,
                       router          = router,
-                      sslContext      = tcpSSLContext,
-                      reqTimeout      = tcpReqTimeoutSec )
+                      sslContext      = tcpSSLContext.GetContext(),
+                      reqTimeout      = tcpReqTimeoutSec,
+                      admission       = tcpAdmission )
+
+def OnTCPSrvClientSSLHandshaked(xAsyncTCPClient) :
+    tcpSSLContext.CountHandshake(xAsyncTCPClient)
+    tcpAdmission.EndTLSHandshake(xAsyncTCPClient)
+
+def OnTCPSrvClientRefused(xAsyncTCPServer, cliSocket) :
+    try :
+        cliSocket.send(IoTSocketStruct.MakeCloseConnTR(IoTSocketStruct.CLOSE_CODE_MAX_LOAD))
+    except :
+        pass
 
 def OnTCPSrvClosed(xAsyncTCPServer, closedReason) :
     pass
  
 def OnHTTPSrvClientAccepted(xAsyncTCPServer, xAsyncTCPClient) :
+    xAsyncTCPClient.OnSSLHandshaked = httpSSLContext.CountHandshake
     CentralHTTPRequest( xAsyncTCPClient    = xAsyncTCPClient,
                         router             = router,
-                        sslContext         = httpSSLContext,
+                        sslContext         = httpSSLContext.GetContext(),
                         maxContentLength   = httpMaxContentLength,
                         maxSecWaitResponse = httpMaxSecWaitResponse )
 
@@ -45,8 +68,11 @@ def OnHTTPSrvClosed(xAsyncTCPServer, closedReason) :
     pass
 
 def OnUDPSrvDataRecv(xAsyncUDPDatagram, remoteAddr, datagram) :
-    token, dataFormat, formatOpt, data = IoTSocketStruct.DecodeTelemetryPacket(datagram.tobytes())
-    router.RouteTelemetry(token, dataFormat, formatOpt, data)
+    router.RouteTelemetryPacket(datagram)
+
+def OnPoolSlowCallback(xLoopStats, className, eventName, socketID, sec) :
+    router.Log( 'LOOP > SLOW CALLBACK %s.%s ON SOCKET %s (%.1f MS)' %
+                (className, eventName, socketID, sec * 1000) )
 
 def OnRouterGetWebHookRequest(iotSocketRouter) :
     try :
@@ -68,10 +94,11 @@ def OnRouterGetWebHookTelemetry(iotSocketRouter) :
     except :
         return None
 
-def Start() :
+def Start(workerIndex=0, workersCount=1, workersAuthKey=None) :
 
     global cfg
     global tcpSSLContext
+    global tcpAdmission
     global tcpReqTimeoutSec
     global httpSSLContext
     global httpMaxContentLength
@@ -81,14 +108,16 @@ def Start() :
     global httpBindAddr
     global xasHTTPSrv
     global udpBindAddr
-    global xasUDPSrv
+    global xasUDPSrvs
     global webHookRequestUrl
     global webHookTelemetryUrl
     global webHookHTTPBufferSize
     global webHookMaxContentLength
     global webHookMaxSecWaitResponse
     global router
+    global routingPlane
     global xasPool
+    global statsLogIntervalSec
 
     cfg = Config('config')
     if cfg.isEmpty() :
@@ -108,10 +137,18 @@ def Start() :
     if type(tcpSlotsSize) is not int or tcpSlotsSize <= 0 :
         print("Error when reading 'TCPServer.SlotsSize' in configuration.")
         return False
+    tcpLazySlots = cfg.get('TCPServer.LazyBufferSlots', False)
+    if type(tcpLazySlots) is not bool :
+        print("Error when reading 'TCPServer.LazyBufferSlots' in configuration.")
+        return False
     tcpBacklog = cfg.get('TCPServer.Backlog')
     if type(tcpBacklog) is not int or tcpBacklog <= 0 :
         print("Error when reading 'TCPServer.Backlog' in configuration.")
         return False
+    tcpAcceptBatchSize = cfg.get('TCPServer.AcceptBatchSize', XAsyncTCPServer.DEFAULT_ACCEPT_BATCH_SIZE)
+    if type(tcpAcceptBatchSize) is not int or tcpAcceptBatchSize <= 0 :
+        print("Error when reading 'TCPServer.AcceptBatchSize' in configuration.")
+        return False
     tcpSSLKeyFilename = cfg.get('TCPServer.SSLKeyFilename')
     if type(tcpSSLKeyFilename) is not str :
         print("Error when reading 'TCPServer.SSLKeyFilename' in configuration.")
@@ -120,15 +157,45 @@ def Start() :
     if type(tcpSSLCrtFilename) is not str :
         print("Error when reading 'TCPServer.SSLCrtFilename' in configuration.")
         return False
+    tcpSSLTicketLifetimeSec = cfg.get('TCPServer.SSLTicketLifetimeSec', SSLSessionContext.DEFAULT_TICKET_LIFETIME_SEC)
+    if type(tcpSSLTicketLifetimeSec) is not int or tcpSSLTicketLifetimeSec <= 0 :
+        print("Error when reading 'TCPServer.SSLTicketLifetimeSec' in configuration.")
+        return False
+    tcpSSLTicketsCount = cfg.get('TCPServer.SSLTicketsCount', SSLSessionContext.DEFAULT_TICKETS_COUNT)
+    if type(tcpSSLTicketsCount) is not int or tcpSSLTicketsCount < 0 :
+        print("Error when reading 'TCPServer.SSLTicketsCount' in configuration.")
+        return False
     tcpReqTimeoutSec = cfg.get('TCPServer.ReqTimeoutSec')
     if type(tcpReqTimeoutSec) is not int or tcpReqTimeoutSec <= 0 :
         print("Error when reading 'TCPServer.ReqTimeoutSec' in configuration.")
         return False
+    tcpAcceptRatePerSec = cfg.get('TCPServer.AcceptRatePerSec', 0)
+    if type(tcpAcceptRatePerSec) not in (int, float) or tcpAcceptRatePerSec < 0 :
+        print("Error when reading 'TCPServer.AcceptRatePerSec' in configuration.")
+        return False
+    tcpAcceptBurst = cfg.get('TCPServer.AcceptBurst', 0)
+    if type(tcpAcceptBurst) is not int or tcpAcceptBurst < 0 :
+        print("Error when reading 'TCPServer.AcceptBurst' in configuration.")
+        return False
+    tcpMaxTLSHandshakes = cfg.get('TCPServer.MaxTLSHandshakes', 0)
+    if type(tcpMaxTLSHandshakes) is not int or tcpMaxTLSHandshakes < 0 :
+        print("Error when reading 'TCPServer.MaxTLSHandshakes' in configuration.")
+        return False
+    tcpMaxPendingAuths = cfg.get('TCPServer.MaxPendingAuths', 0)
+    if type(tcpMaxPendingAuths) is not int or tcpMaxPendingAuths < 0 :
+        print("Error when reading 'TCPServer.MaxPendingAuths' in configuration.")
+        return False
+
+    tcpAdmission = IoTSocketAdmission( acceptRatePerSec = tcpAcceptRatePerSec,
+                                       acceptBurst      = tcpAcceptBurst,
+                                       maxTLSHandshakes = tcpMaxTLSHandshakes,
+                                       maxPendingAuths  = tcpMaxPendingAuths )
 
     try :
-        tcpSSLContext = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
-        tcpSSLContext.load_cert_chain( certfile = tcpSSLCrtFilename,
-                                       keyfile  = tcpSSLKeyFilename )
+        tcpSSLContext = SSLSessionContext( certFilename      = tcpSSLCrtFilename,
+                                           keyFilename       = tcpSSLKeyFilename,
+                                           ticketLifetimeSec = tcpSSLTicketLifetimeSec,
+                                           ticketsCount      = tcpSSLTicketsCount )
     except :
         print("SSL certificate initialization error for TCP server (check configuration).")
         return False
@@ -146,10 +213,18 @@ def Start() :
     if type(httpSlotsSize) is not int or httpSlotsSize <= 0 :
         print("Error when reading 'HTTPServer.SlotsSize' in configuration.")
         return False
+    httpLazySlots = cfg.get('HTTPServer.LazyBufferSlots', False)
+    if type(httpLazySlots) is not bool :
+        print("Error when reading 'HTTPServer.LazyBufferSlots' in configuration.")
+        return False
     httpBacklog = cfg.get('HTTPServer.Backlog')
     if type(httpBacklog) is not int or httpBacklog <= 0 :
         print("Error when reading 'HTTPServer.Backlog' in configuration.")
         return False
+    httpAcceptBatchSize = cfg.get('HTTPServer.AcceptBatchSize', XAsyncTCPServer.DEFAULT_ACCEPT_BATCH_SIZE)
+    if type(httpAcceptBatchSize) is not int or httpAcceptBatchSize <= 0 :
+        print("Error when reading 'HTTPServer.AcceptBatchSize' in configuration.")
+        return False
     httpSSLKeyFilename = cfg.get('HTTPServer.SSLKeyFilename')
     if type(httpSSLKeyFilename) is not str :
         print("Error when reading 'HTTPServer.SSLKeyFilename' in configuration.")
@@ -158,6 +233,14 @@ def Start() :
     if type(httpSSLCrtFilename) is not str :
         print("Error when reading 'HTTPServer.SSLCrtFilename' in configuration.")
         return False
+    httpSSLTicketLifetimeSec = cfg.get('HTTPServer.SSLTicketLifetimeSec', SSLSessionContext.DEFAULT_TICKET_LIFETIME_SEC)
+    if type(httpSSLTicketLifetimeSec) is not int or httpSSLTicketLifetimeSec <= 0 :
+        print("Error when reading 'HTTPServer.SSLTicketLifetimeSec' in configuration.")
+        return False
+    httpSSLTicketsCount = cfg.get('HTTPServer.SSLTicketsCount', SSLSessionContext.DEFAULT_TICKETS_COUNT)
+    if type(httpSSLTicketsCount) is not int or httpSSLTicketsCount < 0 :
+        print("Error when reading 'HTTPServer.SSLTicketsCount' in configuration.")
+        return False
     httpMaxContentLength = cfg.get('HTTPServer.MaxContentLength')
     if type(httpMaxContentLength) is not int or httpMaxContentLength <= 0 :
         print("Error when reading 'HTTPServer.MaxContentLength' in configuration.")
@@ -168,9 +251,10 @@ def Start() :
         return False
 
     try :
-        httpSSLContext = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
-        httpSSLContext.load_cert_chain( certfile = httpSSLCrtFilename,
-                                        keyfile  = httpSSLKeyFilename )
+        httpSSLContext = SSLSessionContext( certFilename      = httpSSLCrtFilename,
+                                            keyFilename       = httpSSLKeyFilename,
+                                            ticketLifetimeSec = httpSSLTicketLifetimeSec,
+                                            ticketsCount      = httpSSLTicketsCount )
     except :
         print("SSL certificate initialization error for HTTP server (check configuration).")
         return False
@@ -184,17 +268,85 @@ def Start() :
     if type(udpDatagramMaxSize) is not int or udpDatagramMaxSize <= 0 :
         print("Error when reading 'UDPServer.DatagramMaxSize' in configuration.")
         return False
+    udpSocketsCount = cfg.get('UDPServer.SocketsCount', 1)
+    if type(udpSocketsCount) is not int or udpSocketsCount <= 0 :
+        print("Error when reading 'UDPServer.SocketsCount' in configuration.")
+        return False
+    udpSockRecvBufSize = cfg.get('UDPServer.SockRecvBufferSize', 0)
+    if type(udpSockRecvBufSize) is not int or udpSockRecvBufSize < 0 :
+        print("Error when reading 'UDPServer.SockRecvBufferSize' in configuration.")
+        return False
+    udpDrainBudget = cfg.get('UDPServer.DrainBudget', XAsyncUDPDatagram.DEFAULT_DRAIN_BUDGET)
+    if type(udpDrainBudget) is not int or udpDrainBudget <= 0 :
+        print("Error when reading 'UDPServer.DrainBudget' in configuration.")
+        return False
 
     poolThreadsCount = cfg.get('PoolThreadsCount')
     if type(poolThreadsCount) is not int or poolThreadsCount <= 0 :
         print("Error when reading 'PoolThreadsCount' in configuration.")
         return False
+    poolPollerType = cfg.get('PoolPollerType', XAsyncSocketsPool.POLLER_AUTO)
+    if poolPollerType not in XAsyncSocketsPool.GetPollerTypes() :
+        print("Error when reading 'PoolPollerType' in configuration.")
+        return False
+    poolShardedLoops = cfg.get('PoolShardedLoops', False)
+    if type(poolShardedLoops) is not bool :
+        print("Error when reading 'PoolShardedLoops' in configuration.")
+        return False
+    poolBackend = cfg.get('PoolBackend', 'XAsyncSockets')
+    if poolBackend not in POOL_BACKENDS :
+        print("Error when reading 'PoolBackend' in configuration.")
+        return False
+    if poolShardedLoops and poolBackend == 'asyncio' :
+        print("'PoolShardedLoops' is not supported by the asyncio backend (check configuration).")
+        return False
+    poolStats = cfg.get('PoolStats', False)
+    if type(poolStats) is not bool :
+        print("Error when reading 'PoolStats' in configuration.")
+        return False
+    poolSlowCallbackMs = cfg.get('PoolSlowCallbackMs', 100)
+    if type(poolSlowCallbackMs) is not int or poolSlowCallbackMs < 0 :
+        print("Error when reading 'PoolSlowCallbackMs' in configuration.")
+        return False
+
+    statsLogIntervalSec = cfg.get('StatsLogIntervalSec', 0)
+    if type(statsLogIntervalSec) is not int or statsLogIntervalSec < 0 :
+        print("Error when reading 'StatsLogIntervalSec' in configuration.")
+        return False
 
     keepSessionSec = cfg.get('KeepSessionSec')
     if type(keepSessionSec) is not int or keepSessionSec <= 0 :
         print("Error when reading 'KeepSessionSec' in configuration.")
         return False
 
+    keepSessionMaxMemSize = cfg.get('KeepSessionMaxMemSize', IoTSocketRouter.DEFAULT_KEPT_MAX_MEM_SIZE)
+    if type(keepSessionMaxMemSize) is not int or keepSessionMaxMemSize <= 0 :
+        print("Error when reading 'KeepSessionMaxMemSize' in configuration.")
+        return False
+    keepSessionMaxSize = cfg.get('KeepSessionMaxSize', IoTSocketRouter.DEFAULT_KEPT_MAX_SIZE)
+    if type(keepSessionMaxSize) is not int or keepSessionMaxSize <= 0 :
+        print("Error when reading 'KeepSessionMaxSize' in configuration.")
+        return False
+    keepSessionSpillDir = cfg.get('KeepSessionSpillDir', None)
+    if keepSessionSpillDir is not None :
+        if type(keepSessionSpillDir) is not str or not keepSessionSpillDir :
+            print("Error when reading 'KeepSessionSpillDir' in configuration.")
+            return False
+        try :
+            IoTSocketKeptQueue.OpenSpillDir(keepSessionSpillDir)
+        except Exception as ex :
+            print("Error to open the spill directory '%s' (%s)." % (keepSessionSpillDir, ex))
+            return False
+    keepSessionOverflow = cfg.get('KeepSessionOverflow', IoTSocketKeptQueue.OVERFLOW_DROP_NEWEST)
+    if keepSessionOverflow not in IoTSocketKeptQueue.OVERFLOWS :
+        print("Error when reading 'KeepSessionOverflow' in configuration.")
+        return False
+
+    routerShardsCount = cfg.get('RouterShardsCount', IoTSocketRouter.DEFAULT_SHARDS_COUNT)
+    if type(routerShardsCount) is not int or routerShardsCount <= 0 :
+        print("Error when reading 'RouterShardsCount' in configuration.")
+        return False
+
     try :
         centralAuthKey = unhexlify(cfg.get('Central.AuthKey'))
     except :
@@ -232,11 +384,42 @@ def Start() :
         print("Error when reading 'Central.WebHooks.MaxSecWaitResponse' in configuration.")
         return False
 
-    xasPool = XAsyncSocketsPool()
+    try :
+        xasPool = POOL_BACKENDS[poolBackend]( pollerType = poolPollerType,
+                                              loopsCount = poolThreadsCount if poolShardedLoops else 1 )
+    except :
+        print("Poller '%s' is not supported on this system (check configuration)." % poolPollerType)
+        return False
+    if poolStats :
+        xasPool.EnableStats(poolSlowCallbackMs / 1000).OnSlowCallback = OnPoolSlowCallback
+
+    reusePort = (workersCount > 1)
+    if reusePort :
+        workersIPCPath = cfg.get('WorkersIPCPath')
+        if type(workersIPCPath) is not str or not workersIPCPath :
+            print("Error when reading 'WorkersIPCPath' in configuration.")
+            return False
+        try :
+            routingPlane = IoTSocketRoutingPlane( pool         = xasPool,
+                                                  workerIndex  = workerIndex,
+                                                  workersCount = workersCount,
+                                                  ipcPath      = workersIPCPath,
+                                                  authKey      = workersAuthKey )
+        except Exception as ex :
+            print("Error to open the routing plane of worker %s in '%s' (%s)." % (workerIndex, workersIPCPath, ex))
+            return False
+    else :
+        routingPlane = None
 
     router  = IoTSocketRouter( aclFilename    = ACL_FILENAME,
                                centralAuthKey = centralAuthKey,
-                               keepSessionSec = keepSessionSec )
+                               keepSessionSec = keepSessionSec,
+                               routingPlane   = routingPlane,
+                               shardsCount    = routerShardsCount,
+                               keptMaxMemSize = keepSessionMaxMemSize,
+                               keptMaxSize    = keepSessionMaxSize,
+                               keptSpillDir   = keepSessionSpillDir,
+                               keptOverflow   = keepSessionOverflow )
 
     if webHookRequestUrl :
         router.OnGetWebHookRequest = OnRouterGetWebHookRequest
@@ -262,11 +445,15 @@ def Start() :
 
     try :
         tcpBindAddr = (tcpSrvAddr, tcpSrvPort)
-        xasTCPSrv   = XAsyncTCPServer.Create( asyncSocketsPool = xasPool,
-                                              srvAddr          = tcpBindAddr,
-                                              srvBacklog       = tcpBacklog,
-                                              bufSlots         = tcpSrvBufSlots )
+        xasTCPSrv   = xasPool.TCPServer.Create( asyncSocketsPool = xasPool,
+                                                srvAddr          = tcpBindAddr,
+                                                srvBacklog       = tcpBacklog,
+                                                bufSlots         = tcpSrvBufSlots,
+                                                reusePort        = reusePort,
+                                                lazyBufSlots     = tcpLazySlots,
+                                                acceptBatchSize  = tcpAcceptBatchSize )
         xasTCPSrv.OnClientAccepted = OnTCPSrvClientAccepted
+        xasTCPSrv.OnClientRefused  = OnTCPSrvClientRefused
         xasTCPSrv.OnClosed         = OnTCPSrvClosed
     except :
         print("Error to bind TCP server on '%s:%s'." % tcpBindAddr)
@@ -278,10 +465,13 @@ def Start() :
 
     try :
         httpBindAddr = (httpSrvAddr, httpSrvPort)
-        xasHTTPSrv   = XAsyncTCPServer.Create( asyncSocketsPool = xasPool,
-                                               srvAddr          = httpBindAddr,
-                                               srvBacklog       = httpBacklog,
-                                               bufSlots         = httpSrvBufSlots )
+        xasHTTPSrv   = xasPool.TCPServer.Create( asyncSocketsPool = xasPool,
+                                                 srvAddr          = httpBindAddr,
+                                                 srvBacklog       = httpBacklog,
+                                                 bufSlots         = httpSrvBufSlots,
+                                                 reusePort        = reusePort,
+                                                 lazyBufSlots     = httpLazySlots,
+                                                 acceptBatchSize  = httpAcceptBatchSize )
         xasHTTPSrv.OnClientAccepted = OnHTTPSrvClientAccepted
         xasHTTPSrv.OnClosed         = OnHTTPSrvClosed
     except :
@@ -289,11 +479,18 @@ def Start() :
         return False
 
     try :
+        # Consecutive sockets are pinned to consecutive event loops,
         udpBindAddr = (udpSrvAddr, udpSrvPort)
-        xasUDPSrv   = XAsyncUDPDatagram.Create( asyncSocketsPool = xasPool,
-                                                localAddr        = udpBindAddr,
-                                                recvBufLen       = udpDatagramMaxSize )
-        xasUDPSrv.OnDataRecv = OnUDPSrvDataRecv
+        xasUDPSrvs  = [ ]
+        for i in range(udpSocketsCount) :
+            xasUDPSrv = xasPool.UDPDatagram.Create( asyncSocketsPool = xasPool,
+                                                    localAddr        = udpBindAddr,
+                                                    recvBufLen       = udpDatagramMaxSize,
+                                                    reusePort        = reusePort or udpSocketsCount > 1,
+                                                    sockRecvBufLen   = udpSockRecvBufSize,
+                                                    drainBudget      = udpDrainBudget )
+            xasUDPSrv.OnDataRecv = OnUDPSrvDataRecv
+            xasUDPSrvs.append(xasUDPSrv)
     except Exception as ex :
         print(ex)
         print("Error to bind UDP server on '%s:%s'." % udpBindAddr)
@@ -303,15 +500,115 @@ def Start() :
 
     return True
 
-print()
-if Start() :
+def LogServerStats(name, xasSrv, sslContext, lastStats, intervalSec) :
+    accepted  = xasSrv.AcceptedCount
+    queueInfo = xasSrv.GetListenQueueInfo()
+    queue     = ('%s/%s' % queueInfo) if queueInfo else 'N/A'
+    bufSlots  = xasSrv.BufSlots
+    router.Log( 'STATS %s > ACCEPTED %s (%.1f/S), REFUSED %s, MAX BATCH %s, QUEUE %s' %
+                ( name,
+                  accepted,
+                  (accepted - lastStats.get('Accepted', 0)) / intervalSec,
+                  xasSrv.RefusedCount,
+                  xasSrv.AcceptBatchMax,
+                  queue ) )
+    router.Log( 'STATS %s > SLOTS %s/%s (PEAK %s, FAILURES %s), TLS RESUMED %s/%s' %
+                ( name,
+                  bufSlots.InUseCount,
+                  bufSlots.SlotsCount,
+                  bufSlots.PeakInUseCount,
+                  bufSlots.AllocFailuresCount,
+                  sslContext.HitsCount,
+                  sslContext.HitsCount + sslContext.MissesCount ) )
+    lastStats['Accepted'] = accepted
+
+def LogStats(lastStats, intervalSec) :
+    LogServerStats('TCP',  xasTCPSrv,  tcpSSLContext,  lastStats.setdefault('TCP',  { }), intervalSec)
+    router.Log( 'STATS TCP > ADMITTED %s, TLS HANDSHAKES %s, PENDING AUTHS %s, REFUSED %s/%s/%s (RATE/TLS/AUTH)' %
+                ( tcpAdmission.AdmittedCount,
+                  tcpAdmission.TLSHandshakesCount,
+                  tcpAdmission.PendingAuthsCount,
+                  tcpAdmission.RateRefusedCount,
+                  tcpAdmission.TLSRefusedCount,
+                  tcpAdmission.AuthRefusedCount ) )
+    LogServerStats('HTTP', xasHTTPSrv, httpSSLContext, lastStats.setdefault('HTTP', { }), intervalSec)
+    udpStats = lastStats.setdefault('UDP', { })
+    received = sum(xasUDPSrv.RecvCount for xasUDPSrv in xasUDPSrvs)
+    drops    = [xasUDPSrv.GetKernelDropsCount() for xasUDPSrv in xasUDPSrvs]
+    router.Log( 'STATS UDP > RECEIVED %s (%.1f/S), MAX DRAIN %s, KERNEL DROPS %s, SOCKETS %s (RCVBUF %s)' %
+                ( received,
+                  (received - udpStats.get('Received', 0)) / intervalSec,
+                  max(xasUDPSrv.DrainMax for xasUDPSrv in xasUDPSrvs),
+                  sum(drops) if None not in drops else 'N/A',
+                  len(xasUDPSrvs),
+                  xasUDPSrvs[0].GetSockRecvBufLen() ) )
+    udpStats['Received'] = received
+    sessionsCount, sessionSize = router.GetSessionsMemorySize()
+    router.Log( 'STATS MEMORY > SESSIONS %s (%s B EACH, %.1f MB), TCP SLOTS %.1f MB, HTTP SLOTS %.1f MB' %
+                ( sessionsCount,
+                  sessionSize,
+                  sessionsCount * sessionSize / 1048576,
+                  xasTCPSrv.BufSlots.GetMemorySize() / 1048576,
+                  xasHTTPSrv.BufSlots.GetMemorySize() / 1048576 ) )
+    if routingPlane :
+        router.Log( 'STATS ROUTING PLANE > SEND DROPS %s, REJECTED %s' %
+                    ( routingPlane.SendDropsCount,
+                      routingPlane.RejectedCount ) )
+    keptStats = router.GetKeptDataStats()
+    router.Log( 'STATS KEPT DATA > QUEUES %s, ITEMS %s, MEMORY %.1f MB, SPILL %.1f MB, SPILLED %s, DROPPED %s (%.1f MB), REPLAYED %s, EXPIRED %s' %
+                ( keptStats['QueuesCount'],
+                  keptStats['Count'],
+                  keptStats['MemSize'] / 1048576,
+                  keptStats['SpillSize'] / 1048576,
+                  keptStats['SpilledCount'],
+                  keptStats['DroppedCount'],
+                  keptStats['DroppedSize'] / 1048576,
+                  keptStats['ReplayedCount'],
+                  keptStats['ExpiredCount'] ) )
+    # Each router lock is logged as contended/acquired counts and the time spent waiting for it,
+    locksStats = router.GetLocksStats()
+    router.Log( 'STATS ROUTER LOCKS > %s' %
+                ', '.join( '%s %s/%s (%.1f MS)' % (name, contended, acquired, waitSec * 1000)
+                           for name, (acquired, contended, waitSec) in locksStats.items() ) )
+    if xasPool.Stats :
+        LogPoolStats(xasPool.Stats)
+
+def LogPoolStats(xLoopStats) :
+    # Histograms count the values up to each bound (0.1/1/10/100/1000 ms and 0/1/4/16/64 events) then above,
+    wakeups = xLoopStats.WakeupsCount
+    router.Log( 'STATS LOOP > WAKEUPS %s, POLL WAIT %.2f MS (MAX %.1f MS), EVENTS/WAKEUP %.1f (MAX %s, HISTO %s), SLOW CALLBACKS %s' %
+                ( wakeups,
+                  xLoopStats.PollWaitSec * 1000 / wakeups if wakeups else 0,
+                  xLoopStats.PollWaitMax * 1000,
+                  xLoopStats.EventsCount / wakeups if wakeups else 0,
+                  xLoopStats.EventsMax,
+                  '/'.join(str(x) for x in xLoopStats.EventsHistogram),
+                  xLoopStats.SlowCallbacksCount ) )
+    callbacksStats = xLoopStats.GetCallbacksStats()
+    for className, eventName in sorted(callbacksStats) :
+        count, totalSec, maxSec, histo = callbacksStats[(className, eventName)]
+        router.Log( 'STATS LOOP > %s.%s : CALLS %s, AVG %.3f MS, MAX %.3f MS, HISTO %s' %
+                    ( className,
+                      eventName,
+                      count,
+                      totalSec * 1000 / count,
+                      maxSec * 1000,
+                      '/'.join(str(x) for x in histo) ) )
+    xLoopStats.Reset()
+
+def Run() :
     print()
     print("IOTSOCKET CONCENTRATOR STARTED")
     print()
     try :
-        aclFileTime = path.getmtime(ACL_FILENAME)
+        aclFileTime   = path.getmtime(ACL_FILENAME)
+        lastStats     = { }
+        nextStatsTime = time() + statsLogIntervalSec
         while True :
             sleep(1)
+            if statsLogIntervalSec and time() >= nextStatsTime :
+                nextStatsTime += statsLogIntervalSec
+                LogStats(lastStats, statsLogIntervalSec)
             t = path.getmtime(ACL_FILENAME)
             if t != aclFileTime :
                 aclFileTime = t
@@ -325,3 +622,65 @@ if Start() :
         print()
         router.Stop()
         xasPool.StopWaitEvents()
+
+def StartWorker(workerIndex, workersCount, workersAuthKey) :
+    pid = os.fork()
+    if pid == 0 :
+        exitCode = 1
+        try :
+            if Start(workerIndex, workersCount, workersAuthKey) :
+                Run()
+                exitCode = 0
+        except KeyboardInterrupt :
+            exitCode = 0
+        finally :
+            os._exit(exitCode)
+    return pid
+
+WORKERS_STOP_TIMEOUT_SEC = 3
+
+def Supervise(workersCount) :
+    # Workers authenticate the routing plane messages with a key shared only by the supervisor,
+    workersAuthKey = token_bytes(32)
+    workers        = { }
+    for workerIndex in range(workersCount) :
+        workers[StartWorker(workerIndex, workersCount, workersAuthKey)] = workerIndex
+    print("IOTSOCKET CONCENTRATOR SUPERVISOR STARTED WITH %s WORKERS" % workersCount)
+    try :
+        while workers :
+            pid, status = os.wait()
+            workerIndex = workers.pop(pid, None)
+            if workerIndex is None :
+                continue
+            exitCode = os.waitstatus_to_exitcode(status)
+            if exitCode == 1 :
+                print("ERROR: WORKER %s CANNOT START, STOPPING ALL WORKERS..." % workerIndex)
+                raise KeyboardInterrupt()
+            if exitCode != 0 :
+                print("WARNING: WORKER %s ENDED (%s), RESTARTING..." % (workerIndex, exitCode))
+                sleep(1)
+                workers[StartWorker(workerIndex, workersCount, workersAuthKey)] = workerIndex
+    except KeyboardInterrupt :
+        # Workers receive the same interrupt from the terminal,
+        endTime = time() + WORKERS_STOP_TIMEOUT_SEC
+        while workers and time() < endTime :
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid :
+                workers.pop(pid, None)
+            else :
+                sleep(0.1)
+        for pid in workers :
+            os.kill(pid, signal.SIGTERM)
+        print("IOTSOCKET CONCENTRATOR SUPERVISOR ENDED")
+
+print()
+workersCount = Config('config').get('WorkersCount', 1)
+if type(workersCount) is not int or workersCount <= 0 :
+    print("Error when reading 'WorkersCount' in configuration.")
+elif workersCount > 1 :
+    if hasattr(os, 'fork') :
+        Supervise(workersCount)
+    else :
+        print("Multi-process workers are not supported on this system (check 'WorkersCount').")
+elif Start() :
+    Run()
@@ -0,0 +1,93 @@
+"""
+The MIT License (MIT)
+Copyright © 2018 Jean-Christophe Bos & HC² (www.hc2.fr)
+"""
+
+
+from   _thread import allocate_lock
+from   time    import time
+
+class IoTSocketAdmission :
+
+    def __init__(self, acceptRatePerSec=0, acceptBurst=0, maxTLSHandshakes=0, maxPendingAuths=0) :
+        self._acceptRatePerSec = acceptRatePerSec
+        self._acceptBurst      = max(acceptBurst, acceptRatePerSec, 1)
+        self._maxTLSHandshakes = maxTLSHandshakes
+        self._maxPendingAuths  = maxPendingAuths
+        self._lock             = allocate_lock()
+        self._tokens           = self._acceptBurst
+        self._tokensTime       = time()
+        self._handshakes       = set()
+        self._pendingAuths     = set()
+        self._admittedCount    = 0
+        self._rateRefusedCount = 0
+        self._tlsRefusedCount  = 0
+        self._authRefusedCount = 0
+
+    def _takeToken(self) :
+        # Token bucket refilled at the accept rate, up to the burst size,
+        now              = time()
+        self._tokens     = min( self._acceptBurst,
+                                self._tokens + (now - self._tokensTime) * self._acceptRatePerSec )
+        self._tokensTime = now
+        if self._tokens >= 1 :
+            self._tokens -= 1
+            return True
+        return False
+
+    def Admit(self, xAsyncTCPClient) :
+        with self._lock :
+            if self._acceptRatePerSec and not self._takeToken() :
+                self._rateRefusedCount += 1
+                return False
+            if self._maxPendingAuths and len(self._pendingAuths) >= self._maxPendingAuths :
+                self._authRefusedCount += 1
+                return False
+            self._pendingAuths.add(xAsyncTCPClient)
+            self._admittedCount += 1
+        return True
+
+    def BeginTLSHandshake(self, xAsyncTCPClient) :
+        with self._lock :
+            if self._maxTLSHandshakes and len(self._handshakes) >= self._maxTLSHandshakes :
+                self._tlsRefusedCount += 1
+                return False
+            self._handshakes.add(xAsyncTCPClient)
+        return True
+
+    def EndTLSHandshake(self, xAsyncTCPClient) :
+        with self._lock :
+            self._handshakes.discard(xAsyncTCPClient)
+
+    def EndAuth(self, xAsyncTCPClient) :
+        with self._lock :
+            self._pendingAuths.discard(xAsyncTCPClient)
+
+    def Release(self, xAsyncTCPClient) :
+        with self._lock :
+            self._handshakes.discard(xAsyncTCPClient)
+            self._pendingAuths.discard(xAsyncTCPClient)
+
+    @property
+    def TLSHandshakesCount(self) :
+        return len(self._handshakes)
+
+    @property
+    def PendingAuthsCount(self) :
+        return len(self._pendingAuths)
+
+    @property
+    def AdmittedCount(self) :
+        return self._admittedCount
+
+    @property
+    def RateRefusedCount(self) :
+        return self._rateRefusedCount
+
+    @property
+    def TLSRefusedCount(self) :
+        return self._tlsRefusedCount
+
+    @property
+    def AuthRefusedCount(self) :
+        return self._authRefusedCount
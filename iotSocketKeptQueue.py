@@ -0,0 +1,204 @@
+"""
+The MIT License (MIT)
+Copyright © 2018 Jean-Christophe Bos & HC² (www.hc2.fr)
+"""
+
+
+from   tempfile    import TemporaryFile
+from   mmap        import mmap, ACCESS_READ
+from   struct      import pack, unpack
+from   collections import deque
+from   os          import pread, makedirs, lstat, getuid
+import stat
+
+class IoTSocketKeptQueueException(Exception) :
+    pass
+
+class IoTSocketKeptQueue :
+
+    OVERFLOW_DROP_NEWEST = 'DropNewest'
+    OVERFLOW_DROP_OLDEST = 'DropOldest'
+
+    OVERFLOWS = ( OVERFLOW_DROP_NEWEST,
+                  OVERFLOW_DROP_OLDEST )
+
+    SPILL_HDR_SIZE = 4
+    SPILL_DIR_MODE = 0o700
+
+    __slots__ = ( '_maxMemSize',
+                  '_maxSize',
+                  '_spillDir',
+                  '_overflow',
+                  '_items',
+                  '_memSize',
+                  '_spillFile',
+                  '_spillPos',
+                  '_spillSize',
+                  '_spillCount',
+                  '_spilledCount',
+                  '_droppedCount',
+                  '_droppedSize' )
+
+    def __init__(self, maxMemSize, maxSize, spillDir=None, overflow=OVERFLOW_DROP_NEWEST) :
+        self._maxMemSize   = maxMemSize
+        # Without spill directory, the memory is the only storage,
+        self._maxSize      = maxSize if spillDir else min(maxSize, maxMemSize)
+        self._spillDir     = spillDir
+        self._overflow     = overflow
+        self._items        = deque()
+        self._memSize      = 0
+        self._spillFile    = None
+        self._spillPos     = 0
+        self._spillSize    = 0
+        self._spillCount   = 0
+        self._spilledCount = 0
+        self._droppedCount = 0
+        self._droppedSize  = 0
+
+    @staticmethod
+    def OpenSpillDir(spillDir) :
+        # The directory must be private to this user, the kept data of the
+        # sessions are written there,
+        try :
+            makedirs(spillDir, mode=IoTSocketKeptQueue.SPILL_DIR_MODE, exist_ok=True)
+            st = lstat(spillDir)
+        except Exception as ex :
+            raise IoTSocketKeptQueueException('Cannot create "%s" (%s).' % (spillDir, ex))
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != getuid() :
+            raise IoTSocketKeptQueueException('"%s" is not a directory owned by this user.' % spillDir)
+        if st.st_mode & 0o077 :
+            raise IoTSocketKeptQueueException('"%s" must not be accessible by group or others.' % spillDir)
+
+    def _dropOldest(self) :
+        if self._items :
+            size           = len(self._items.popleft())
+            self._memSize -= size
+        elif self._spillCount :
+            hdr               = pread(self._spillFile.fileno(), self.SPILL_HDR_SIZE, self._spillPos)
+            size              = unpack('>I', hdr)[0]
+            self._spillPos   += self.SPILL_HDR_SIZE + size
+            self._spillSize  -= self.SPILL_HDR_SIZE + size
+            self._spillCount -= 1
+            self._resetSpillIfRead()
+        else :
+            return False
+        self._droppedCount += 1
+        self._droppedSize  += size
+        return True
+
+    def _resetSpillIfRead(self) :
+        # The file is emptied once all its data have been read to not grow forever,
+        if not self._spillCount :
+            self._spillFile.seek(0)
+            self._spillFile.truncate()
+            self._spillPos = 0
+
+    def _dropNewest(self, size) :
+        self._droppedCount += 1
+        self._droppedSize  += size
+        return False
+
+    def _spill(self, data) :
+        # Once spilled, all next data go to the file to keep the order,
+        if not self._spillFile :
+            self._spillFile = TemporaryFile(dir=self._spillDir, buffering=0)
+        self._spillFile.write(pack('>I', len(data)) + data)
+        self._spillSize    += self.SPILL_HDR_SIZE + len(data)
+        self._spillCount   += 1
+        self._spilledCount += 1
+
+    def Append(self, data) :
+        size = len(data)
+        if size > self._maxSize :
+            return self._dropNewest(size)
+        while self.Size + size > self._maxSize :
+            if self._overflow != self.OVERFLOW_DROP_OLDEST or not self._dropOldest() :
+                return self._dropNewest(size)
+        if self._spillFile or self._memSize + size > self._maxMemSize :
+            try :
+                self._spill(data)
+            except :
+                return self._dropNewest(size)
+        else :
+            self._items.append(data)
+            self._memSize += size
+        return True
+
+    def PopBatch(self, maxSize) :
+        # Pops the oldest data in order up to about maxSize bytes, the spilled
+        # ones are read from the mapped file, the queue can still be appended,
+        batch     = [ ]
+        batchSize = 0
+        while self._items and batchSize < maxSize :
+            data           = self._items.popleft()
+            self._memSize -= len(data)
+            batchSize     += len(data)
+            batch.append(data)
+        if self._spillCount and batchSize < maxSize :
+            with mmap(self._spillFile.fileno(), 0, access=ACCESS_READ) as mm :
+                while self._spillCount and batchSize < maxSize :
+                    pos               = self._spillPos + self.SPILL_HDR_SIZE
+                    size              = unpack('>I', mm[self._spillPos:pos])[0]
+                    self._spillPos    = pos + size
+                    self._spillSize  -= self.SPILL_HDR_SIZE + size
+                    self._spillCount -= 1
+                    batchSize        += size
+                    batch.append(mm[pos:pos+size])
+            self._resetSpillIfRead()
+        return batch
+
+    def RestoreBatch(self, batch) :
+        # Puts back in front the end of a batch popped but not delivered,
+        # memory is always before the spill file so the order is kept,
+        for data in reversed(batch) :
+            self._items.appendleft(data)
+            self._memSize += len(data)
+
+    def DropAll(self, batch=( )) :
+        # Counts as dropped the data still queued and the given batch popped but not delivered,
+        for data in batch :
+            self._droppedCount += 1
+            self._droppedSize  += len(data)
+        while self._dropOldest() :
+            pass
+
+    def Close(self) :
+        self._items.clear()
+        self._memSize    = 0
+        self._spillSize  = 0
+        self._spillCount = 0
+        if self._spillFile :
+            # The temporary file is removed from the disk when closed,
+            self._spillFile.close()
+            self._spillFile = None
+
+    def __bool__(self) :
+        return bool(self._items or self._spillCount)
+
+    @property
+    def Count(self) :
+        return len(self._items) + self._spillCount
+
+    @property
+    def Size(self) :
+        return self._memSize + self._spillSize
+
+    @property
+    def MemSize(self) :
+        return self._memSize
+
+    @property
+    def SpillSize(self) :
+        return self._spillSize
+
+    @property
+    def SpilledCount(self) :
+        return self._spilledCount
+
+    @property
+    def DroppedCount(self) :
+        return self._droppedCount
+
+    @property
+    def DroppedSize(self) :
+        return self._droppedSize
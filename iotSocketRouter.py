@@ -4,73 +4,270 @@ Copyright © 2018 Jean-Christophe Bos & HC² (www.hc2.fr)
 """
 
 
-from   iotSocketStruct import IoTSocketStruct
-from   secrets         import randbelow, token_bytes
-from   _thread         import allocate_lock
-from   binascii        import hexlify, unhexlify
-from   threading       import Timer
-from   time            import time
-from   datetime        import datetime
+from   iotSocketStruct       import IoTSocketStruct
+from   iotSocketRoutingPlane import IoTSocketRoutingPlane
+from   iotSocketScheduler    import IoTSocketScheduler
+from   iotSocketKeptQueue    import IoTSocketKeptQueue
+from   secrets               import randbelow, token_bytes
+from   _thread               import allocate_lock
+from   binascii              import hexlify, unhexlify
+from   time                  import time, perf_counter
+from   datetime              import datetime
 import hmac
 import hashlib
 import json
 
+class IoTSocketRouterLock :
+
+    __slots__ = ( '_lock',
+                  '_acquiredCount',
+                  '_contendedCount',
+                  '_waitSec' )
+
+    def __init__(self) :
+        self._lock           = allocate_lock()
+        self._acquiredCount  = 0
+        self._contendedCount = 0
+        self._waitSec        = 0.0
+
+    def __enter__(self) :
+        if not self._lock.acquire(False) :
+            t = perf_counter()
+            self._lock.acquire()
+            self._contendedCount += 1
+            self._waitSec        += perf_counter() - t
+        # Counters are only updated while the lock is held,
+        self._acquiredCount += 1
+        return self
+
+    def __exit__(self, excType, excValue, traceback) :
+        self._lock.release()
+
+    def GetStats(self) :
+        return (self._acquiredCount, self._contendedCount, self._waitSec)
+
+class IoTSocketRouterShard :
+
+    __slots__ = ( '_lock',
+                  '_sessions',
+                  '_keptData',
+                  '_replays',
+                  '_forwards',
+                  '_remoteSessions' )
+
+    def __init__(self) :
+        self._lock           = IoTSocketRouterLock()
+        self._sessions       = { }
+        self._keptData       = { }
+        self._replays        = { }
+        self._forwards       = { }
+        self._remoteSessions = { }
+
+    @property
+    def Lock(self) :
+        return self._lock
+
+    @property
+    def Sessions(self) :
+        return self._sessions
+
+    @property
+    def KeptData(self) :
+        return self._keptData
+
+    @property
+    def Replays(self) :
+        return self._replays
+
+    @property
+    def Forwards(self) :
+        return self._forwards
+
+    @property
+    def RemoteSessions(self) :
+        return self._remoteSessions
+
 class IoTSocketRouter :
 
-    def __init__(self, aclFilename, centralAuthKey, keepSessionSec) :
+    DEFAULT_SHARDS_COUNT      = 16
+    DEFAULT_KEPT_MAX_MEM_SIZE = 1048576
+    DEFAULT_KEPT_MAX_SIZE     = 67108864
+    KEPT_REPLAY_BATCH_SIZE    = 65536
+    KEPT_FORWARD_RETRY_SEC    = 0.05
+    KEPT_FORWARD_MAX_RETRIES  = 100
+
+    def __init__( self, aclFilename, centralAuthKey, keepSessionSec, routingPlane=None,
+                  shardsCount=DEFAULT_SHARDS_COUNT,
+                  keptMaxMemSize=DEFAULT_KEPT_MAX_MEM_SIZE,
+                  keptMaxSize=DEFAULT_KEPT_MAX_SIZE,
+                  keptSpillDir=None,
+                  keptOverflow=IoTSocketKeptQueue.OVERFLOW_DROP_NEWEST ) :
         self._aclFilename           = aclFilename
         self._centralAuthKey        = centralAuthKey
         self._centralAuthKeyHex     = hexlify(centralAuthKey).decode()
         self._keepSessionSec        = keepSessionSec
+        self._keptQueueArgs         = (keptMaxMemSize, keptMaxSize, keptSpillDir, keptOverflow)
+        self._keptStats             = { 'SpilledCount'  : 0,
+                                        'DroppedCount'  : 0,
+                                        'DroppedSize'   : 0,
+                                        'ReplayedCount' : 0,
+                                        'ExpiredCount'  : 0 }
         self._centralSession        = None
         self._groups                = { }
         self._acl                   = { }
-        self._objectsSessions       = { }
-        self._keepSessionsData      = { }
+        self._shards                = [IoTSocketRouterShard() for i in range(shardsCount)]
+        self._centralShard          = self._getShard(IoTSocketStruct.CENTRAL_EMPTY_UID)
         self._centralHTTPRequests   = { }
         self._telemetryTokens       = { }
+        self._telemetryTRPrefixes   = { }
+        self._routingPlane          = routingPlane
         self._onGetWebHookRequest   = None
         self._onGetWebHookTelemetry = None
-        self._lock                  = allocate_lock()
-        self._processing            = True
-        self._startTimerCheck()
+        self._aclLock               = IoTSocketRouterLock()
+        self._httpRequestsLock      = IoTSocketRouterLock()
+        self._telemetryTokensLock   = IoTSocketRouterLock()
+        self._keptStatsLock         = IoTSocketRouterLock()
+        self._scheduler             = IoTSocketScheduler()
+        if routingPlane :
+            routingPlane.OnMessage = self._onRoutingPlaneMessage
+            routingPlane.Broadcast(IoTSocketRoutingPlane.MSG_HELLO)
         self.Log('ROUTER > STARTED')
 
-    def _startTimerCheck(self) :
-        Timer(1, self._timerCheckSeconds).start()
-
-    def _timerCheckSeconds(self) :
-        nowSec = time()
-        with self._lock :
-            if self._keepSessionsData :
-                for uid in list(self._keepSessionsData) :
-                    if nowSec >= self._keepSessionsData[uid][1] :
-                        del self._keepSessionsData[uid]
-            if self._centralHTTPRequests :
-                for trackingNbr in list(self._centralHTTPRequests) :
-                    httpReq, exp = self._centralHTTPRequests[trackingNbr]
-                    if exp and nowSec >= exp :
-                        del self._centralHTTPRequests[trackingNbr]
-                        httpReq.SendResponseErrTimeout()
-                        self.Log('HTTPS REQUEST TIMEOUT (#%s)' % trackingNbr)
-            if self._telemetryTokens :
-                for token in list(self._telemetryTokens) :
-                    uid, exp = self._telemetryTokens[token]
-                    if exp and nowSec >= exp :
-                        del self._telemetryTokens[token]
-                        self.Log( 'TELEMETRY TOKEN EXPIRED (%s)' %
-                                  self.TelemetryTokenToStr(token) )
-        for uid in self._objectsSessions :
-            self._objectsSessions[uid].CheckRequestsTimeout(nowSec)
-        if self._processing :
-            self._startTimerCheck()
+    def _getShard(self, uid) :
+        # Each UID is always owned by the same shard, whose lock guards its sessions data,
+        return self._shards[hash(uid) % len(self._shards)]
+
+    def _expireKeptSessionData(self, uid, exp) :
+        shard = self._getShard(uid)
+        with shard.Lock :
+            keptQueue, keptExp = shard.KeptData.get(uid, (None, None))
+            if keptExp == exp :
+                del shard.KeptData[uid]
+            else :
+                keptQueue = None
+        if keptQueue is not None :
+            self._closeKeptQueue(keptQueue, expiredCount=keptQueue.Count)
+
+    def _closeKeptQueue(self, keptQueue, replayedCount=0, expiredCount=0) :
+        with self._keptStatsLock :
+            self._keptStats['SpilledCount']  += keptQueue.SpilledCount
+            self._keptStats['DroppedCount']  += keptQueue.DroppedCount
+            self._keptStats['DroppedSize']   += keptQueue.DroppedSize
+            self._keptStats['ReplayedCount'] += replayedCount
+            self._keptStats['ExpiredCount']  += expiredCount
+        keptQueue.Close()
+
+    def _replayKeptQueue(self, session, keptQueue, replayedCount=0) :
+        # Sends the kept data by batches, each one once the previous is sent,
+        # data routed to the session meanwhile are queued behind them,
+        shard = self._getShard(session.UID)
+        with shard.Lock :
+            if shard.Replays.get(session.UID, None) != (session, keptQueue) :
+                # The replay has been given up by the session removal,
+                return
+            batch = keptQueue.PopBatch(self.KEPT_REPLAY_BATCH_SIZE)
+            if not batch :
+                del shard.Replays[session.UID]
+        if batch :
+            arg = (session, keptQueue, replayedCount + len(batch))
+            if session.SendParts(batch, self._onKeptBatchSent, arg) :
+                return
+            with shard.Lock :
+                if shard.Replays.get(session.UID, None) == (session, keptQueue) :
+                    del shard.Replays[session.UID]
+                keptQueue.DropAll(batch)
+        self._closeKeptQueue(keptQueue, replayedCount=replayedCount)
+
+    def _onKeptBatchSent(self, xAsyncTCPClient, arg) :
+        self._replayKeptQueue(*arg)
+
+    def _forwardKeptQueue(self, uid, worker, keptQueue, forwardedCount=0, retriesCount=0) :
+        # Sends the kept data to the worker of the session by batches, one per
+        # scheduler turn, data routed to the session meanwhile are queued behind them,
+        shard = self._getShard(uid)
+        with shard.Lock :
+            if shard.Forwards.get(uid, None) != (worker, keptQueue) :
+                # The forward has been taken over with its queue,
+                with self._keptStatsLock :
+                    self._keptStats['ReplayedCount'] += forwardedCount
+                return
+            batch     = keptQueue.PopBatch(self.KEPT_REPLAY_BATCH_SIZE)
+            sentCount = 0
+            for data in batch :
+                if not self._routingPlane.Send( worker,
+                                                IoTSocketRoutingPlane.MSG_ROUTE_DATA,
+                                                (uid, data, None) ) :
+                    break
+                sentCount += 1
+            # Data not sent go back in front, the worker may just be full for now,
+            keptQueue.RestoreBatch(batch[sentCount:])
+            retriesCount = 0 if sentCount else retriesCount + 1
+            givenUp      = (retriesCount > self.KEPT_FORWARD_MAX_RETRIES)
+            if givenUp :
+                keptQueue.DropAll()
+            if not keptQueue :
+                del shard.Forwards[uid]
+        forwardedCount += sentCount
+        if keptQueue :
+            delaySec = 0 if sentCount == len(batch) else self.KEPT_FORWARD_RETRY_SEC
+            self._scheduler.Add( time() + delaySec, self._forwardKeptQueue,
+                                 uid, worker, keptQueue, forwardedCount, retriesCount )
+            return
+        if givenUp :
+            self.Log('ROUTER > KEPT DATA FORWARD TO WORKER %s GIVEN UP' % worker)
+        self._closeKeptQueue(keptQueue, replayedCount=forwardedCount)
+
+    def _sendToSession(self, session, *dataParts) :
+        # While the kept data of the session are replayed, data are queued behind them,
+        shard = self._getShard(session.UID)
+        if session.UID in shard.Replays :
+            with shard.Lock :
+                replay = shard.Replays.get(session.UID, None)
+                if replay :
+                    return replay[1].Append(b''.join(dataParts))
+        if len(dataParts) == 1 :
+            return session.Send(dataParts[0])
+        return session.SendParts(dataParts)
+
+    def _expireCentralHTTPRequest(self, trackingNbr, httpReq) :
+        with self._httpRequestsLock :
+            expired = (self._centralHTTPRequests.get(trackingNbr, (None, None))[0] is httpReq)
+            if expired :
+                del self._centralHTTPRequests[trackingNbr]
+        if expired :
+            httpReq.SendResponseErrTimeout()
+            self.Log('HTTPS REQUEST TIMEOUT (#%s)' % trackingNbr)
+
+    def _expireTelemetryToken(self, token, exp) :
+        with self._telemetryTokensLock :
+            uid, tokenExp = self._telemetryTokens.get(token, (None, None))
+            expired       = (tokenExp == exp)
+            if expired :
+                del self._telemetryTokens[token]
+                # The session may be in another worker and never removed here,
+                self._telemetryTRPrefixes.pop(uid, None)
+        if expired :
+            self.Log( 'TELEMETRY TOKEN EXPIRED (%s)' %
+                      self.TelemetryTokenToStr(token) )
+
+    def _expireRemoteSession(self, uid, exp) :
+        shard = self._getShard(uid)
+        with shard.Lock :
+            if shard.RemoteSessions.get(uid, (None, None))[1] == exp :
+                del shard.RemoteSessions[uid]
+
+    def AddRequestTimeout(self, session, trackingNbr, exp) :
+        self._scheduler.Add(exp, session.ExpireRequest, trackingNbr, exp)
 
     def Stop(self) :
-        self._processing = False
+        self._scheduler.Stop()
 
     def Log(self, line) :
         dt = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-        print('[%s] %s' % (dt, str(line)))
+        if self._routingPlane :
+            print('[%s] [W%s] %s' % (dt, self._routingPlane.WorkerIndex, str(line)))
+        else :
+            print('[%s] %s' % (dt, str(line)))
 
     def AddGroup(self, groupName, options={ }) :
         if groupName and type(options) is dict :
@@ -87,11 +284,13 @@ class IoTSocketRouter :
         return None
 
     def ClearACL(self) :
-        with self._lock :
-            self._acl.clear()
+        # Readers never lock the ACL, it is replaced as a whole and only
+        # single entries are written in place,
+        with self._aclLock :
+            self._acl = { }
 
     def AddACLAccess(self, groupID, uid, authKey) :
-        with self._lock :
+        with self._aclLock :
             if groupID in self._groups :
                 self._acl[uid] = (groupID, authKey)
                 return True
@@ -100,14 +299,17 @@ class IoTSocketRouter :
     def SaveACL(self) :
         try :
             o = { }
-            with self._lock :
-                for uid in self._acl :
-                    o[IoTSocketStruct.UIDFromBin128(uid)] = {
-                        "GroupName" : IoTSocketStruct.GroupNameFromBin128(self._acl[uid][0]),
-                        "AuthKey"   : hexlify(self._acl[uid][1]).decode()
-                    }
+            with self._aclLock :
+                acl = dict(self._acl)
+            for uid in acl :
+                o[IoTSocketStruct.UIDFromBin128(uid)] = {
+                    "GroupName" : IoTSocketStruct.GroupNameFromBin128(acl[uid][0]),
+                    "AuthKey"   : hexlify(acl[uid][1]).decode()
+                }
             with open(self._aclFilename, 'wb') as file :
                 file.write(json.dumps(o).encode('UTF-8'))
+            if self._routingPlane :
+                self._routingPlane.Broadcast(IoTSocketRoutingPlane.MSG_ACL_CHANGED)
             return True
         except :
             return False
@@ -125,7 +327,7 @@ class IoTSocketRouter :
                    not groupID in self._groups :
                     return False
                 acl[uid] = (groupID, authKey)
-            with self._lock :
+            with self._aclLock :
                 self._acl = acl
             return True
         except :
@@ -147,63 +349,171 @@ class IoTSocketRouter :
         if authKey :
             hmac256srv = hmac.new(authKey, token128, hashlib.sha256).digest()
             if hmac.compare_digest(hmac256, hmac256srv) :
-                if central :
-                    if self._centralSession :
-                        self._centralSession.Close()
-                    self._centralSession = session
-                else :
-                    existingSession = self._objectsSessions.get(session.UID, None)
-                    if existingSession :
-                        existingSession.Close()
-                    self._objectsSessions[session.UID] = session
                 session.Send(IoTSocketStruct.MakeAuthValidation(True))
-                with self._lock :
-                    sessionData, exp = self._keepSessionsData.get(session.UID, (None, None))
-                    if sessionData is not None :
-                        for data in sessionData :
-                            session.Send(data)
-                        del self._keepSessionsData[session.UID]
+                shard = self._getShard(session.UID)
+                with shard.Lock :
+                    keptQueue, exp = shard.KeptData.pop(session.UID, (None, None))
+                    replay         = shard.Replays.get(session.UID, None)
+                    forward        = shard.Forwards.pop(session.UID, None)
+                    if replay :
+                        # Takes over the replay of the session replaced,
+                        keptQueue = replay[1]
+                    elif forward :
+                        # The session comes back before its data left to another worker,
+                        keptQueue = forward[1]
+                    if keptQueue :
+                        # Set before the session is published to queue the data routed to it,
+                        shard.Replays[session.UID] = (session, keptQueue)
+                    elif replay :
+                        del shard.Replays[session.UID]
+                    shard.RemoteSessions.pop(session.UID, None)
+                    if central :
+                        existingSession      = self._centralSession
+                        self._centralSession = session
+                    else :
+                        existingSession             = shard.Sessions.get(session.UID, None)
+                        shard.Sessions[session.UID] = session
+                # Closed out of the lock because its removal takes it again,
+                if existingSession :
+                    existingSession.Close()
+                if keptQueue :
+                    self._replayKeptQueue(session, keptQueue)
+                elif keptQueue is not None :
+                    self._closeKeptQueue(keptQueue)
+                if self._routingPlane :
+                    # Other workers close their session for this UID and
+                    # send back the data they kept for it,
+                    self._routingPlane.Broadcast( IoTSocketRoutingPlane.MSG_SESSION_STARTED,
+                                                  (session.UID, ) )
                 return True
         session.Send(IoTSocketStruct.MakeAuthValidation(False))
         session.Close()
         return False
 
     def RemoveSession(self, session, keepSessionData) :
-        with self._lock :
+        shard = self._getShard(session.UID)
+        with shard.Lock :
             removed = False
+            exp     = None
             if session.UID == IoTSocketStruct.CENTRAL_EMPTY_UID :
                 if session == self._centralSession :
                     self._centralSession = None
                     removed              = True
-            elif session.UID in self._objectsSessions :
-                if session == self._objectsSessions[session.UID] :
-                    del self._objectsSessions[session.UID]
+            elif session.UID in shard.Sessions :
+                if session == shard.Sessions[session.UID] :
+                    del shard.Sessions[session.UID]
                     removed = True
-            if removed and keepSessionData :
-                exp = time() + self._keepSessionSec
-                self._keepSessionsData[session.UID] = ([ ], exp)
+            # The session is now opened in another worker,
+            takenOver = ( session.UID in shard.RemoteSessions and \
+                          shard.RemoteSessions[session.UID][1] is None )
+            # Data not replayed yet to the session go back to be kept,
+            replayQueue = None
+            if removed :
+                replayQueue = shard.Replays.pop(session.UID, (None, None))[1]
+            if removed and keepSessionData and not takenOver :
+                exp       = time() + self._keepSessionSec
+                keptQueue = shard.KeptData.get(session.UID, (None, None))[0]
+                if keptQueue is None :
+                    if replayQueue is not None :
+                        keptQueue, replayQueue = replayQueue, None
+                    else :
+                        keptQueue = IoTSocketKeptQueue(*self._keptQueueArgs)
+                shard.KeptData[session.UID] = (keptQueue, exp)
+                self._scheduler.Add(exp, self._expireKeptSessionData, session.UID, exp)
+            if replayQueue is not None :
+                replayQueue.DropAll()
+        if replayQueue is not None :
+            self._closeKeptQueue(replayQueue)
+        if removed :
+            self._telemetryTRPrefixes.pop(session.UID, None)
+        if removed and self._routingPlane and not takenOver :
+            self._routingPlane.Broadcast( IoTSocketRoutingPlane.MSG_SESSION_REMOVED,
+                                          (session.UID, exp) )
+
+    def GetSessionsMemorySize(self, maxSamples=1000) :
+        # Returns the sessions count and their mean size measured on a sample,
+        sessions = [ ]
+        for shard in self._shards :
+            with shard.Lock :
+                sessions.extend(shard.Sessions.values())
+        if self._centralSession :
+            sessions.append(self._centralSession)
+        if not sessions :
+            return (0, 0)
+        step = max(1, len(sessions) // maxSamples)
+        sizes = [session.GetMemorySize() for session in sessions[::step]]
+        return (len(sessions), sum(sizes) // len(sizes))
+
+    def GetKeptDataStats(self) :
+        stats = { 'QueuesCount' : 0,
+                  'Count'       : 0,
+                  'MemSize'     : 0,
+                  'SpillSize'   : 0 }
+        dropped = [ ]
+        for shard in self._shards :
+            with shard.Lock :
+                keptQueues = [ keptQueue for keptQueue, exp in shard.KeptData.values() ] \
+                           + [ keptQueue for session, keptQueue in shard.Replays.values() ] \
+                           + [ keptQueue for worker,  keptQueue in shard.Forwards.values() ]
+                for keptQueue in keptQueues :
+                    stats['QueuesCount'] += 1
+                    stats['Count']       += keptQueue.Count
+                    stats['MemSize']     += keptQueue.MemSize
+                    stats['SpillSize']   += keptQueue.SpillSize
+                    dropped.append( (keptQueue.SpilledCount, keptQueue.DroppedCount, keptQueue.DroppedSize) )
+        with self._keptStatsLock :
+            stats.update(self._keptStats)
+        # Counters of the queues still alive are added to the closed ones,
+        for spilledCount, droppedCount, droppedSize in dropped :
+            stats['SpilledCount'] += spilledCount
+            stats['DroppedCount'] += droppedCount
+            stats['DroppedSize']  += droppedSize
+        return stats
+
+    def GetLocksStats(self) :
+        # Returns (acquired, contended, wait sec) by lock name, the shards being summed,
+        shardsStats = [shard.Lock.GetStats() for shard in self._shards]
+        return {
+            'SHARDS' : tuple(sum(x) for x in zip(*shardsStats)),
+            'ACL'    : self._aclLock.GetStats(),
+            'HTTP'   : self._httpRequestsLock.GetStats(),
+            'TOKENS' : self._telemetryTokensLock.GetStats()
+        }
 
     def CentralSessionExists(self) :
         return ( self._centralSession is not None or \
-                 IoTSocketStruct.CENTRAL_EMPTY_UID in self._keepSessionsData )
+                 IoTSocketStruct.CENTRAL_EMPTY_UID in self._centralShard.KeptData or \
+                 IoTSocketStruct.CENTRAL_EMPTY_UID in self._centralShard.RemoteSessions )
+
+    def _getNewTrackingNbr(self) :
+        trackingNbr = randbelow(2**16)
+        if self._routingPlane :
+            # The tracking number gives the worker that owns the HTTP request,
+            count        = self._routingPlane.WorkersCount
+            trackingNbr -= (trackingNbr % count) - self._routingPlane.WorkerIndex
+            if trackingNbr >= 2**16 :
+                trackingNbr -= count
+        return trackingNbr
 
     def AddCentralHTTPRequest(self, httpReq, exp) :
-        with self._lock :
+        with self._httpRequestsLock :
             while True :
-                trackingNbr = randbelow(2**16)
+                trackingNbr = self._getNewTrackingNbr()
                 if not trackingNbr in self._centralHTTPRequests :
                     self._centralHTTPRequests[trackingNbr] = (httpReq, exp)
                     break
+        if exp :
+            self._scheduler.Add(exp, self._expireCentralHTTPRequest, trackingNbr, httpReq)
         return trackingNbr
 
     def RemoveCentralHTTPRequest(self, httpReq) :
-        with self._lock :
+        with self._httpRequestsLock :
             if httpReq.TrackingNbr in self._centralHTTPRequests :
                 if httpReq == self._centralHTTPRequests[httpReq.TrackingNbr][0] :
                     del self._centralHTTPRequests[httpReq.TrackingNbr]
 
     def GetNewTelemetryToken(self, uid, expirationMin) :
-        with self._lock :
+        with self._telemetryTokensLock :
             while True :
                 token = token_bytes(8)
                 if not token in self._telemetryTokens :
@@ -213,6 +523,11 @@ class IoTSocketRouter :
                         exp = None
                     self._telemetryTokens[token] = (uid, exp)
                     break
+        if exp :
+            self._scheduler.Add(exp, self._expireTelemetryToken, token, exp)
+        if self._routingPlane :
+            self._routingPlane.Broadcast( IoTSocketRoutingPlane.MSG_TELEMETRY_TOKEN,
+                                          (token, uid, exp) )
         self.Log( 'NEW TELEMETRY TOKEN FOR {%s} EXPIRING IN %s MIN (%s)' %
                   ( IoTSocketStruct.UIDFromBin128(uid),
                     expirationMin,
@@ -226,25 +541,22 @@ class IoTSocketRouter :
 
     def RouteRequest(self, fromUID, toUID, trackingNbr, dataFormat, formatOpt, data) :
         if toUID or self.CentralSessionExists() :
-            if toUID :
-                session = self._objectsSessions.get(toUID, None)
-            else :
-                session = self._centralSession
+            if not toUID :
+                toUID = IoTSocketStruct.CENTRAL_EMPTY_UID
+            session = self._getLocalSession(toUID)
             data = IoTSocketStruct.MakeRequestTRHdr( fromUID,
                                                      trackingNbr,
                                                      dataFormat,
                                                      formatOpt,
                                                      len(data) ) \
                  + data
-            if session and session.Send(data) :
+            if session and self._sendToSession(session, data) :
                 return True
-            if not toUID :
-                toUID = IoTSocketStruct.CENTRAL_EMPTY_UID
-            sessionData, exp = self._keepSessionsData.get(toUID, (None, None))
-            if sessionData is not None :
-                sessionData.append(data)
+            if self._keepData(toUID, data) :
                 self.Log('ROUTER > REQUEST KEPT (#%s)' % trackingNbr)
                 return True
+            if self._routeToRemoteSession(toUID, data) :
+                return True
         else :
             if self._onGetWebHookRequest :
                 plFormat, plObject = IoTSocketStruct.DecodeJSONPayload(data, dataFormat)
@@ -268,7 +580,7 @@ class IoTSocketRouter :
                 fmt, data = IoTSocketStruct.EncodeJSONPayload(o['Payload'], o['Format'])
                 if fmt is not None and data is not None :
                     centralHTTPWebHook.ObjRef = (None, None)
-                    session = self._objectsSessions.get(uid, None)
+                    session = self._getLocalSession(uid)
                     if session :
                         session.EndTrackingRequest(trackingNbr)
                         data = IoTSocketStruct.MakeResponseTRHdr( None,
@@ -278,49 +590,217 @@ class IoTSocketRouter :
                                                                   IoTSocketStruct.PLDATA_FMT_OPT_NONE,
                                                                   len(data) ) \
                              + data
-                        session.Send(data)
+                        self._sendToSession(session, data)
             except :
                 pass
 
     def _onWebHookClosed(self, centralHTTPWebHook) :
         uid, trackingNbr = centralHTTPWebHook.ObjRef
         if uid and trackingNbr :
-            session = self._objectsSessions.get(uid, None)
+            session = self._getLocalSession(uid)
             if session :
                 session.EndTrackingRequest(trackingNbr)
                 data = IoTSocketStruct.MakeResponseErrTR( None,
                                                           trackingNbr,
                                                           IoTSocketStruct.RESP_CODE_REQ_NOK )
-                session.Send(data)
+                self._sendToSession(session, data)
 
     def RouteResponse(self, fromUID, toUID, trackingNbr, code, dataFormat, formatOpt, data) :
         if toUID or self.CentralSessionExists() :
-            if toUID :
-                session = self._objectsSessions.get(toUID, None)
-            else :
-                session = self._centralSession
+            if not toUID :
+                toUID = IoTSocketStruct.CENTRAL_EMPTY_UID
+            session = self._getLocalSession(toUID)
+            data = IoTSocketStruct.MakeResponseTRHdr( fromUID,
+                                                      trackingNbr,
+                                                      code,
+                                                      dataFormat,
+                                                      formatOpt,
+                                                      len(data) ) \
+                 + data
             if session :
                 session.EndTrackingRequest(trackingNbr)
-                data = IoTSocketStruct.MakeResponseTRHdr( fromUID,
-                                                          trackingNbr,
-                                                          code,
-                                                          dataFormat,
-                                                          formatOpt,
-                                                          len(data) ) \
-                     + data
-                return session.Send(data)
-        else :
-            httpReq, exp = self._centralHTTPRequests.get(trackingNbr, (None, None))
-            if httpReq :
-                plFormat, plObject = IoTSocketStruct.DecodeJSONPayload(data, dataFormat)
-                if plFormat is not None and plObject is not None :
-                    self.RemoveCentralHTTPRequest(httpReq)
-                    return httpReq.SendResponse(code, plObject, plFormat)
+                return self._sendToSession(session, data)
+            if self._routeToRemoteSession(toUID, data, trackingNbr) :
+                return True
+        elif self._routeResponseToHTTPRequest(trackingNbr, code, dataFormat, formatOpt, data) :
+            return True
         self.Log('ROUTER > NO DESTINATION FOR RESPONSE (#%s)' % trackingNbr)
         return False
 
+    def _routeResponseToHTTPRequest(self, trackingNbr, code, dataFormat, formatOpt, data) :
+        httpReq, exp = self._centralHTTPRequests.get(trackingNbr, (None, None))
+        if httpReq :
+            plFormat, plObject = IoTSocketStruct.DecodeJSONPayload(data, dataFormat)
+            if plFormat is not None and plObject is not None :
+                self.RemoveCentralHTTPRequest(httpReq)
+                return httpReq.SendResponse(code, plObject, plFormat)
+        elif self._routingPlane :
+            worker = self._routingPlane.GetOwnerWorker(trackingNbr)
+            return self._routingPlane.Send( worker,
+                                            IoTSocketRoutingPlane.MSG_HTTP_RESPONSE,
+                                            (trackingNbr, code, dataFormat, formatOpt, data) )
+        return False
+
+    def _routeToRemoteSession(self, uid, data, trackingNbr=None) :
+        if self._routingPlane :
+            shard       = self._getShard(uid)
+            worker, exp = shard.RemoteSessions.get(uid, (None, None))
+            if worker is not None and uid in shard.Forwards :
+                with shard.Lock :
+                    forward = shard.Forwards.get(uid, None)
+                    queued  = (forward is not None and forward[0] == worker)
+                    if queued and not forward[1].Append(data) :
+                        return False
+                if queued :
+                    if trackingNbr is not None :
+                        # The request ends at once, its response follows the data forwarded,
+                        self._routingPlane.Send( worker,
+                                                 IoTSocketRoutingPlane.MSG_ROUTE_DATA,
+                                                 (uid, b'', trackingNbr) )
+                    return True
+            if worker is not None :
+                return self._routingPlane.Send( worker,
+                                                IoTSocketRoutingPlane.MSG_ROUTE_DATA,
+                                                (uid, data, trackingNbr) )
+        return False
+
+    def _getLocalSession(self, uid) :
+        # Lookups are lock free, the shard lock only serializes the writers,
+        if uid == IoTSocketStruct.CENTRAL_EMPTY_UID :
+            return self._centralSession
+        return self._getShard(uid).Sessions.get(uid, None)
+
+    def _keepData(self, uid, data) :
+        shard = self._getShard(uid)
+        with shard.Lock :
+            keptQueue, exp = shard.KeptData.get(uid, (None, None))
+            if keptQueue is None :
+                return False
+            droppedCount = keptQueue.DroppedCount
+            kept         = keptQueue.Append(data)
+        if keptQueue.DroppedCount and not droppedCount :
+            self.Log( 'ROUTER > KEPT DATA OVERFLOW FOR %s (%s)' %
+                      ( 'CENTRAL' if uid == IoTSocketStruct.CENTRAL_EMPTY_UID
+                        else '{%s}' % IoTSocketStruct.UIDFromBin128(uid),
+                        self._keptQueueArgs[3] ) )
+        return kept
+
+    def _onRoutingPlaneMessage(self, routingPlane, fromWorker, msgType, args) :
+        if msgType == IoTSocketRoutingPlane.MSG_HELLO :
+            self._purgeRemoteWorker(fromWorker)
+            self._syncRemoteWorker(fromWorker)
+        elif msgType == IoTSocketRoutingPlane.MSG_SESSION_STARTED :
+            uid   = args[0]
+            shard = self._getShard(uid)
+            with shard.Lock :
+                shard.RemoteSessions[uid] = (fromWorker, None)
+                keptQueue, exp = shard.KeptData.pop(uid, (None, None))
+                forward        = shard.Forwards.get(uid, None)
+                if forward :
+                    # Takes over the forward to the worker of the previous session,
+                    keptQueue = forward[1]
+                if keptQueue :
+                    shard.Forwards[uid] = (fromWorker, keptQueue)
+                elif forward :
+                    del shard.Forwards[uid]
+            session = self._getLocalSession(uid)
+            if session :
+                session.Close()
+            if keptQueue :
+                # Forwarded out of the event loop, by batches paced on the worker reception,
+                self._scheduler.Add(time(), self._forwardKeptQueue, uid, fromWorker, keptQueue)
+            elif keptQueue is not None :
+                self._closeKeptQueue(keptQueue)
+        elif msgType == IoTSocketRoutingPlane.MSG_SESSION_REMOVED :
+            uid, exp = args
+            shard    = self._getShard(uid)
+            with shard.Lock :
+                if shard.RemoteSessions.get(uid, (None, None))[0] == fromWorker :
+                    if exp :
+                        shard.RemoteSessions[uid] = (fromWorker, exp)
+                        self._scheduler.Add(exp, self._expireRemoteSession, uid, exp)
+                    else :
+                        del shard.RemoteSessions[uid]
+        elif msgType == IoTSocketRoutingPlane.MSG_ROUTE_DATA :
+            uid, data, trackingNbr = args
+            session = self._getLocalSession(uid)
+            if session :
+                if trackingNbr is not None :
+                    session.EndTrackingRequest(trackingNbr)
+                if data :
+                    self._sendToSession(session, data)
+            elif data and not self._keepData(uid, data) :
+                self.Log('ROUTER > NO DESTINATION FOR DATA FROM WORKER %s' % fromWorker)
+        elif msgType == IoTSocketRoutingPlane.MSG_HTTP_RESPONSE :
+            trackingNbr = args[0]
+            if not self._routeResponseToHTTPRequest(*args) :
+                self.Log('ROUTER > NO DESTINATION FOR RESPONSE (#%s)' % trackingNbr)
+        elif msgType == IoTSocketRoutingPlane.MSG_TELEMETRY_TOKEN :
+            token, uid, exp = args
+            with self._telemetryTokensLock :
+                self._telemetryTokens[token] = (uid, exp)
+            if exp :
+                self._scheduler.Add(exp, self._expireTelemetryToken, token, exp)
+        elif msgType == IoTSocketRoutingPlane.MSG_ACL_CHANGED :
+            if not self.LoadACL() :
+                self.Log('ROUTER > CANNOT RELOAD ACL CHANGED BY WORKER %s' % fromWorker)
+
+    def _purgeRemoteWorker(self, worker) :
+        # A worker says hello when it (re)starts, it no longer has the sessions it owned,
+        forwards = [ ]
+        for shard in self._shards :
+            with shard.Lock :
+                for uid in [ uid for uid in shard.RemoteSessions
+                             if shard.RemoteSessions[uid][0] == worker ] :
+                    del shard.RemoteSessions[uid]
+                for uid in [ uid for uid in shard.Forwards
+                             if shard.Forwards[uid][0] == worker ] :
+                    keptQueue = shard.Forwards.pop(uid)[1]
+                    keptQueue.DropAll()
+                    forwards.append(keptQueue)
+        for keptQueue in forwards :
+            self._closeKeptQueue(keptQueue)
+
+    def _syncRemoteWorker(self, worker) :
+        plane    = self._routingPlane
+        sessions = [ ]
+        kept     = [ ]
+        for shard in self._shards :
+            with shard.Lock :
+                sessions.extend(shard.Sessions)
+                kept.extend((uid, shard.KeptData[uid][1]) for uid in shard.KeptData)
+        if self._centralSession :
+            sessions.append(IoTSocketStruct.CENTRAL_EMPTY_UID)
+        with self._telemetryTokensLock :
+            tokens = [ (token, ) + self._telemetryTokens[token] for token in self._telemetryTokens ]
+        for uid in sessions :
+            plane.Send(worker, IoTSocketRoutingPlane.MSG_SESSION_STARTED, (uid, ))
+        for uid, exp in kept :
+            plane.Send(worker, IoTSocketRoutingPlane.MSG_SESSION_STARTED, (uid, ))
+            plane.Send(worker, IoTSocketRoutingPlane.MSG_SESSION_REMOVED, (uid, exp))
+        for args in tokens :
+            plane.Send(worker, IoTSocketRoutingPlane.MSG_TELEMETRY_TOKEN, args)
+
+    def _getTelemetryTRPrefix(self, uid) :
+        prefix = self._telemetryTRPrefixes.get(uid, None)
+        if prefix is None :
+            prefix = IoTSocketStruct.MakeIdentTelemetryTRPrefix(uid)
+            self._telemetryTRPrefixes[uid] = prefix
+        return prefix
+
     def RouteTelemetry(self, token, dataFormat, formatOpt, data) :
         if token and data :
+            plData = IoTSocketStruct.MakePLDataHdr(dataFormat, formatOpt, len(data)) + data
+            return self.RouteTelemetryPLData(token, plData)
+        return False
+
+    def RouteTelemetryPacket(self, packet) :
+        token, plData = IoTSocketStruct.SplitTelemetryPacket(packet)
+        return self.RouteTelemetryPLData(token, plData)
+
+    def RouteTelemetryPLData(self, token, plData) :
+        # plData is the payload data header followed by the data, bytes or view,
+        if token and plData is not None and len(plData) > 3 :
             uid, exp = self._telemetryTokens.get(token, (None, None))
             if uid :
                 self.Log( 'ROUTER > TELEMETRY RECEIVED FROM {%s} WITH TOKEN %s' %
@@ -328,16 +808,15 @@ class IoTSocketRouter :
                             self.TelemetryTokenToStr(token) ) )
                 if self.CentralSessionExists() :
                     session = self._centralSession
+                    prefix  = self._getTelemetryTRPrefix(uid)
                     if session :
-                        data = IoTSocketStruct.MakeIdentTelemetryTRHdr( uid,
-                                                                        dataFormat,
-                                                                        formatOpt,
-                                                                        len(data) ) \
-                             + data
-                        if session.Send(data) :
+                        if self._sendToSession(session, prefix, plData) :
                             return True
+                    elif self._routeToRemoteSession(IoTSocketStruct.CENTRAL_EMPTY_UID, prefix + plData) :
+                        return True
                 elif self._onGetWebHookTelemetry :
-                    plFormat, plObject = IoTSocketStruct.DecodeJSONPayload(data, dataFormat)
+                    dataFormat, formatOpt, dataLen = IoTSocketStruct.DecodePLDataHdr(plData[:3])
+                    plFormat, plObject = IoTSocketStruct.DecodeJSONPayload(plData[3:], dataFormat)
                     if plFormat is not None and plObject is not None :
                         webHook = self._onGetWebHookTelemetry(self)
                         if webHook :
@@ -0,0 +1,155 @@
+"""
+The MIT License (MIT)
+Copyright © 2018 Jean-Christophe Bos & HC² (www.hc2.fr)
+"""
+
+
+from   XAsyncSockets import XBufferSlot
+import socket
+import marshal
+import hmac
+import hashlib
+import stat
+import os
+
+class IoTSocketRoutingPlaneException(Exception) :
+    pass
+
+class IoTSocketRoutingPlane :
+
+    MSG_HELLO           = 0x00
+    MSG_SESSION_STARTED = 0x01
+    MSG_SESSION_REMOVED = 0x02
+    MSG_ROUTE_DATA      = 0x03
+    MSG_HTTP_RESPONSE   = 0x04
+    MSG_TELEMETRY_TOKEN = 0x05
+    MSG_ACL_CHANGED     = 0x06
+
+    # Count of arguments of each message type,
+    MSG_ARGS_COUNTS     = { MSG_HELLO           : 0,
+                            MSG_SESSION_STARTED : 1,
+                            MSG_SESSION_REMOVED : 2,
+                            MSG_ROUTE_DATA      : 3,
+                            MSG_HTTP_RESPONSE   : 5,
+                            MSG_TELEMETRY_TOKEN : 3,
+                            MSG_ACL_CHANGED     : 0 }
+
+    MAX_MSG_LEN         = 256*1024
+    MAC_LEN             = 32
+    IPC_PATH_MODE       = 0o700
+
+    def __init__(self, pool, workerIndex, workersCount, ipcPath, authKey) :
+        self._workerIndex    = workerIndex
+        self._workersCount   = workersCount
+        self._ipcPath        = ipcPath
+        self._authKey        = authKey
+        self._onMessage      = None
+        self._rejectedCount  = 0
+        self._sendDropsCount = 0
+        self._openIPCPath(ipcPath)
+        path = self._getWorkerPath(workerIndex)
+        try :
+            os.unlink(path)
+        except :
+            pass
+        recvSocket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        recvSocket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4*self.MAX_MSG_LEN)
+        recvSocket.bind(path)
+        self._sendSocket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sendSocket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 2*self.MAX_MSG_LEN)
+        # Sends are done from the event loops and must never wait for a full peer,
+        self._sendSocket.setblocking(False)
+        self._xasDgram = pool.UDPDatagram( pool,
+                                           recvSocket,
+                                           XBufferSlot(size=self.MAX_MSG_LEN, keepAlloc=True) )
+        self._xasDgram.OnDataRecv = self._onDataRecv
+        pool.NotifyNextReadyForReading(self._xasDgram, True)
+
+    def _openIPCPath(self, ipcPath) :
+        # The directory must be private to this user, other local users
+        # cannot then reach the workers sockets,
+        try :
+            os.makedirs(ipcPath, mode=self.IPC_PATH_MODE, exist_ok=True)
+            st = os.lstat(ipcPath)
+        except Exception as ex :
+            raise IoTSocketRoutingPlaneException('Cannot create "%s" (%s).' % (ipcPath, ex))
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() :
+            raise IoTSocketRoutingPlaneException('"%s" is not a directory owned by this user.' % ipcPath)
+        if st.st_mode & 0o077 :
+            raise IoTSocketRoutingPlaneException('"%s" must not be accessible by group or others.' % ipcPath)
+
+    def _getWorkerPath(self, workerIndex) :
+        return '%s/worker-%s.sock' % (self._ipcPath, workerIndex)
+
+    def _getMAC(self, msg) :
+        return hmac.new(self._authKey, msg, hashlib.sha256).digest()
+
+    def _decodeMessage(self, datagram) :
+        # Returns None for any message not authenticated or malformed,
+        mac = bytes(datagram[:self.MAC_LEN])
+        msg = bytes(datagram[self.MAC_LEN:])
+        if not hmac.compare_digest(mac, self._getMAC(msg)) :
+            return None
+        try :
+            fromWorker, msgType, args = marshal.loads(msg)
+        except :
+            return None
+        if type(fromWorker) is not int or type(args) is not tuple or \
+           not 0 <= fromWorker < self._workersCount or               \
+           self.MSG_ARGS_COUNTS.get(msgType, None) != len(args) :
+            return None
+        return (fromWorker, msgType, args)
+
+    def _onDataRecv(self, xAsyncUDPDatagram, remoteAddr, datagram) :
+        msg = self._decodeMessage(datagram)
+        if msg is None :
+            self._rejectedCount += 1
+            return
+        fromWorker, msgType, args = msg
+        if self._onMessage and fromWorker != self._workerIndex :
+            self._onMessage(self, fromWorker, msgType, args)
+
+    def Send(self, toWorker, msgType, args=()) :
+        if toWorker == self._workerIndex :
+            return False
+        try :
+            msg = marshal.dumps((self._workerIndex, msgType, args))
+            if self.MAC_LEN + len(msg) <= self.MAX_MSG_LEN :
+                self._sendSocket.sendto(self._getMAC(msg) + msg, self._getWorkerPath(toWorker))
+                return True
+        except BlockingIOError :
+            self._sendDropsCount += 1
+        except :
+            pass
+        return False
+
+    def Broadcast(self, msgType, args=()) :
+        for i in range(self._workersCount) :
+            if i != self._workerIndex :
+                self.Send(i, msgType, args)
+
+    def GetOwnerWorker(self, trackingNbr) :
+        return trackingNbr % self._workersCount
+
+    @property
+    def WorkerIndex(self) :
+        return self._workerIndex
+
+    @property
+    def WorkersCount(self) :
+        return self._workersCount
+
+    @property
+    def RejectedCount(self) :
+        return self._rejectedCount
+
+    @property
+    def SendDropsCount(self) :
+        return self._sendDropsCount
+
+    @property
+    def OnMessage(self) :
+        return self._onMessage
+    @OnMessage.setter
+    def OnMessage(self, value) :
+        self._onMessage = value
@@ -0,0 +1,56 @@
+"""
+The MIT License (MIT)
+Copyright © 2018 Jean-Christophe Bos & HC² (www.hc2.fr)
+"""
+
+
+from   _thread   import start_new_thread
+from   threading import Condition
+from   heapq     import heappush, heappop
+from   time      import time
+
+class IoTSocketScheduler :
+
+    def __init__(self) :
+        self._deadlines  = [ ]
+        self._seq        = 0
+        self._cond       = Condition()
+        self._processing = True
+        start_new_thread(self._process, ())
+
+    def _process(self) :
+        while True :
+            with self._cond :
+                while self._processing :
+                    nowSec = time()
+                    if self._deadlines and self._deadlines[0][0] <= nowSec :
+                        break
+                    # Waits until the nearest deadline or until an earlier one is added,
+                    self._cond.wait(self._deadlines[0][0] - nowSec if self._deadlines else None)
+                if not self._processing :
+                    return
+                expired = [ ]
+                while self._deadlines and self._deadlines[0][0] <= nowSec :
+                    expired.append(heappop(self._deadlines))
+            for exp, seq, func, args in expired :
+                try :
+                    func(*args)
+                except :
+                    pass
+
+    def Add(self, exp, func, *args) :
+        # func is called with args once exp is reached, it must check that its entry is still current,
+        with self._cond :
+            self._seq += 1
+            heappush(self._deadlines, (exp, self._seq, func, args))
+            if self._deadlines[0][1] == self._seq :
+                self._cond.notify()
+
+    def Stop(self) :
+        with self._cond :
+            self._processing = False
+            self._cond.notify()
+
+    @property
+    def Count(self) :
+        return len(self._deadlines)
@@ -10,17 +10,35 @@ from   struct          import unpack
 from   secrets         import token_bytes
 from   _thread         import allocate_lock
 from   time            import time
+from   sys             import getsizeof
 
 class IoTSocketSession :
 
+    __slots__ = ( '_xasTCPCli',
+                  '_router',
+                  '_sslContext',
+                  '_reqTimeout',
+                  '_admission',
+                  '_uid',
+                  '_telemetryToken',
+                  '_authenticated',
+                  '_isCentral',
+                  '_strUID',
+                  '_groupID',
+                  '_closedCode',
+                  '_requests',
+                  '_requestsLock',
+                  '_token128' )
+
     IOTSOCKET_VER   = 0x01
     RECV_TIMEOUT    = 10
 
-    def __init__(self, xAsyncTCPClient, router, sslContext, reqTimeout) :
+    def __init__(self, xAsyncTCPClient, router, sslContext, reqTimeout, admission=None) :
         self._xasTCPCli            = xAsyncTCPClient
         self._router               = router
         self._sslContext           = sslContext
         self._reqTimeout           = reqTimeout
+        self._admission            = admission
         self._uid                  = None
         self._telemetryToken       = None
         self._authenticated        = False
@@ -28,8 +46,12 @@ class IoTSocketSession :
         self._strUID               = None
         self._groupID              = None
         self._closedCode           = None
-        self._requests             = { }
-        self._requestsLock         = allocate_lock()
+        # Created with the first request, most sessions never send any,
+        self._requests             = None
+        self._requestsLock         = None
+        if admission and not admission.Admit(xAsyncTCPClient) :
+            self._refuseMaxLoad()
+            return
         self._xasTCPCli.OnClosed   = self._onTCPConnClosed
         self._waitInitiationReq()
 
@@ -39,10 +61,24 @@ class IoTSocketSession :
     def Send(self, data, onDataSent=None, onDataSentArg=None) :
         return self._xasTCPCli.AsyncSendData(data, onDataSent, onDataSentArg)
 
+    def SendParts(self, dataParts, onDataSent=None, onDataSentArg=None) :
+        return self._xasTCPCli.AsyncSendDataParts(dataParts, onDataSent, onDataSentArg)
+
     def _recv(self, size, onDataRecv, onDataRecvArg=None) :
         self._xasTCPCli.AsyncRecvData(size, onDataRecv, onDataRecvArg, self.RECV_TIMEOUT)
 
+    def _refuseMaxLoad(self) :
+        self._router.Log( 'CONNECTION %s REFUSED (MAX LOAD)' %
+                          self._xasTCPCli.CliAddr[0] )
+        self._xasTCPCli.OnClosed = None
+        if self._admission :
+            self._admission.Release(self._xasTCPCli)
+        self.Send(IoTSocketStruct.MakeCloseConnTR(IoTSocketStruct.CLOSE_CODE_MAX_LOAD))
+        self.Close()
+
     def _onTCPConnClosed(self, xAsyncTCPClient, closedReason) :
+        if self._admission :
+            self._admission.Release(xAsyncTCPClient)
         reason = {
             XClosedReason.ClosedByHost : 'BY HOST',
             XClosedReason.ClosedByPeer : 'BY PEER',
@@ -68,7 +104,10 @@ class IoTSocketSession :
                ( not tls or self._sslContext is not None ) )
         data = IoTSocketStruct.MakeInitiationResp( ok       = ok,
                                                    ruleType = IoTSocketStruct.INIT_NO_RULE )
-        if ok :
+        if ok and tls and self._admission and \
+           not self._admission.BeginTLSHandshake(xAsyncTCPClient) :
+            self._refuseMaxLoad()
+        elif ok :
             self.Send(data, self._onInitiationRespSent, tls)
         else :
             self.Send(data)
@@ -96,6 +135,8 @@ class IoTSocketSession :
             self.Close()
 
     def _startSession(self) :
+        if self._admission :
+            self._admission.EndAuth(self._xasTCPCli)
         self._authenticated = True
         self._isCentral     = (self._uid == IoTSocketStruct.CENTRAL_EMPTY_UID)
         if not self._isCentral :
@@ -179,6 +220,10 @@ class IoTSocketSession :
         else :
             strUID = 'CENTRAL'
         errCode = None
+        if self._requestsLock is None :
+            # Only the receiving of this session creates them,
+            self._requestsLock = allocate_lock()
+            self._requests     = { }
         with self._requestsLock :
             self._router.Log( 'SESSION %s > REQUEST TO %s RECEIVED (#%s)' %
                               (self._getSessionName(), strUID, trackingNbr) )
@@ -191,6 +236,7 @@ class IoTSocketSession :
                                               data        = data ) :
                     exp = time() + self._reqTimeout
                     self._requests[trackingNbr] = (uid, exp)
+                    self._router.AddRequestTimeout(self, trackingNbr, exp)
                 else :
                     errCode = IoTSocketStruct.RESP_CODE_ERR_NO_DEST
             else :
@@ -240,22 +286,28 @@ class IoTSocketSession :
             return ('{%s}' % self._strUID)
 
     def EndTrackingRequest(self, trackingNbr) :
+        if self._requests :
+            with self._requestsLock :
+                if trackingNbr in self._requests :
+                    del self._requests[trackingNbr]
+
+    def ExpireRequest(self, trackingNbr, exp) :
         with self._requestsLock :
-            if trackingNbr in self._requests :
+            uid, reqExp = self._requests.get(trackingNbr, (None, None))
+            if reqExp == exp :
                 del self._requests[trackingNbr]
+                self.Send( IoTSocketStruct.MakeResponseErrTR( uid,
+                                                              trackingNbr,
+                                                              IoTSocketStruct.RESP_CODE_ERR_TIMEOUT ) )
+                self._router.Log( 'SESSION %s > REQUEST TIMEOUT (#%s)' %
+                                  (self._getSessionName(), trackingNbr) )
 
-    def CheckRequestsTimeout(self, nowSec) :
-        if self._requests :
-            with self._requestsLock :
-                for trackingNbr in list(self._requests) :
-                    uid, exp = self._requests[trackingNbr]
-                    if nowSec >= exp :
-                        del self._requests[trackingNbr]
-                        self.Send( IoTSocketStruct.MakeResponseErrTR( uid,
-                                                                      trackingNbr,
-                                                                      IoTSocketStruct.RESP_CODE_ERR_TIMEOUT ) )
-                        self._router.Log( 'SESSION %s > REQUEST TIMEOUT (#%s)' %
-                                          (self._getSessionName(), trackingNbr) )
+    def GetMemorySize(self) :
+        # Own objects of the session and its connection, slot buffers are counted by the pool,
+        size = getsizeof(self) + self._xasTCPCli.GetMemorySize()
+        if self._requests is not None :
+            size += getsizeof(self._requests) + getsizeof(self._requestsLock)
+        return size
 
     @property
     def UID(self) :
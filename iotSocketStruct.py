@@ -192,6 +192,10 @@ class IoTSocketStruct :
         return IoTSocketStruct._makeDataTRHdr(IoTSocketStruct.TOT_IDENT_TELEMETRY, uid) + \
                IoTSocketStruct._makePLDataHdr(dataFormat, formatOpt, dataLen)
 
+    @staticmethod
+    def MakeIdentTelemetryTRPrefix(uid) :
+        return IoTSocketStruct._makeDataTRHdr(IoTSocketStruct.TOT_IDENT_TELEMETRY, uid)
+
     @staticmethod
     def DecodeIdentTelemetryHdr(data) :
         uid                            = data[:16]
@@ -251,6 +255,24 @@ class IoTSocketStruct :
                     return (token, dataFormat, formatOpt, data)
         return (None, None, None, None)
 
+    @staticmethod
+    def SplitTelemetryPacket(packet) :
+        # Returns the token and a view on the payload data header followed by the data,
+        if packet :
+            packet = memoryview(packet)
+            if len(packet) >= 11 and len(packet) == 11 + unpack('>H', packet[9:11])[0] :
+                return (bytes(packet[:8]), packet[8:])
+        return (None, None)
+
+    @staticmethod
+    def MakePLDataHdr(dataFormat, formatOpt, dataLen) :
+        return IoTSocketStruct._makePLDataHdr(dataFormat, formatOpt, dataLen)
+
+    @staticmethod
+    def DecodePLDataHdr(data) :
+        # Returns the data format, the format option and the data length,
+        return IoTSocketStruct._decodePLDataHdr(data)
+
     @staticmethod
     def EncodeJSONPayload(plObject, plFormat) :
         try :
@@ -281,13 +303,13 @@ class IoTSocketStruct :
         try :
             if fmt == IoTSocketStruct.PLDATA_FORMAT_JSON :
                 plFormat = 'JSON'
-                plObject = json.loads(data.decode('UTF-8'))
+                plObject = json.loads(str(data, 'UTF-8'))
             elif fmt == IoTSocketStruct.PLDATA_FORMAT_ASCII :
                 plFormat = 'ASCII'
-                plObject = data.decode('ASCII')
+                plObject = str(data, 'ASCII')
             elif fmt == IoTSocketStruct.PLDATA_FORMAT_UTF8 :
                 plFormat = 'UTF8'
-                plObject = data.decode('UTF-8')
+                plObject = str(data, 'UTF-8')
             elif fmt == IoTSocketStruct.PLDATA_FORMAT_BIN :
                 plFormat = 'BINARY'
                 plObject = [ ]
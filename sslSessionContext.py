@@ -0,0 +1,86 @@
+"""
+The MIT License (MIT)
+Copyright © 2018 Jean-Christophe Bos & HC² (www.hc2.fr)
+"""
+
+
+from   _thread import allocate_lock
+from   time    import time
+import ssl
+
+class SSLSessionContext :
+
+    DEFAULT_TICKET_LIFETIME_SEC = 3600
+    DEFAULT_TICKETS_COUNT       = 2
+
+    def __init__( self,
+                  certFilename,
+                  keyFilename,
+                  ticketLifetimeSec = DEFAULT_TICKET_LIFETIME_SEC,
+                  ticketsCount      = DEFAULT_TICKETS_COUNT ) :
+        self._certFilename      = certFilename
+        self._keyFilename       = keyFilename
+        self._ticketLifetimeSec = ticketLifetimeSec
+        self._ticketsCount      = ticketsCount
+        self._lock              = allocate_lock()
+        self._hitsCount         = 0
+        self._missesCount       = 0
+        self._rotationsCount    = 0
+        self._context           = self._createContext()
+        self._contextExp        = time() + ticketLifetimeSec
+
+    def _createContext(self) :
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain( certfile = self._certFilename,
+                                 keyfile  = self._keyFilename )
+        # Each new context gets new session ticket keys from OpenSSL,
+        if self._ticketsCount > 0 :
+            context.options &= ~ssl.OP_NO_TICKET
+        else :
+            context.options |= ssl.OP_NO_TICKET
+        if hasattr(context, 'num_tickets') :
+            context.num_tickets = self._ticketsCount
+        return context
+
+    def GetContext(self) :
+        if time() >= self._contextExp :
+            with self._lock :
+                if time() >= self._contextExp :
+                    try :
+                        self._context         = self._createContext()
+                        self._rotationsCount += 1
+                    except :
+                        pass
+                    self._contextExp = time() + self._ticketLifetimeSec
+        return self._context
+
+    def CountHandshake(self, xAsyncTCPClient) :
+        try :
+            reused = xAsyncTCPClient.GetSocketObj().session_reused
+        except :
+            return
+        with self._lock :
+            if reused :
+                self._hitsCount += 1
+            else :
+                self._missesCount += 1
+
+    @property
+    def TicketLifetimeSec(self) :
+        return self._ticketLifetimeSec
+
+    @property
+    def TicketsCount(self) :
+        return self._ticketsCount
+
+    @property
+    def HitsCount(self) :
+        return self._hitsCount
+
+    @property
+    def MissesCount(self) :
+        return self._missesCount
+
+    @property
+    def RotationsCount(self) :
+        return self._rotationsCount
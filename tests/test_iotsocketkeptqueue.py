@@ -0,0 +1,127 @@
+"""
+The MIT License (MIT)
+Copyright © 2018 Jean-Christophe Bos & HC² (www.hc2.fr)
+"""
+
+
+import os
+import sys
+import stat
+import tempfile
+import unittest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_PATH)
+
+from   iotSocketKeptQueue import IoTSocketKeptQueue, \
+                                 IoTSocketKeptQueueException
+
+class IoTSocketKeptQueueTests(unittest.TestCase) :
+
+    def setUp(self) :
+        self.tmpDir   = tempfile.TemporaryDirectory()
+        self.spillDir = self.tmpDir.name
+
+    def tearDown(self) :
+        self.tmpDir.cleanup()
+
+    def _data(self, i, size=8) :
+        return (b'%08d' % i) * (size // 8)
+
+    def test_pop_batch_keeps_order_across_memory_and_spill(self) :
+        queue = IoTSocketKeptQueue(32, 1024, self.spillDir)
+        for i in range(10) :
+            self.assertTrue(queue.Append(self._data(i)))
+        self.assertEqual(queue.MemSize, 32)
+        self.assertEqual(queue.SpilledCount, 6)
+        self.assertEqual(queue.Count, 10)
+        batch = queue.PopBatch(48)
+        self.assertEqual([bytes(data) for data in batch], [self._data(i) for i in range(6)])
+        # Data appended while popping go behind the spilled ones,
+        queue.Append(self._data(10))
+        batch = queue.PopBatch(1024)
+        self.assertEqual([bytes(data) for data in batch], [self._data(i) for i in range(6, 11)])
+        self.assertFalse(queue)
+        queue.Close()
+
+    def test_spill_file_reused_once_fully_read(self) :
+        queue = IoTSocketKeptQueue(0, 1024, self.spillDir)
+        for i in range(4) :
+            queue.Append(self._data(i))
+        spillFile = queue._spillFile
+        self.assertEqual(os.fstat(spillFile.fileno()).st_size, 4 * (queue.SPILL_HDR_SIZE + 8))
+        queue.PopBatch(16)
+        self.assertEqual(queue._spillPos, 2 * (queue.SPILL_HDR_SIZE + 8))
+        queue.PopBatch(16)
+        self.assertEqual(queue._spillPos, 0)
+        self.assertEqual(queue.SpillSize, 0)
+        self.assertEqual(os.fstat(spillFile.fileno()).st_size, 0)
+        queue.Append(self._data(4))
+        self.assertIs(queue._spillFile, spillFile)
+        self.assertEqual([bytes(data) for data in queue.PopBatch(1024)], [self._data(4)])
+        queue.Close()
+
+    def test_drop_oldest_reads_spilled_header(self) :
+        queue = IoTSocketKeptQueue( 0, 3 * (IoTSocketKeptQueue.SPILL_HDR_SIZE + 8), self.spillDir,
+                                    IoTSocketKeptQueue.OVERFLOW_DROP_OLDEST )
+        for i in range(5) :
+            self.assertTrue(queue.Append(self._data(i)))
+        self.assertEqual(queue.Count, 3)
+        self.assertEqual(queue.DroppedCount, 2)
+        self.assertEqual(queue.DroppedSize, 16)
+        self.assertEqual([bytes(data) for data in queue.PopBatch(1024)], [self._data(i) for i in range(2, 5)])
+        queue.Close()
+
+    def test_drop_newest(self) :
+        queue = IoTSocketKeptQueue(16, 16, self.spillDir)
+        self.assertTrue(queue.Append(self._data(0)))
+        self.assertTrue(queue.Append(self._data(1)))
+        self.assertFalse(queue.Append(self._data(2)))
+        self.assertFalse(queue.Append(self._data(3, 32)))
+        self.assertEqual(queue.DroppedCount, 2)
+        self.assertEqual(queue.DroppedSize, 40)
+        self.assertEqual([bytes(data) for data in queue.PopBatch(1024)], [self._data(0), self._data(1)])
+        queue.Close()
+
+    def test_memory_only_without_spill_dir(self) :
+        queue = IoTSocketKeptQueue(16, 1024)
+        self.assertTrue(queue.Append(self._data(0)))
+        self.assertTrue(queue.Append(self._data(1)))
+        self.assertFalse(queue.Append(self._data(2)))
+        self.assertIsNone(queue._spillFile)
+        self.assertEqual(queue.Size, 16)
+        self.assertEqual(queue.DroppedCount, 1)
+        queue.Close()
+
+    def test_restore_batch_in_front(self) :
+        queue = IoTSocketKeptQueue(16, 1024, self.spillDir)
+        for i in range(6) :
+            queue.Append(self._data(i))
+        batch = queue.PopBatch(32)
+        queue.RestoreBatch(batch[2:])
+        self.assertEqual(queue.Count, 4)
+        self.assertEqual([bytes(data) for data in queue.PopBatch(1024)], [self._data(i) for i in range(2, 6)])
+        queue.Close()
+
+    def test_drop_all_counts_batch(self) :
+        queue = IoTSocketKeptQueue(16, 1024, self.spillDir)
+        for i in range(5) :
+            queue.Append(self._data(i))
+        batch = queue.PopBatch(16)
+        queue.DropAll(batch[1:])
+        self.assertFalse(queue)
+        self.assertEqual(queue.Size, 0)
+        self.assertEqual(queue.DroppedCount, 4)
+        self.assertEqual(queue.DroppedSize, 32)
+        queue.Close()
+
+    def test_open_spill_dir_private(self) :
+        spillDir = os.path.join(self.spillDir, 'kept')
+        IoTSocketKeptQueue.OpenSpillDir(spillDir)
+        self.assertEqual(stat.S_IMODE(os.lstat(spillDir).st_mode), IoTSocketKeptQueue.SPILL_DIR_MODE)
+        os.chmod(spillDir, 0o755)
+        with self.assertRaises(IoTSocketKeptQueueException) :
+            IoTSocketKeptQueue.OpenSpillDir(spillDir)
+
+if __name__ == '__main__' :
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+The MIT License (MIT)
+Copyright © 2018 Jean-Christophe Bos & HC² (www.hc2.fr)
+"""
+
+
+import os
+import sys
+import time
+import threading
+import unittest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_PATH)
+
+from   iotSocketScheduler import IoTSocketScheduler
+
+class IoTSocketSchedulerTests(unittest.TestCase) :
+
+    def setUp(self) :
+        self.scheduler = IoTSocketScheduler()
+        self.calls     = [ ]
+        self.done      = threading.Event()
+
+    def tearDown(self) :
+        self.scheduler.Stop()
+
+    def _call(self, name, last=False) :
+        self.calls.append((name, time.time()))
+        if last :
+            self.done.set()
+
+    def test_calls_in_deadlines_order(self) :
+        nowSec = time.time()
+        self.scheduler.Add(nowSec + 0.3, self._call, 'c', True)
+        self.scheduler.Add(nowSec + 0.1, self._call, 'a')
+        self.scheduler.Add(nowSec + 0.2, self._call, 'b1')
+        # Same deadline, called in the order added,
+        self.scheduler.Add(nowSec + 0.2, self._call, 'b2')
+        self.assertTrue(self.done.wait(5))
+        self.assertEqual([name for name, t in self.calls], ['a', 'b1', 'b2', 'c'])
+        self.assertGreaterEqual(self.calls[0][1], nowSec + 0.1)
+        self.assertEqual(self.scheduler.Count, 0)
+
+    def test_replaced_entry_ignored_by_callee(self) :
+        # An entry is replaced by adding a new one, the callee checks that its entry is current,
+        current = { 'exp' : None }
+        def expire(exp) :
+            if exp == current['exp'] :
+                self._call(exp, True)
+            else :
+                self._call(None)
+        nowSec = time.time()
+        for exp in (nowSec + 0.1, nowSec + 0.2) :
+            current['exp'] = exp
+            self.scheduler.Add(exp, expire, exp)
+        self.assertTrue(self.done.wait(5))
+        self.assertEqual([name for name, t in self.calls], [None, nowSec + 0.2])
+
+    def test_failing_call_does_not_stop_thread(self) :
+        nowSec = time.time()
+        self.scheduler.Add(nowSec + 0.05, lambda : 1 / 0)
+        self.scheduler.Add(nowSec + 0.1, self._call, 'a', True)
+        self.assertTrue(self.done.wait(5))
+
+    def test_wakes_up_for_earlier_deadline(self) :
+        nowSec = time.time()
+        self.scheduler.Add(nowSec + 60, self._call, 'late')
+        # The thread now waits for 60 seconds,
+        time.sleep(0.1)
+        self.scheduler.Add(time.time() + 0.1, self._call, 'early', True)
+        self.assertTrue(self.done.wait(2))
+        self.assertEqual([name for name, t in self.calls], ['early'])
+        self.assertEqual(self.scheduler.Count, 1)
+
+if __name__ == '__main__' :
+    unittest.main()
@@ -0,0 +1,184 @@
+"""
+The MIT License (MIT)
+Copyright © 2019 Jean-Christophe Bos & HC² (www.hc2.fr)
+"""
+
+
+import os
+import sys
+import ssl
+import json
+import hmac
+import hashlib
+import socket
+import tempfile
+import unittest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_PATH)
+
+from   XAsyncioSockets    import XAsyncSocketsPool, \
+                                 XBufferSlots
+from   iotSocketStruct    import IoTSocketStruct
+from   iotSocketRouter    import IoTSocketRouter
+from   iotSocketSession   import IoTSocketSession
+from   centralHTTPRequest import CentralHTTPRequest
+
+CERT_FILENAME = os.path.join(ROOT_PATH, 'openhc2.crt')
+KEY_FILENAME  = os.path.join(ROOT_PATH, 'openhc2.key')
+
+def _getServerSSLContext() :
+    ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    ctx.load_cert_chain(CERT_FILENAME, KEY_FILENAME)
+    return ctx
+
+def _getClientSSLContext() :
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode    = ssl.CERT_NONE
+    return ctx
+
+def _recvExactly(sock, size) :
+    data = b''
+    while len(data) < size :
+        chunk = sock.recv(size - len(data))
+        if not chunk :
+            raise ConnectionError('Connection closed.')
+        data += chunk
+    return data
+
+class XAsyncioTCPTests(unittest.TestCase) :
+
+    def setUp(self) :
+        self.pool = XAsyncSocketsPool('auto', 1)
+        self.pool.AsyncWaitEvents(1)
+
+    def tearDown(self) :
+        self.pool.StopWaitEvents()
+
+    def test_tls_recv_send_round_trip(self) :
+        srvCtx = _getServerSSLContext()
+        def onDataRecv(xAsyncTCPClient, data, arg) :
+            xAsyncTCPClient.AsyncSendData(bytes(data).upper())
+            xAsyncTCPClient.AsyncRecvData(5, onDataRecv)
+        def onClientAccepted(xAsyncTCPServer, xAsyncTCPClient) :
+            xAsyncTCPClient.StartSSLContext(srvCtx, True)
+            xAsyncTCPClient.AsyncRecvData(5, onDataRecv)
+        stats = self.pool.EnableStats()
+        srv   = self.pool.TCPServer.Create(self.pool, ('127.0.0.1', 0), bufSlots=XBufferSlots(4, 256))
+        srv.OnClientAccepted = onClientAccepted
+        addr = srv.GetSocketObj().getsockname()
+        with _getClientSSLContext().wrap_socket(socket.create_connection(addr, timeout=5)) as cli :
+            for data in (b'hello', b'world') :
+                cli.sendall(data)
+                self.assertEqual(_recvExactly(cli, 5), data.upper())
+        # The loop polls through the stats selector,
+        self.assertGreater(stats.WakeupsCount, 0)
+        self.assertGreater(stats.EventsCount, 0)
+        self.pool.DisableStats()
+        self.assertIsNone(self.pool._selector.Stats)
+        srv.Close()
+
+class IoTSocketOnAsyncioTests(unittest.TestCase) :
+
+    CENTRAL_AUTH_KEY = bytes.fromhex('00112233445566778899AABBCCDDEEFF')
+    DEVICE_AUTH_KEY  = bytes.fromhex('43434343434343434444444444444444')
+    DEVICE_UID       = IoTSocketStruct.UIDToBin128('ObjTest')
+
+    def setUp(self) :
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.pool   = XAsyncSocketsPool('auto', 1)
+        self.router = IoTSocketRouter( aclFilename    = os.path.join(self.tmpDir.name, 'acl.json'),
+                                       centralAuthKey = self.CENTRAL_AUTH_KEY,
+                                       keepSessionSec = 60 )
+        self.router.Log = lambda line : None
+        self.router.AddGroup('Devices', { 'Telemetry' : True, 'TelemetryTokenExpMin' : 60 })
+        self.router.AddACLAccess( IoTSocketStruct.GroupNameToBin128('Devices'),
+                                  self.DEVICE_UID,
+                                  self.DEVICE_AUTH_KEY )
+        srvCtx = _getServerSSLContext()
+        def onTCPClientAccepted(xAsyncTCPServer, xAsyncTCPClient) :
+            IoTSocketSession(xAsyncTCPClient, self.router, srvCtx, 5)
+        def onHTTPClientAccepted(xAsyncTCPServer, xAsyncTCPClient) :
+            CentralHTTPRequest(xAsyncTCPClient, self.router, srvCtx, 65536, 5)
+        self.tcpSrv  = self.pool.TCPServer.Create(self.pool, ('127.0.0.1', 0), bufSlots=XBufferSlots(8, 4096))
+        self.httpSrv = self.pool.TCPServer.Create(self.pool, ('127.0.0.1', 0), bufSlots=XBufferSlots(8, 4096))
+        self.tcpSrv.OnClientAccepted  = onTCPClientAccepted
+        self.httpSrv.OnClientAccepted = onHTTPClientAccepted
+        self.pool.AsyncWaitEvents(1)
+
+    def tearDown(self) :
+        self.tcpSrv.Close()
+        self.httpSrv.Close()
+        self.pool.StopWaitEvents()
+        self.router.Stop()
+        self.tmpDir.cleanup()
+
+    def _openSession(self, uid, authKey) :
+        addr = self.tcpSrv.GetSocketObj().getsockname()
+        sock = socket.create_connection(addr, timeout=5)
+        sock.sendall(IoTSocketStruct.MakeInitiationReq(True, IoTSocketSession.IOTSOCKET_VER, 0, 2048))
+        ok, ruleType, ruleFlags = IoTSocketStruct.DecodeInitiationResp(_recvExactly(sock, 2))
+        self.assertTrue(ok)
+        sock  = _getClientSSLContext().wrap_socket(sock)
+        token = _recvExactly(sock, 16)
+        sock.sendall(uid + hmac.new(authKey, token, hashlib.sha256).digest())
+        self.assertEqual(_recvExactly(sock, 1), IoTSocketStruct.MakeAuthValidation(True))
+        return sock
+
+    def _recvTR(self, sock, expectedType) :
+        tot, withUID = IoTSocketStruct.DecodeDataTRHdr(_recvExactly(sock, 1))
+        self.assertEqual(tot, expectedType)
+        uid = _recvExactly(sock, 16) if withUID else None
+        if tot == IoTSocketStruct.TOT_REQUEST :
+            trackingNbr, dataFormat, formatOpt, dataLen = IoTSocketStruct.DecodeRequestHdr(_recvExactly(sock, 5))
+            return (uid, trackingNbr, _recvExactly(sock, dataLen))
+        if tot == IoTSocketStruct.TOT_RESPONSE :
+            trackingNbr, code, dataFormat, formatOpt, dataLen = IoTSocketStruct.DecodeResponseHdr(_recvExactly(sock, 6))
+            return (uid, trackingNbr, code, _recvExactly(sock, dataLen))
+        if tot == IoTSocketStruct.TOT_TELTOKEN :
+            return (uid, _recvExactly(sock, 8))
+        return (uid, )
+
+    def test_sessions_request_response(self) :
+        central = self._openSession(IoTSocketStruct.CENTRAL_EMPTY_UID, self.CENTRAL_AUTH_KEY)
+        device  = self._openSession(self.DEVICE_UID, self.DEVICE_AUTH_KEY)
+        with central, device :
+            self._recvTR(device, IoTSocketStruct.TOT_TELTOKEN)
+            device.sendall(IoTSocketStruct.MakePingTR())
+            self._recvTR(device, IoTSocketStruct.TOT_PONG)
+            payload = b'hello' * 2000
+            central.sendall(IoTSocketStruct.MakeRequestTRHdr(self.DEVICE_UID, 1234, 0, 0, len(payload)) + payload)
+            self.assertEqual(self._recvTR(device, IoTSocketStruct.TOT_REQUEST)[1:], (1234, payload))
+            device.sendall(IoTSocketStruct.MakeResponseTRHdr(None, 1234, 0, 0, 0, 3) + b'abc')
+            uid, trackingNbr, code, data = self._recvTR(central, IoTSocketStruct.TOT_RESPONSE)
+            self.assertEqual((uid, trackingNbr, data), (self.DEVICE_UID, 1234, b'abc'))
+
+    def test_central_http_request(self) :
+        device = self._openSession(self.DEVICE_UID, self.DEVICE_AUTH_KEY)
+        with device :
+            self._recvTR(device, IoTSocketStruct.TOT_TELTOKEN)
+            body = json.dumps({ 'UID' : 'ObjTest', 'Payload' : { 'a' : 'b' }, 'Format' : 'JSON' }).encode()
+            addr = self.httpSrv.GetSocketObj().getsockname()
+            with _getClientSSLContext().wrap_socket(socket.create_connection(addr, timeout=5)) as http :
+                http.sendall( ( 'POST /request HTTP/1.1\r\n'
+                                'Host: localhost\r\n'
+                                'Authorization: Bearer %s\r\n'
+                                'Content-Type: application/json\r\n'
+                                'Content-Length: %s\r\n\r\n' % (self.CENTRAL_AUTH_KEY.hex(), len(body)) ).encode()
+                              + body )
+                uid, trackingNbr, data = self._recvTR(device, IoTSocketStruct.TOT_REQUEST)
+                self.assertEqual(json.loads(data), { 'a' : 'b' })
+                device.sendall( IoTSocketStruct.MakeResponseTRHdr(None, trackingNbr, 0, IoTSocketStruct.PLDATA_FORMAT_JSON, 0, 4)
+                                + b'[42]' )
+                resp = b''
+                while True :
+                    chunk = http.recv(4096)
+                    if not chunk :
+                        break
+                    resp += chunk
+        self.assertEqual(resp.split(b'\r\n')[0], b'HTTP/1.1 200')
+        self.assertIn(b'"Payload": [42]', resp)
+
+if __name__ == '__main__' :
+    unittest.main()
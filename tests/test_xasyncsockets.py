@@ -0,0 +1,154 @@
+"""
+The MIT License (MIT)
+Copyright © 2018 Jean-Christophe Bos & HC² (www.hc2.fr)
+"""
+
+
+import os
+import sys
+import ssl
+import socket
+import threading
+import unittest
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_PATH)
+
+from   XAsyncSockets import XAsyncSocketsPool, \
+                            XAsyncTCPServer,   \
+                            XAsyncTCPClient,   \
+                            XBufferSlots,      \
+                            XTimerWheel
+
+class XAsyncTCPClientTests(unittest.TestCase) :
+
+    def setUp(self) :
+        self.pool = XAsyncSocketsPool('auto', 1)
+        self.pool.AsyncWaitEvents(1)
+
+    def tearDown(self) :
+        self.pool.StopWaitEvents()
+
+    def test_lazy_slot_recv_larger_than_slot(self) :
+        slots    = XBufferSlots(2, 256)
+        received = threading.Event()
+        result   = [ ]
+        def onDataRecv(xAsyncTCPClient, data, arg) :
+            result.append(bytes(data))
+            received.set()
+        def onClientAccepted(xAsyncTCPServer, xAsyncTCPClient) :
+            xAsyncTCPClient.AsyncRecvData(1000, onDataRecv)
+        srv = XAsyncTCPServer.Create(self.pool, ('127.0.0.1', 0), bufSlots=slots, lazyBufSlots=True)
+        srv.OnClientAccepted = onClientAccepted
+        with socket.create_connection(srv.GetSocketObj().getsockname()) as cli :
+            cli.sendall(bytes(range(250)) * 4)
+            self.assertTrue(received.wait(5))
+        self.assertEqual(result, [bytes(range(250)) * 4])
+        srv.Close()
+
+    def _startTLSServer(self, plainData, sslData) :
+        # Sends plainData in clear then sslData once TLS is started by the client,
+        ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ctx.load_cert_chain( os.path.join(ROOT_PATH, 'openhc2.crt'),
+                             os.path.join(ROOT_PATH, 'openhc2.key') )
+        srvSocket = socket.create_server(('127.0.0.1', 0))
+        def serve() :
+            with srvSocket :
+                cli, addr = srvSocket.accept()
+                with cli :
+                    cli.sendall(plainData)
+                    with ctx.wrap_socket(cli, server_side=True) as sslCli :
+                        sslCli.sendall(sslData)
+                        sslCli.recv(1)
+        threading.Thread(target=serve, daemon=True).start()
+        return srvSocket.getsockname()
+
+    def test_client_start_ssl_then_recv_data(self) :
+        ctx = ssl.create_default_context()
+        ctx.check_hostname = False
+        ctx.verify_mode    = ssl.CERT_NONE
+        for i in range(8) :
+            received = threading.Event()
+            result   = [ ]
+            def onChallengeRecv(xAsyncTCPClient, data, arg) :
+                result.append(bytes(data))
+                received.set()
+            def onHelloRecv(xAsyncTCPClient, data, arg) :
+                result.append(bytes(data))
+                xAsyncTCPClient.StartSSLContext(ctx)
+                xAsyncTCPClient.AsyncRecvData(16, onChallengeRecv)
+            addr = self._startTLSServer(b'hi', b'0123456789ABCDEF')
+            cli  = XAsyncTCPClient.Create(self.pool, addr, connectAsync=False)
+            cli.AsyncRecvData(2, onHelloRecv)
+            self.assertTrue(received.wait(5))
+            self.assertEqual(result, [b'hi', b'0123456789ABCDEF'])
+            cli.Close()
+
+class XBufferSlotsTests(unittest.TestCase) :
+
+    def test_slot_released_once_by_concurrent_threads(self) :
+        # Threads are switched very often to interleave inside the release,
+        switchInterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, switchInterval)
+        slots = XBufferSlots(4, 64, keepAlloc=False)
+        for i in range(500) :
+            slot    = slots.GetAvailableSlot()
+            barrier = threading.Barrier(4)
+            def release() :
+                barrier.wait()
+                slot.Available = True
+            threads = [ threading.Thread(target=release) for j in range(4) ]
+            for thread in threads :
+                thread.start()
+            for thread in threads :
+                thread.join()
+            self.assertEqual(slots.InUseCount, 0)
+            self.assertEqual(len(slots._freeSlots), 4)
+        self.assertEqual(len(set(map(id, slots._freeSlots))), 4)
+
+class XTimerWheelTests(unittest.TestCase) :
+
+    def setUp(self) :
+        self.wheel   = XTimerWheel(tickSec=0.25, slotsCount=1024)
+        # Times are given from the last tick seen by the wheel,
+        self.baseSec = self.wheel._lastTick * self.wheel.TickSec
+
+    def _tickSec(self, ticksCount) :
+        return self.baseSec + ticksCount * self.wheel.TickSec
+
+    def test_add_rounds_up_to_next_tick(self) :
+        self.wheel.Add('a', self.baseSec + 0.1)
+        self.assertEqual(self.wheel._entries['a'], (self.wheel._lastTick + 1) % 1024)
+        self.assertEqual(self.wheel.PopExpired(self.baseSec + 0.2), [ ])
+        self.assertEqual(self.wheel.PopExpired(self._tickSec(1)), ['a'])
+        self.assertEqual(self.wheel.Count, 0)
+
+    def test_entry_of_later_round_stays_in_slot(self) :
+        self.wheel.Add('a', self._tickSec(1024 + 2))
+        self.assertEqual(self.wheel.PopExpired(self._tickSec(2)), [ ])
+        self.assertEqual(self.wheel.Count, 1)
+        self.assertEqual(self.wheel.PopExpired(self._tickSec(1024 + 1)), [ ])
+        self.assertEqual(self.wheel.PopExpired(self._tickSec(1024 + 2)), ['a'])
+
+    def test_remove_pending_entry(self) :
+        self.wheel.Add('a', self._tickSec(1))
+        self.wheel.Add('b', self._tickSec(1))
+        self.wheel.Remove('a')
+        self.wheel.Remove('c')
+        self.assertEqual(self.wheel.Count, 1)
+        self.assertEqual(self.wheel.PopExpired(self._tickSec(1)), ['b'])
+
+    def test_pop_expired_after_ticks_jump(self) :
+        self.wheel.Add('a', self._tickSec(1))
+        self.wheel.Add('b', self._tickSec(3))
+        self.wheel.Add('c', self._tickSec(5))
+        self.wheel.Add('d', self._tickSec(20))
+        # Moved to a later expiration,
+        self.wheel.Add('b', self._tickSec(4))
+        self.assertEqual(self.wheel.PopExpired(self._tickSec(6)), ['a', 'b', 'c'])
+        self.assertEqual(self.wheel.Count, 1)
+        self.assertEqual(self.wheel.PopExpired(self._tickSec(4000)), ['d'])
+
+if __name__ == '__main__' :
+    unittest.main()